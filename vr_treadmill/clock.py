@@ -0,0 +1,77 @@
+import heapq
+import itertools
+import time
+
+
+class SystemClock:
+    """The real clock: time.perf_counter() and real sleeps."""
+
+    virtual = False
+
+    now = staticmethod(time.perf_counter)
+    sleep = staticmethod(time.sleep)
+
+    @staticmethod
+    def wait(event, timeout):
+        """Block until `event` is set or `timeout` seconds pass; True if it was set."""
+        return event.wait(timeout)
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class VirtualClock:
+    """
+    A clock that only moves when something waits on it.
+
+    sleep() and wait() jump straight to their deadline, running any callbacks
+    scheduled with call_at() on the way, in time order and at their own time.
+    A loop driven by this clock runs as fast as the CPU allows and, given the
+    same callbacks, takes exactly the same steps every time.
+
+    `oversleep`, if given, is called for each sleep and returns how many extra
+    seconds it lasts, to model a scheduler that wakes late.
+    """
+
+    virtual = True
+
+    def __init__(self, start=0.0, oversleep=None):
+        self.time = start
+        self.oversleep = oversleep
+        self.callbacks = []
+        self._order = itertools.count()  # Keeps callbacks at the same time in call order
+
+    def now(self):
+        return self.time
+
+    def call_at(self, when, callback):
+        """Run callback() once the clock reaches `when`."""
+        heapq.heappush(self.callbacks, (when, next(self._order), callback))
+
+    def advance(self, seconds):
+        """Move time forward without running callbacks, as a stall or busy work would."""
+        self.time += seconds
+
+    def _run_until(self, deadline, event=None):
+        callbacks = self.callbacks
+        while callbacks and callbacks[0][0] <= deadline:
+            if event is not None and event.is_set():
+                return
+            when, _, callback = heapq.heappop(callbacks)
+            if when > self.time:
+                self.time = when
+            callback()
+        if self.time < deadline and (event is None or not event.is_set()):
+            self.time = deadline
+
+    def sleep(self, seconds):
+        deadline = self.time + max(seconds, 0.0)
+        if self.oversleep is not None:
+            deadline += self.oversleep()
+        self._run_until(deadline)
+
+    def wait(self, event, timeout):
+        """Run callbacks until one sets `event` or `timeout` seconds pass."""
+        if not event.is_set():
+            self._run_until(self.time + timeout, event)
+        return event.is_set()
@@ -0,0 +1,150 @@
+import json
+import os
+from dataclasses import fields
+
+from vr_treadmill.curve_lut import CurveTable, mapping_from_points
+from vr_treadmill.outliers import DROPOUT_MODES, OutlierParams
+from vr_treadmill.prediction import PredictionParams
+from vr_treadmill.settings import Settings
+from vr_treadmill.smoothing import SMOOTHING_TYPE_MEAN, WINDOW_UNITS, FilterParams
+
+CONFIG_DIR = "./configs"
+LAST_RUN_CONFIG_NAME = "last run config"
+
+# Unchanged reports are still resent this often so the driver can't go stale
+DEFAULT_REPORT_MAX_STALENESS_MS = 500
+
+
+def config_path(name):
+    return os.path.join(CONFIG_DIR, f"{name}.json")
+
+
+def load_config_file(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _non_negative(value, cast, name):
+    val = cast(value)
+    if val < 0:
+        raise ValueError(f"{name} must not be negative, got {value!r}")
+    return val
+
+
+def _positive(value, cast, name):
+    val = cast(value)
+    if val <= 0:
+        raise ValueError(f"{name} must be positive, got {value!r}")
+    return val
+
+
+def filter_params_from_config(values, base=FilterParams()):
+    """Build FilterParams from a config's "filter_params" dict; missing keys keep `base`."""
+    params = {}
+    for field in fields(FilterParams):
+        value = float(values.get(field.name, getattr(base, field.name)))
+        # Beta 0 is a plain low-pass filter; everything else must be positive
+        if value < 0 or (value == 0 and field.name != "one_euro_beta"):
+            raise ValueError(f"{field.name} out of range: {value!r}")
+        params[field.name] = value
+    return FilterParams(**params)
+
+
+def outlier_params_from_config(values, base=OutlierParams()):
+    """Build OutlierParams from a config's "outlier_params" dict; missing keys keep `base`."""
+    params = {}
+    for field in fields(OutlierParams):
+        value = values.get(field.name, getattr(base, field.name))
+        if field.name == "dropout_mode":
+            if value not in DROPOUT_MODES:
+                raise ValueError(f"dropout_mode must be one of {DROPOUT_MODES}, got {value!r}")
+        elif field.name == "hampel_enabled":
+            value = bool(value)
+        elif field.name == "hampel_window":
+            value = int(value)
+            if value < 3:
+                raise ValueError(f"hampel_window must be at least 3, got {value!r}")
+        else:
+            value = float(value)
+            if value < 0:
+                raise ValueError(f"{field.name} must not be negative, got {value!r}")
+        params[field.name] = value
+    return OutlierParams(**params)
+
+
+def prediction_params_from_config(values, base=PredictionParams()):
+    """Build PredictionParams from a config's "prediction_params" dict; missing keys keep `base`."""
+    enabled = bool(values.get("enabled", base.enabled))
+    horizon_ms = float(values.get("horizon_ms", base.horizon_ms))
+    fit_samples = int(values.get("fit_samples", base.fit_samples))
+    max_change = float(values.get("max_change", base.max_change))
+    if horizon_ms < 0 or max_change < 0:
+        raise ValueError("prediction horizon and max change must not be negative")
+    if fit_samples < 2:
+        raise ValueError(f"fit_samples must be at least 2, got {fit_samples!r}")
+    return PredictionParams(enabled, horizon_ms, fit_samples, max_change)
+
+
+def report_limits_from_config(config):
+    """
+    Return (min_interval, max_staleness) in seconds for DedupOutput.
+
+    The config stores both in milliseconds; a max staleness of 0 turns the
+    periodic resend off.
+    """
+    min_interval_ms = float(config.get("report_min_interval_ms", 0))
+    max_staleness_ms = float(config.get("report_max_staleness_ms", DEFAULT_REPORT_MAX_STALENESS_MS))
+    if min_interval_ms < 0 or max_staleness_ms < 0:
+        raise ValueError("report intervals must not be negative")
+    return min_interval_ms / 1000, (max_staleness_ms / 1000 if max_staleness_ms else None)
+
+
+def settings_from_config(config, base=None):
+    """
+    Build a Settings snapshot from a saved config dict, without any Qt.
+
+    Accepts the same files MainWindow.save_config writes. A curve is only
+    applied if it was saved with the curve editor open, as in the GUI.
+    """
+    base = base if base is not None else Settings()
+
+    window_unit = config.get("smoothing_window_unit", base.smoothing_window_unit)
+    if window_unit not in WINDOW_UNITS:
+        raise ValueError(f"smoothing_window_unit must be one of {WINDOW_UNITS}, got {window_unit!r}")
+
+    curve_table = None
+    points = config.get("curve_points")
+    if config.get("curve_editor_open", False) and points:
+        curve_table = CurveTable(mapping_from_points(points))
+
+    return Settings(
+        sensitivity=_positive(config.get("sensitivity", base.sensitivity), float, "sensitivity"),
+        poll_rate=_positive(config.get("poll_rate", base.poll_rate), int, "poll_rate"),
+        output_rate=_non_negative(
+            config.get("output_rate", base.output_rate), int, "output_rate"
+        ),
+        average_count=_positive(
+            config.get("average_count", base.average_count), int, "average_count"
+        ),
+        smoothing_type=int(config.get("smoothing_type", SMOOTHING_TYPE_MEAN)),
+        smoothing_window_unit=window_unit,
+        outlier_params=outlier_params_from_config(
+            config.get("outlier_params", {}), base.outlier_params
+        ),
+        filter_params=filter_params_from_config(
+            config.get("filter_params", {}), base.filter_params
+        ),
+        prediction_params=prediction_params_from_config(
+            config.get("prediction_params", {}), base.prediction_params
+        ),
+        use_raw_input=bool(config.get("raw_input", base.use_raw_input)),
+        hold_left_thumbstick=bool(
+            config.get("hold_left_thumbstick", base.hold_left_thumbstick)
+        ),
+        recenter_enabled=bool(config.get("recenter_enabled", base.recenter_enabled)),
+        curve_table=curve_table,
+        show_input_on_curve=False,
+        scheduler_backend=config.get("scheduler", base.scheduler_backend),
+        normalize_rate=bool(config.get("normalize_rate", base.normalize_rate)),
+        event_driven=bool(config.get("event_driven", base.event_driven)),
+    )
@@ -1,10 +1,20 @@
 from typing import override
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtGui import QPainter, QPen, QColor, QMouseEvent, QIcon
-from PyQt6.QtCore import Qt, QPointF, QSize
+from PyQt6.QtCore import Qt, QPointF, QSize, pyqtSignal
+from vr_treadmill.curve_lut import (
+    EDITOR_GRAPH_HEIGHT,
+    EDITOR_GRAPH_WIDTH,
+    EDITOR_MARGIN,
+    CurveTable,
+    mapping_from_points,
+)
 
 
 class CurveEditorWindow(QWidget):
+    # Emitted on show/hide so the curve is only applied while the editor is open
+    visibility_changed = pyqtSignal(bool)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Sensitivity Curve Editor")
@@ -12,11 +22,12 @@ class CurveEditorWindow(QWidget):
         self.setMinimumSize(480, 550)
 
         self.curve_mapping = []
+        self.curve_table = CurveTable()
         self.dirty = True
 
-        self.margin = 40
-        self.graph_width = 400
-        self.graph_height = 400
+        self.margin = EDITOR_MARGIN
+        self.graph_width = EDITOR_GRAPH_WIDTH
+        self.graph_height = EDITOR_GRAPH_HEIGHT
 
         self.point_radius = 6
         self.dragging_point_index = None
@@ -30,6 +41,7 @@ class CurveEditorWindow(QWidget):
         ]
 
         self.setMouseTracking(True)
+        self.curve_changed()
 
     def sizeHint(self) -> QSize:
         return QSize(480, 550)
@@ -43,11 +55,20 @@ class CurveEditorWindow(QWidget):
         if isinstance(data, list):
             try:
                 self.points = [QPointF(float(x), float(y)) for x, y in data]
-                self.dirty = True
-                self.update()
+                self.curve_changed()
             except Exception as e:
                 print(f"Failed to load curve points: {e}")
 
+    @override
+    def showEvent(self, a0):
+        super().showEvent(a0)
+        self.visibility_changed.emit(True)
+
+    @override
+    def hideEvent(self, a0):
+        super().hideEvent(a0)
+        self.visibility_changed.emit(False)
+
     @override
     def paintEvent(self, a0):
         painter = QPainter(self)
@@ -109,8 +130,7 @@ class CurveEditorWindow(QWidget):
                         # Prevent deleting endpoints
                         if i != 0 and i != len(self.points) - 1:
                             del self.points[i]
-                            self.dirty = True
-                            self.update()
+                            self.curve_changed()
                         return
                     elif a0.button() == Qt.MouseButton.LeftButton:
                         self.dragging_point_index = i
@@ -135,8 +155,7 @@ class CurveEditorWindow(QWidget):
                 # Clamp y within graph
                 y = min(max(pos.y(), self.margin), self.margin + self.graph_height)
                 self.points[self.dragging_point_index] = QPointF(x, y)
-                self.dirty = True
-                self.update()
+                self.curve_changed()
 
     @override
     def mouseReleaseEvent(self, a0: QMouseEvent | None):
@@ -158,10 +177,15 @@ class CurveEditorWindow(QWidget):
                     ratio = (new_x - a.x()) / (b.x() - a.x())
                     new_y = a.y() + ratio * (b.y() - a.y())
                     self.points.insert(i + 1, QPointF(new_x, new_y))
-                    self.dirty = True
-                    self.update()
+                    self.curve_changed()
                     break
 
+    def curve_changed(self):
+        """Rebuild the mapping and republish the lookup table after an edit."""
+        self.dirty = True
+        self.curve_table.compile(self.get_or_build_curve_mapping())
+        self.update()
+
     def get_or_build_curve_mapping(self):
         if self.dirty:
             self.curve_mapping = self.build_curve_mapping()
@@ -169,14 +193,9 @@ class CurveEditorWindow(QWidget):
         return self.curve_mapping
 
     def build_curve_mapping(self):
-        mapping = []
-        for p in self.points:
-            input_x = ((p.x() - self.margin) / self.graph_width) * 32767
-            output_y = (
-                ((self.margin + self.graph_height) - p.y()) / self.graph_height * 32767
-            )
-            mapping.append((int(input_x), int(output_y)))
-        return mapping
+        return mapping_from_points(
+            self.serialize_points(), self.margin, self.graph_width, self.graph_height
+        )
 
     def is_point_near_line(self, p, a, b, tolerance=5):
         ax, ay = a.x(), a.y()
@@ -202,6 +221,8 @@ class CurveEditorWindow(QWidget):
         return dist < tolerance
 
     def set_current_input(self, input_value: int) -> None:
+        if input_value == self.current_input:
+            return
         self.current_input = input_value
         self.update()
 
@@ -0,0 +1,171 @@
+from array import array
+
+CURVE_MAX = 32767
+TABLE_SIZE = CURVE_MAX + 1
+
+# Geometry of the curve editor graph, which saved curve points are relative to
+EDITOR_MARGIN = 40
+EDITOR_GRAPH_WIDTH = 400
+EDITOR_GRAPH_HEIGHT = 400
+
+
+def mapping_from_points(
+    points,
+    margin=EDITOR_MARGIN,
+    graph_width=EDITOR_GRAPH_WIDTH,
+    graph_height=EDITOR_GRAPH_HEIGHT,
+):
+    """Convert editor (x, y) pixel positions into (input, output) curve points."""
+    mapping = []
+    for x, y in points:
+        input_x = ((x - margin) / graph_width) * CURVE_MAX
+        output_y = ((margin + graph_height) - y) / graph_height * CURVE_MAX
+        mapping.append((int(input_x), int(output_y)))
+    return mapping
+
+
+def points_from_mapping(
+    mapping,
+    margin=EDITOR_MARGIN,
+    graph_width=EDITOR_GRAPH_WIDTH,
+    graph_height=EDITOR_GRAPH_HEIGHT,
+):
+    """Convert (input, output) curve points into editor (x, y) pixel positions."""
+    return [
+        (
+            margin + input_x / CURVE_MAX * graph_width,
+            margin + graph_height - output_y / CURVE_MAX * graph_height,
+        )
+        for input_x, output_y in mapping
+    ]
+
+
+def interpolate_curve(input_value, curve):
+    """Linearly interpolate output from the curve based on input."""
+    for i in range(len(curve) - 1):
+        x1, y1 = curve[i]
+        x2, y2 = curve[i + 1]
+        if x1 <= input_value <= x2:
+            if x2 == x1:
+                return y1
+            # Linear interpolation
+            ratio = (input_value - x1) / (x2 - x1)
+            return y1 + ratio * (y2 - y1)
+    # If input is out of bounds, clamp to end values
+    if input_value < curve[0][0]:
+        return curve[0][1]
+    else:
+        return curve[-1][1]
+
+
+def _changed_input_range(old, new):
+    """Return the (start, end) input range affected by a curve edit, or None."""
+    if old is None:
+        return 0, CURVE_MAX
+
+    shortest = min(len(old), len(new))
+    lo = 0
+    while lo < shortest and old[lo] == new[lo]:
+        lo += 1
+    if lo == len(old) == len(new):
+        return None
+
+    # Matching suffix, never overlapping the matching prefix
+    suffix = 0
+    while (
+        suffix < shortest - lo
+        and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+    ):
+        suffix += 1
+
+    # Everything between the unchanged neighbours of the edit is affected
+    start = new[lo - 1][0] if lo > 0 else 0
+    end = new[len(new) - suffix][0] if suffix > 0 else CURVE_MAX
+    return max(start, 0), min(end, CURVE_MAX)
+
+
+def _build_values(curve, start, end):
+    """Curve output for every integer input in [start, end]."""
+    values = array("d")
+    x = start
+    # Earlier segments own shared endpoints, like interpolate_curve
+    for i in range(len(curve) - 1):
+        x1, y1 = curve[i]
+        x2, y2 = curve[i + 1]
+        if x > end:
+            break
+        if x2 < x:
+            continue
+        if x < x1:
+            stop = min(x1 - 1, end)
+            values.extend([curve[0][1]] * (stop - x + 1))
+            x = stop + 1
+            if x > end:
+                break
+        stop = min(x2, end)
+        if x2 == x1:
+            values.extend([y1] * (stop - x + 1))
+        else:
+            span = x2 - x1
+            rise = y2 - y1
+            values.extend([y1 + ((xi - x1) / span) * rise for xi in range(x, stop + 1)])
+        x = stop + 1
+
+    if x <= end:
+        fill = curve[-1][1] if x > curve[0][0] else curve[0][1]
+        values.extend([fill] * (end - x + 1))
+    return values
+
+
+class CurveTable:
+    """
+    Dense, double-buffered lookup table of a curve over the 0-32767 input range.
+
+    The GUI thread compiles into the back buffer and publishes it with a single
+    reference swap, so a reader sees either the old table or the new one, never
+    a half-built one. Edits only recompute the inputs between the unchanged
+    neighbours of the points that moved.
+    """
+
+    def __init__(self, curve=None):
+        self.curve = None
+        self._front = None
+        self._back = array("d", bytes(8 * TABLE_SIZE))
+        if curve is not None:
+            self.compile(curve)
+
+    @property
+    def ready(self):
+        return self._front is not None
+
+    @property
+    def table(self):
+        """The currently published table."""
+        return self._front
+
+    def lookup(self, input_value):
+        """Curve output for an input magnitude, in a single indexed load."""
+        index = int(input_value)
+        if index > CURVE_MAX:
+            index = CURVE_MAX
+        elif index < 0:
+            index = 0
+        return self._front[index]
+
+    def compile(self, curve):
+        """Rebuild the table for a new curve and publish it."""
+        curve = [(int(x), int(y)) for x, y in curve]
+        changed = _changed_input_range(self.curve if self.ready else None, curve)
+        if changed is None:
+            return
+        start, end = changed
+
+        back = self._back
+        if self._front is not None and (start, end) != (0, CURVE_MAX):
+            back[:] = self._front
+        back[start : end + 1] = _build_values(curve, start, end)
+
+        # Publish: readers pick up the new table with one reference read
+        self._back = self._front if self._front is not None else array("d", back)
+        self._front = back
+        self.curve = curve
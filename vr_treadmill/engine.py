@@ -0,0 +1,490 @@
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from vr_treadmill.clock import SYSTEM_CLOCK
+from vr_treadmill.flight_recorder import FlightRecorder
+from vr_treadmill.latency import StageTimings
+from vr_treadmill.outliers import InputCleanup
+from vr_treadmill.prediction import Predictor
+from vr_treadmill.scheduler import make_scheduler
+from vr_treadmill.smoothing import Smoother
+from vr_treadmill.telemetry import TelemetrySlot
+
+JOYSTICK_MIN = -32768
+JOYSTICK_MAX = 32767
+
+# Where the pointer is parked and measured from in non-raw mode
+POINTER_CENTER_Y = 500
+POINTER_RECENTER_POSITION = (700, 500)
+
+# Most deltas kept waiting for the engine, about 2 s of an 8 kHz mouse. The
+# raw listener keeps running while tracking is stopped; older input beyond
+# this is dropped instead of piling up.
+MAX_PENDING_INPUT = 16384
+
+# Upper bounds of the report magnitude histogram kept for monitoring
+REPORT_MAGNITUDE_BUCKETS = (0, 512, 2048, 4096, 8192, 16384, 24576, -JOYSTICK_MIN)
+
+
+class InputAccumulator:
+    """
+    Collects timestamped mouse deltas from input threads until the engine
+    takes them.
+
+    Producers append (time, dy) to a deque and the engine pops from the other end.
+    Both are atomic in CPython, so neither side takes a lock and a producer
+    never waits for the engine. Any number of producers may add; only the
+    engine thread should take.
+
+    `arrived` is set when new input is queued, so the engine can sleep until
+    input comes in instead of polling (see wait()). Both timestamps and
+    waits use `clock`. At most `max_pending` deltas are kept; the oldest go
+    first.
+    """
+
+    def __init__(self, clock=SYSTEM_CLOCK, max_pending=MAX_PENDING_INPUT):
+        self.clock = clock
+        self.pending = deque(maxlen=max_pending)
+        self.arrived = threading.Event()
+
+    def add(self, dx, dy, timestamp=None):
+        """Queue a delta; it is stamped with the clock's time unless given a time."""
+        self.pending.append((self.clock.now() if timestamp is None else timestamp, dy))
+        # Checking first keeps producers off the Event's lock while it is already set
+        if not self.arrived.is_set():
+            self.arrived.set()
+
+    def wait(self, timeout):
+        """
+        Block until input is queued or `timeout` seconds pass; True if input came.
+
+        Call take_batch() afterwards. The flag is cleared before that take, so
+        input added after it always wakes the next wait().
+        """
+        arrived = self.clock.wait(self.arrived, timeout)
+        self.arrived.clear()
+        return arrived
+
+    def take_batch(self):
+        """Return the (time, dy) events queued since the last call, oldest first."""
+        pending = self.pending
+        # Only pop what was there on entry, so a fast producer can't keep us here
+        return [pending.popleft() for _ in range(len(pending))]
+
+    def take(self):
+        """Return the Y delta accumulated since the last call."""
+        return sum(dy for _, dy in self.take_batch())
+
+    def clear(self):
+        pending = self.pending
+        for _ in range(len(pending)):
+            pending.popleft()
+        self.arrived.clear()
+
+
+class PointerInput:
+    """Non-raw input: reads the pointer's offset from a fixed line via pynput."""
+
+    def __init__(self):
+        self.mouse = None  # pynput is only imported on first use
+
+    def read_delta(self, recenter):
+        if self.mouse is None:
+            from pynput.mouse import Controller
+
+            self.mouse = Controller()
+
+        delta_y = self.mouse.position[1] - POINTER_CENTER_Y
+        if recenter:
+            self.mouse.position = POINTER_RECENTER_POSITION
+        return delta_y
+
+
+class InputRate:
+    """
+    Turns the input taken each tick into a velocity from real elapsed time.
+
+    A tick that runs late sees more counts than usual; dividing by the time
+    actually covered gives counts per second, which is then scaled back to
+    counts per nominal tick so sensitivity and curves keep their meaning.
+    """
+
+    # Ticks closer together than this fraction of a period are treated as this
+    # far apart, so an early tick can't divide a few counts into a spike
+    MIN_PERIOD_FRACTION = 0.25
+
+    def __init__(self):
+        self.last_time = None
+        self.velocity = 0.0  # counts per second
+
+    def reset(self):
+        self.last_time = None
+        self.velocity = 0.0
+
+    def per_tick(self, delta_y, now, poll_rate):
+        """Return delta_y rescaled to one nominal 1/poll_rate period."""
+        period = 1.0 / poll_rate
+        elapsed = period if self.last_time is None else now - self.last_time
+        self.last_time = now
+
+        self.velocity = delta_y / max(elapsed, period * self.MIN_PERIOD_FRACTION)
+        return self.velocity * period
+
+
+class Decimator:
+    """
+    Boxcar anti-aliasing filter from the tick rate down to the report rate.
+
+    Every tick's joystick value is added to a running sum; when a report is
+    due, the mean since the previous report is returned. Report times are on
+    a fixed grid so the report rate doesn't drift.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total = 0
+        self.count = 0
+        self.next_report = None
+
+    def push(self, value, now, rate):
+        """Add one tick's value; return the average if a report is due, else None."""
+        self.total += value
+        self.count += 1
+
+        period = 1.0 / rate
+        if self.next_report is None:
+            self.next_report = now
+        if now < self.next_report:
+            return None
+
+        self.next_report += period
+        if self.next_report <= now:
+            # Fell a whole period behind; start a new grid instead of bursting
+            self.next_report = now + period
+        average = round(self.total / self.count)
+        self.total = 0
+        self.count = 0
+        return average
+
+
+def make_raw_listener(on_delta, device_path=None, on_button=None):
+    """Create the platform's raw mouse listener: Windows raw input or Linux evdev."""
+    if sys.platform == "win32":
+        from vr_treadmill.raw_mouse_listener import RawMouseListener
+
+        return RawMouseListener(on_delta=on_delta, on_button=on_button)
+
+    from vr_treadmill.evdev_mouse_listener import EvdevMouseListener
+
+    return EvdevMouseListener(on_delta=on_delta, device_path=device_path, on_button=on_button)
+
+
+class TreadmillEngine:
+    """
+    The mouse-to-joystick pipeline, free of any GUI code.
+
+    Each tick takes the accumulated input, smooths it, applies sensitivity and
+    the optional curve, and sends the result to the output. Settings are read
+    from a SettingsChannel once per tick.
+
+    Pipeline time, input timestamps and tick scheduling all come from `clock`;
+    with a VirtualClock the real loop runs in simulated time (see harness).
+    Stage timings always measure real time.
+    """
+
+    def __init__(
+        self, settings_channel, output, accumulator=None, pointer=None, clock=SYSTEM_CLOCK
+    ):
+        self.settings_channel = settings_channel
+        self.output = output
+        self.clock = clock
+        self.accumulator = accumulator if accumulator is not None else InputAccumulator(clock)
+        self.pointer = pointer
+        self.telemetry = TelemetrySlot()
+        self.input_rate = InputRate()
+        self.decimator = Decimator()
+        self.last_report = 0
+        # Event-driven mode: ticks woken by input vs by the fallback timeout
+        self.input_wakes = 0
+        self.timeout_wakes = 0
+        # Lifetime counters for the metrics endpoint; only the engine thread writes them
+        self.running = False
+        self.ticks_total = 0
+        self.input_events_total = 0
+        self.reports_total = 0
+        self.report_magnitudes = [0] * len(REPORT_MAGNITUDE_BUCKETS)
+        self.report_magnitude_sum = 0
+
+        settings = settings_channel.current
+        self.cleanup = InputCleanup(settings.outlier_params)
+        self.smoother = Smoother(
+            settings.smoothing_type,
+            settings.average_count,
+            settings.smoothing_window_unit,
+            settings.filter_params,
+        )
+        self.predictor = Predictor(settings.prediction_params)
+        self.flight_recorder = FlightRecorder()
+        self.timings = StageTimings()
+        self.scheduler = None
+        self.lateness = 0.0  # How late the current tick woke
+        # Pipeline time minus clock time as of the last tick: 0 when ticking
+        # live, the trace's offset when replay passes its own times
+        self.time_offset = 0.0
+        self.trace = None  # Optional TraceWriter capturing pointer-mode input
+
+    def reset(self):
+        """Clear the pipeline's history, as when tracking starts."""
+        # Input that arrived while stopped is stale; don't burst it out now
+        self.accumulator.clear()
+        self.cleanup.reset()
+        self.smoother.reset()
+        self.predictor.reset()
+        self.input_rate.reset()
+        self.decimator.reset()
+        self.last_report = 0
+        self.input_wakes = self.timeout_wakes = 0
+
+    def read_input(self, settings):
+        """Return the (time, dy) events since the last tick."""
+        if settings.use_raw_input:
+            return self.accumulator.take_batch()
+        now = self.clock.now()
+        delta = self.pointer.read_delta(settings.recenter_enabled)
+        if self.trace is not None:
+            self.trace.pointer_delta(delta, now)
+        return [(now, delta)]
+
+    def tick(self, settings, now=None):
+        """
+        Run one pass of the pipeline and return the joystick value it produced.
+
+        `now` is the pipeline time in seconds (the engine clock's time by
+        default); trace replay passes the recorded time instead.
+        """
+        timings = self.timings
+        perf_counter_ns = time.perf_counter_ns
+        started = perf_counter_ns()
+        timings.lateness.record(int(self.lateness * 1e9))
+
+        events = self.read_input(settings)
+        taken = perf_counter_ns()
+        timings.accumulate.record(taken - started)
+        if now is None:
+            now = self.clock.now()
+            self.time_offset = 0.0
+        else:
+            self.time_offset = now - self.clock.now()
+        if events and settings.use_raw_input:
+            timings.input_age.record(int((now - events[0][0]) * 1e9))
+
+        self.ticks_total += 1
+        self.input_events_total += len(events)
+        raw_delta = delta_y_current = sum(dy for _, dy in events)
+        if settings.normalize_rate:
+            delta_y_current = self.input_rate.per_tick(delta_y_current, now, settings.poll_rate)
+
+        self.cleanup.configure(settings.outlier_params)
+        delta_y_current = self.cleanup.push(delta_y_current, now)
+
+        # Resizing the window clears the smoothing history
+        self.smoother.configure(
+            settings.smoothing_type,
+            settings.average_count,
+            settings.smoothing_window_unit,
+            settings.filter_params,
+        )
+        delta_y = self.smoother.push(delta_y_current, now)
+
+        # Configured even while off, so the predictor sees it being turned back on
+        self.predictor.configure(settings.prediction_params)
+        if settings.prediction_params.enabled:
+            delta_y = self.predictor.push(delta_y, now)
+
+        smoothed = perf_counter_ns()
+        timings.smoothing.record(smoothed - taken)
+
+        scaled_input = abs(delta_y) * settings.sensitivity
+
+        curve_input = None
+        curve_table = settings.curve_table
+        if curve_table is not None:
+            output_magnitude = curve_table.lookup(scaled_input)
+
+            if settings.show_input_on_curve:
+                curve_input = min(int(scaled_input), JOYSTICK_MAX)
+        else:
+            output_magnitude = scaled_input
+
+        mousey = (
+            -int(output_magnitude)
+            if delta_y > 0
+            else int(output_magnitude)
+            if delta_y < 0
+            else 0
+        )
+        clamped_mousey = max(JOYSTICK_MIN, min(JOYSTICK_MAX, mousey))
+        mapped = perf_counter_ns()
+        timings.curve.record(mapped - smoothed)
+
+        self.flight_recorder.record(
+            now, raw_delta, delta_y, scaled_input, output_magnitude, clamped_mousey, self.lateness
+        )
+
+        # With a separate report rate, ticks are averaged down to it
+        report = clamped_mousey
+        if settings.output_rate:
+            report = self.decimator.push(clamped_mousey, now, settings.output_rate)
+        if report is not None:
+            left_thumb = report != 0 if settings.hold_left_thumbstick else None
+            sending = perf_counter_ns()
+            self.output.send(report, left_thumb, now)
+            timings.output.record(perf_counter_ns() - sending)
+            self.last_report = report
+            magnitude = abs(report)
+            self.reports_total += 1
+            self.report_magnitudes[bisect_left(REPORT_MAGNITUDE_BUCKETS, magnitude)] += 1
+            self.report_magnitude_sum += magnitude
+
+        self.telemetry.write(self.last_report, curve_input)
+        timings.tick.record(perf_counter_ns() - started)
+        return clamped_mousey
+
+    def wait_for_tick(self, settings):
+        """
+        Block until the next tick should run.
+
+        Normally that is the scheduler's next deadline. In event-driven mode
+        (raw input only) the tick runs as soon as input arrives, or after
+        1/poll_rate without input so the smoothing still decays to zero.
+        """
+        if settings.event_driven and settings.use_raw_input:
+            if self.accumulator.wait(1.0 / settings.poll_rate):
+                self.input_wakes += 1
+            else:
+                self.timeout_wakes += 1
+            self.lateness = 0.0
+            # Fixed-rate ticks pick up from now if the mode is switched back
+            self.scheduler.resync()
+        else:
+            self.scheduler.wait()
+            self.lateness = self.scheduler.last_lateness
+
+    def run(self, should_continue):
+        """Tick at the configured poll rate until should_continue() is false."""
+        settings = self.settings_channel.current
+        self.scheduler = make_scheduler(
+            settings.poll_rate, settings.scheduler_backend, self.clock
+        )
+        scheduler = self.scheduler
+        self.reset()
+        self.running = True
+
+        try:
+            while should_continue():
+                self.wait_for_tick(settings)
+
+                # One reference read picks up everything the GUI has published
+                settings = self.settings_channel.current
+                if scheduler.rate != settings.poll_rate:
+                    scheduler.set_rate(settings.poll_rate)
+
+                self.tick(settings)
+        finally:
+            self.running = False
+            # Centre from this thread too, after the last tick, so a tick that
+            # was still running when the GUI centred the stick can't leave it
+            # deflected
+            self.release_output()
+            self.telemetry.clear()
+            scheduler.close()
+            print(f"Tick scheduler ({scheduler.name}): {scheduler.stats.summary()}")
+            cleanup = self.cleanup
+            if cleanup.hampel.rejected or cleanup.dropout.bridged:
+                print(
+                    f"Input cleanup: {cleanup.hampel.rejected} outliers rejected, "
+                    f"{cleanup.dropout.bridged} dropout ticks bridged"
+                )
+            if self.input_wakes or self.timeout_wakes:
+                print(
+                    f"Event-driven ticks: {self.input_wakes} woken by input, "
+                    f"{self.timeout_wakes} by timeout"
+                )
+            output_stats = self.output.stats_summary() if self.output is not None else None
+            if output_stats is not None:
+                print(f"Output ({self.output.name}): {output_stats}")
+
+    def export_performance(self, path=None):
+        """Write the stage histograms and tick statistics as JSON; return the path."""
+        extra = {}
+        if self.scheduler is not None:
+            extra["scheduler"] = {"backend": self.scheduler.name, **self.scheduler.stats.to_dict()}
+        return self.timings.export_json(path, extra)
+
+    def pipeline_time(self):
+        """The current time on the timeline the ticks run on."""
+        return self.clock.now() + self.time_offset
+
+    def release_output(self):
+        """Center the stick, e.g. after tracking stops."""
+        self.accumulator.clear()
+        if self.output is not None:
+            self.output.center(self.pipeline_time())
+
+
+if __name__ == "__main__":
+    # Stress test: several producer threads against one consumer, no lost deltas
+    producers = 4
+    deltas_per_producer = 250000
+    # Unbounded, so a consumer that falls behind can't make deltas drop
+    accumulator = InputAccumulator(max_pending=None)
+    done = threading.Event()
+    taken = []
+
+    def produce(seed):
+        for i in range(deltas_per_producer):
+            accumulator.add(0, (seed + i) % 7 - 3)
+
+    def consume():
+        while not done.is_set():
+            taken.append(accumulator.take())
+        taken.append(accumulator.take())
+
+    expected = sum(
+        (seed + i) % 7 - 3 for seed in range(producers) for i in range(deltas_per_producer)
+    )
+    consumer = threading.Thread(target=consume)
+    threads = [threading.Thread(target=produce, args=(seed,)) for seed in range(producers)]
+    started = time.perf_counter()
+    consumer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    consumer.join()
+
+    total = producers * deltas_per_producer
+    assert sum(taken) == expected, (sum(taken), expected)
+    print(
+        f"{total} deltas from {producers} producers in {elapsed * 1000:.0f} ms "
+        f"({elapsed / total * 1e9:.0f} ns/delta), {len(taken)} takes, none lost"
+    )
+
+    # While stopped, input is capped and then discarded when tracking starts
+    from vr_treadmill.outputs import NullOutput
+    from vr_treadmill.settings import SettingsChannel
+
+    engine = TreadmillEngine(SettingsChannel(), NullOutput())
+    for _ in range(MAX_PENDING_INPUT * 3):
+        engine.accumulator.add(0, 5)
+    assert len(engine.accumulator.pending) == MAX_PENDING_INPUT
+    engine.reset()
+    assert not engine.accumulator.pending and not engine.accumulator.arrived.is_set()
+    print(f"Idle input capped at {MAX_PENDING_INPUT} deltas and dropped on start")
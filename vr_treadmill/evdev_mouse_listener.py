@@ -0,0 +1,97 @@
+import select
+import threading
+
+
+def find_mouse_device():
+    """Return the first evdev device that reports relative X/Y motion, or None."""
+    import evdev
+    from evdev import ecodes
+
+    for path in evdev.list_devices():
+        device = evdev.InputDevice(path)
+        relative_axes = device.capabilities().get(ecodes.EV_REL, [])
+        if ecodes.REL_X in relative_axes and ecodes.REL_Y in relative_axes:
+            return device
+        device.close()
+    return None
+
+
+class EvdevMouseListener:
+    """
+    Linux counterpart of RawMouseListener.
+
+    Reads relative motion straight from an evdev device (needs read access to
+    /dev/input) and passes one (dx, dy) delta per input report to on_delta,
+    and button changes to on_button(button, pressed) with buttons numbered
+    from 1 (left, right, middle, side, extra).
+    """
+
+    def __init__(self, on_delta=None, device_path=None, on_button=None):
+        self.on_delta = on_delta  # Called on the listener thread
+        self.on_button = on_button
+        self.device_path = device_path
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.run, name="EvdevMouseListener", daemon=True
+        )
+        self.thread.start()
+
+    def isRunning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        device = None
+        try:
+            import evdev
+            from evdev import ecodes
+
+            if self.device_path:
+                device = evdev.InputDevice(self.device_path)
+            else:
+                device = find_mouse_device()
+            if device is None:
+                raise OSError("no relative mouse device found")
+            print(f"Evdev Mouse Listener started on {device.path} ({device.name}).")
+
+            dx = dy = 0
+            while self.running:
+                # Time out regularly so stop() is noticed
+                ready, _, _ = select.select([device.fd], [], [], 0.1)
+                if not ready:
+                    continue
+                for event in device.read():
+                    if event.type == ecodes.EV_REL:
+                        if event.code == ecodes.REL_X:
+                            dx += event.value
+                        elif event.code == ecodes.REL_Y:
+                            dy += event.value
+                    elif (
+                        event.type == ecodes.EV_KEY
+                        and ecodes.BTN_MOUSE <= event.code < ecodes.BTN_MOUSE + 5
+                        and event.value != 2  # Autorepeat
+                        and self.on_button is not None
+                    ):
+                        self.on_button(event.code - ecodes.BTN_MOUSE + 1, event.value == 1)
+                    elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+                        if (dx or dy) and self.on_delta is not None:
+                            self.on_delta(dx, dy)
+                        dx = dy = 0
+
+        except Exception as e:
+            print(f"Evdev Mouse Listener error: {e}")
+        finally:
+            self.running = False
+            if device is not None:
+                device.close()
+            print("Evdev Mouse Listener stopped.")
@@ -0,0 +1,200 @@
+import os
+import struct
+import time
+from array import array
+
+FLIGHT_RECORDER_DIR = "./flight_recordings"
+# Written on exit, replacing the previous run's
+LAST_RUN_RECORDING_NAME = "last run.bin"
+
+# About 36 minutes at 60 Hz, or 2 minutes at 1 kHz
+DEFAULT_CAPACITY = 1 << 17
+
+# A snapshot leaves out the oldest ticks within this many slots of the write
+# index: the engine may overwrite them while the columns are being copied.
+# Far more ticks than run while the snapshot is taken, even at 1 kHz.
+SNAPSHOT_GUARD = 256
+
+FLIGHT_MAGIC = b"VRFR"
+FLIGHT_VERSION = 1
+# magic, version, record count, field count
+FLIGHT_HEADER = struct.Struct("<4sHIH")
+
+# Every tick's pipeline state, one column per field
+FIELDS = (
+    "time",  # time.perf_counter() at the tick
+    "raw_delta",  # Input taken this tick, before any processing
+    "smoothed_delta",  # After cleanup, smoothing and prediction
+    "scaled_input",  # |smoothed| * sensitivity
+    "curve_output",  # Magnitude after the curve (or scaled_input without one)
+    "report",  # Clamped joystick value
+    "lateness",  # How late the tick woke, in seconds
+)
+
+
+class FlightRecorder:
+    """
+    Keeps the last `capacity` ticks of pipeline state in preallocated arrays.
+
+    record() only stores floats into existing array slots, so recording
+    allocates nothing. dump() writes the ticks in order to a compact binary
+    file: time as float64, every other field as float32, column by column.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.columns = [array("d", bytes(8 * capacity)) for _ in FIELDS]
+        (
+            self.time,
+            self.raw_delta,
+            self.smoothed_delta,
+            self.scaled_input,
+            self.curve_output,
+            self.report,
+            self.lateness,
+        ) = self.columns
+        self.index = 0  # Next slot to write
+        self.count = 0
+
+    def record(self, now, raw_delta, smoothed_delta, scaled_input, curve_output, report, lateness):
+        i = self.index
+        self.time[i] = now
+        self.raw_delta[i] = raw_delta
+        self.smoothed_delta[i] = smoothed_delta
+        self.scaled_input[i] = scaled_input
+        self.curve_output[i] = curve_output
+        self.report[i] = report
+        self.lateness[i] = lateness
+        i += 1
+        self.index = 0 if i == self.capacity else i
+        if self.count < self.capacity:
+            self.count += 1
+
+    def snapshot(self):
+        """
+        Return each column's recorded values, oldest first.
+
+        Safe to call from another thread while the engine records. A row is
+        complete before `index` moves past it, so only rows behind the index
+        read on entry are copied. The oldest rows within SNAPSHOT_GUARD slots
+        ahead of the index are left out, as the engine may overwrite them
+        while the columns are copied one after another.
+        """
+        index = self.index
+        count = self.count  # Updated after index, so it can lag it by one
+        if count >= self.capacity or index < count - 1:
+            count = self.capacity  # Wrapped
+        else:
+            count = min(count, index)
+        count = max(min(count, self.capacity - SNAPSHOT_GUARD), 0)
+        start = (index - count) % self.capacity
+        if start + count <= self.capacity:
+            return [column[start : start + count] for column in self.columns]
+        wrap = start + count - self.capacity
+        return [column[start:] + column[:wrap] for column in self.columns]
+
+    def dump(self, path=None):
+        """Write the recorded ticks to `path` (a timestamped file by default) and return it."""
+        if path is None:
+            os.makedirs(FLIGHT_RECORDER_DIR, exist_ok=True)
+            name = time.strftime("flight-%Y%m%d-%H%M%S.bin")
+            path = os.path.join(FLIGHT_RECORDER_DIR, name)
+
+        columns = self.snapshot()
+        count = len(columns[0])
+        with open(path, "wb") as f:
+            f.write(FLIGHT_HEADER.pack(FLIGHT_MAGIC, FLIGHT_VERSION, count, len(FIELDS)))
+            columns[0].tofile(f)
+            for column in columns[1:]:
+                array("f", column).tofile(f)
+        return path
+
+    def dump_last_run(self):
+        """Dump to the last-run file on exit, if anything was recorded; return the path or None."""
+        if self.count == 0:
+            return None
+        os.makedirs(FLIGHT_RECORDER_DIR, exist_ok=True)
+        return self.dump(os.path.join(FLIGHT_RECORDER_DIR, LAST_RUN_RECORDING_NAME))
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+
+def read_flight_recording(path):
+    """Return a dict of field name -> list of values from a dumped recording."""
+    with open(path, "rb") as f:
+        magic, version, count, field_count = FLIGHT_HEADER.unpack(f.read(FLIGHT_HEADER.size))
+        if magic != FLIGHT_MAGIC or version != FLIGHT_VERSION or field_count != len(FIELDS):
+            raise ValueError(f"{path} is not a v{FLIGHT_VERSION} flight recording")
+        result = {}
+        for i, name in enumerate(FIELDS):
+            column = array("d" if i == 0 else "f")
+            column.fromfile(f, count)
+            result[name] = column.tolist()
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import timeit
+
+    if len(sys.argv) > 1:
+        # Summarise a dumped recording
+        recording = read_flight_recording(sys.argv[1])
+        times = recording["time"]
+        lateness = recording["lateness"]
+        print(f"{len(times)} ticks over {times[-1] - times[0]:.1f} s" if times else "No ticks")
+        if times:
+            worst = max(range(len(times)), key=lateness.__getitem__)
+            print(
+                f"Worst tick {lateness[worst] * 1000:.2f} ms late at "
+                f"{times[worst] - times[0]:.2f} s, report {recording['report'][worst]:.0f}"
+            )
+        sys.exit()
+
+    recorder = FlightRecorder()
+    ticks = 1_000_000
+    elapsed = timeit.timeit(
+        lambda: [recorder.record(i * 0.001, 3, 2.5, 250.0, 300.0, -300, 0.00001) for i in range(ticks)],
+        number=1,
+    )
+    print(f"record: {elapsed / ticks * 1e9:.0f} ns/tick")
+
+    started = time.perf_counter()
+    path = recorder.dump(os.path.join(tempfile.gettempdir(), "vr_treadmill_flight_bench.bin"))
+    dump_time = time.perf_counter() - started
+    size = os.path.getsize(path)
+    recording = read_flight_recording(path)
+    assert len(recording["time"]) == recorder.capacity - SNAPSHOT_GUARD
+    assert recording["time"][-1] == (ticks - 1) * 0.001
+    print(f"dump: {len(recording['time'])} ticks, {size / 1024:.0f} KiB in {dump_time * 1000:.1f} ms")
+    os.remove(path)
+
+    # Snapshots taken while another thread records never hold torn rows
+    import threading
+
+    recorder = FlightRecorder(capacity=4096)
+    stop = threading.Event()
+
+    def record_ticks():
+        i = 0
+        while not stop.is_set():
+            recorder.record(i, i % 1000, 0, 0, 0, 0, i % 997)
+            i += 1
+            time.sleep(0.0001)  # Faster than any poll rate
+
+    sys.setswitchinterval(1e-5)  # Switch threads as often as possible
+    thread = threading.Thread(target=record_ticks, daemon=True)
+    thread.start()
+    snapshots = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < 2.0:  # Wraps several times
+        snapshots.append(recorder.snapshot())
+    stop.set()
+    thread.join()
+    for times, raw, *_, lateness in snapshots:
+        assert all(r == t % 1000 and late == t % 997 for t, r, late in zip(times, raw, lateness))
+        assert all(b == a + 1 for a, b in zip(times, times[1:]))
+    print(f"{len(snapshots)} snapshots during recording, no torn rows")
@@ -0,0 +1,1396 @@
+import os
+import json
+import signal
+import sys
+from dataclasses import asdict
+from PyQt6 import QtCore
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import (
+    QApplication,
+    QWidget,
+    QPushButton,
+    QVBoxLayout,
+    QLineEdit,
+    QLabel,
+    QCheckBox,
+    QRadioButton,
+    QGroupBox,
+    QHBoxLayout,
+    QComboBox,
+    QInputDialog,
+    QFormLayout,
+    QGridLayout,
+)
+from vr_treadmill.config import (
+    CONFIG_DIR,
+    DEFAULT_REPORT_MAX_STALENESS_MS,
+    LAST_RUN_CONFIG_NAME,
+    config_path,
+    filter_params_from_config,
+    outlier_params_from_config,
+    prediction_params_from_config,
+    report_limits_from_config,
+)
+from vr_treadmill.curve_editor import CurveEditorWindow
+from vr_treadmill.curve_lut import interpolate_curve
+from vr_treadmill.engine import PointerInput, TreadmillEngine, make_raw_listener
+from vr_treadmill.input_trace import TraceWriter
+from vr_treadmill.latency import STAGES
+from vr_treadmill.outliers import DROPOUT_MODES, OutlierParams
+from vr_treadmill.outputs import OUTPUT_AUTO, DedupOutput, make_output
+from vr_treadmill.prediction import PredictionParams
+from vr_treadmill.sampling_profiler import SamplingProfiler, toggle_profiler
+from vr_treadmill.scheduler import SCHEDULER_AUTO
+from vr_treadmill.settings import Settings, SettingsChannel
+from vr_treadmill.smoothing import (
+    SMOOTHING_TYPE_EMA,
+    SMOOTHING_TYPE_KALMAN,
+    SMOOTHING_TYPE_MAX,
+    SMOOTHING_TYPE_MEAN,
+    SMOOTHING_TYPE_MEDIAN,
+    SMOOTHING_TYPE_ONE_EURO,
+    FilterParams,
+    WINDOW_UNIT_SAMPLES,
+    WINDOW_UNITS,
+)
+from vr_treadmill import startup_profile
+from vr_treadmill.startup_profile import phase
+from vr_treadmill.ui_resources.stylesheets import get_common_stylesheet
+from vr_treadmill.ui_resources.joystick_bar import JoystickBar
+
+enabled = False
+listener = None  # pynput keyboard listener, started on first use
+
+useRawInput = True
+holdLeftThumbstick = False
+
+keyToggle = False
+
+# Key binds are kept in their str() form, as saved in configs
+aKey = "Key.alt_gr"
+aKeyToggle = False
+
+recenterEnabled = False
+recenterToggleKey = "Key.f9"
+recenterKeyToggle = False
+
+quitKey = "Key.ctrl_r"
+
+flightRecorderKey = "Key.f10"  # Saves the last few minutes of ticks to a file
+flightRecorderKeyToggle = False
+
+profilerKey = "Key.f11"  # Starts and stops the sampling profiler
+profilerKeyToggle = False
+
+# -------------------------------------------------------------------
+sensitivity = 100  # How sensitive the joystick will be
+pollRate = 60  # Times per second to process input (and check mouse in non-raw)
+outputRate = 0  # Gamepad reports per second; 0 sends one per poll
+averageCount = 5  # Size of the smoothing window, in smoothingWindowUnit
+smoothingWindowUnit = WINDOW_UNIT_SAMPLES  # Data points, or milliseconds of input
+# -------------------------------------------------------------------
+
+smoothingType = SMOOTHING_TYPE_MEAN
+filterParams = FilterParams()  # Tuning for the EMA, One Euro and Kalman types
+outlierParams = OutlierParams()  # Outlier rejection and dropout bridging before smoothing
+predictionParams = PredictionParams()  # Extrapolation after smoothing to cut lag
+
+normalizeRate = True  # Scale input by the real time between ticks
+eventDriven = False  # Process raw input as it arrives instead of at the poll rate
+schedulerBackend = SCHEDULER_AUTO  # "auto", "hybrid", "timerfd" or "sleep"
+displayRate = 60  # Times per second the GUI samples and redraws the live output
+outputBackend = OUTPUT_AUTO  # Set from the command line
+outputPath = None
+metricsServer = None  # Optional Prometheus endpoint, started from the command line
+inputTrace = None  # Optional TraceWriter capturing mouse and key input
+reportMinIntervalMs = 0  # Changed reports are held back until this much time has passed
+reportMaxStalenessMs = DEFAULT_REPORT_MAX_STALENESS_MS  # Unchanged reports are resent this often
+
+# Snapshot of the settings above that the worker reads; republished on change
+settingsChannel = SettingsChannel(
+    Settings(
+        sensitivity=sensitivity,
+        poll_rate=pollRate,
+        output_rate=outputRate,
+        average_count=averageCount,
+        smoothing_window_unit=smoothingWindowUnit,
+        filter_params=filterParams,
+        outlier_params=outlierParams,
+        prediction_params=predictionParams,
+        smoothing_type=smoothingType,
+        use_raw_input=useRawInput,
+        hold_left_thumbstick=holdLeftThumbstick,
+        recenter_enabled=recenterEnabled,
+        scheduler_backend=schedulerBackend,
+        normalize_rate=normalizeRate,
+        event_driven=eventDriven,
+    )
+)
+
+# The output backend is only created when tracking first starts
+engine = TreadmillEngine(settingsChannel, output=None, pointer=PointerInput())
+
+profiler = SamplingProfiler()
+
+
+def start_keyboard_listener():
+    """Start the global keyboard hook if it isn't running yet."""
+    global listener
+    if listener is None:
+        from pynput.keyboard import Listener
+
+        listener = Listener(on_press=onPress, on_release=onRelease)
+        listener.start()
+
+
+class JoystickWorker(QtCore.QThread):
+    """
+    Runs the engine's tick loop on its own thread while tracking is enabled.
+
+    The clock, input and output all belong to the engine, so the same loop can
+    be driven in virtual time by vr_treadmill.harness. `should_continue`
+    replaces the check of the global tracking state.
+    """
+
+    def __init__(self, engine, parent=None, should_continue=None):
+        super().__init__(parent)
+        self.running = False
+        self.engine = engine
+        self.telemetry = engine.telemetry
+        self.should_continue = should_continue or (lambda: enabled and not keyToggle)
+
+    def start_loop(self):
+        self.running = True
+        self.start()
+
+    def stop_loop(self):
+        self.running = False
+
+    def run(self):
+        self.engine.run(self.should_continue)
+
+
+class MainWindow(QWidget):
+    def __init__(self, *args, startup_config=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Thread + Mouse
+        self.worker = JoystickWorker(engine)
+        self.lastTelemetry = self.worker.telemetry.read()
+
+        self.raw_listener = None  # Created when tracking first starts
+
+        self.setWindowTitle("Maratron")
+        self.setWindowIcon(QIcon("./resources/mini.ico"))
+
+        # Group: Tracking Controls
+        trackingGroup = QGroupBox("Tracking")
+        trackingGroup.setToolTip("Control whether mouse tracking is currently active.")
+        trackingLayout = QVBoxLayout()
+        self.joystickBar = JoystickBar()
+        self.joystickBar.setToolTip("Displays the current Y-axis joystick value being sent to the virtual gamepad.")
+        trackingLayout.addWidget(self.joystickBar)
+
+        self.startStopButton = QPushButton("Start")
+        self.startStopButton.setToolTip("Start or stop tracking mouse input and sending it to the virtual joystick.")
+        self.startStopButton.clicked.connect(self.toggleTracking)
+        trackingLayout.addWidget(self.startStopButton)
+        trackingGroup.setLayout(trackingLayout)
+
+        # Group: Input Settings
+        inputGroup = QGroupBox("Input Settings")
+        inputGroup.setToolTip("Configure how input is captured and how frequently it's processed.")
+        inputLayout = QFormLayout()
+        self.senseLine = QLineEdit(str(sensitivity))
+        self.senseLine.setToolTip("Adjust the sensitivity multiplier for mouse movement to joystick input.")
+        self.senseLine.textChanged.connect(self.setSensitivity)
+
+        self.pollRateLine = QLineEdit(str(pollRate))
+        self.pollRateLine.setToolTip("Set how many times per second input is processed and smoothed.")
+        self.pollRateLine.textChanged.connect(self.setPollingRate)
+
+        self.outputRateLine = QLineEdit(str(outputRate))
+        self.outputRateLine.setToolTip(
+            "Set how many times per second the joystick is updated. Values processed in between "
+            "are averaged. 0 updates the joystick every poll."
+        )
+        self.outputRateLine.textChanged.connect(self.setOutputRate)
+
+        self.rawInputCheckbox = QCheckBox("Use Raw Input")
+        self.rawInputCheckbox.setToolTip(
+            "Enable low-level raw mouse input for better precision. "
+            "Uses raw input on Windows and evdev on Linux."
+        )
+        self.rawInputCheckbox.setChecked(useRawInput)
+        self.rawInputCheckbox.stateChanged.connect(self.toggleRawInput)
+
+        self.holdLThumbCheckbox = QCheckBox("Hold Left Thumbstick")
+        self.holdLThumbCheckbox.setToolTip("When enabled, the Left Thumbstick button is held while there's movement input.")
+        self.holdLThumbCheckbox.setChecked(holdLeftThumbstick)
+        self.holdLThumbCheckbox.stateChanged.connect(self.toggleHoldThumbstick)
+
+        self.normalizeRateCheckbox = QCheckBox("Normalize to Real Tick Time")
+        self.normalizeRateCheckbox.setToolTip(
+            "Scale input by the time that actually passed since the last update, "
+            "so late updates under CPU load don't cause speed spikes."
+        )
+        self.normalizeRateCheckbox.setChecked(normalizeRate)
+        self.normalizeRateCheckbox.stateChanged.connect(self.toggleNormalizeRate)
+
+        inputLayout.addRow(self.rawInputCheckbox)
+        inputLayout.addRow(self.holdLThumbCheckbox)
+        self.eventDrivenCheckbox = QCheckBox("Process Input on Arrival")
+        self.eventDrivenCheckbox.setToolTip(
+            "Update the joystick as soon as raw mouse input arrives instead of waiting "
+            "for the next poll. Without input it still updates at the polling rate."
+        )
+        self.eventDrivenCheckbox.setChecked(eventDriven)
+        self.eventDrivenCheckbox.stateChanged.connect(self.toggleEventDriven)
+
+        inputLayout.addRow(self.normalizeRateCheckbox)
+        inputLayout.addRow(self.eventDrivenCheckbox)
+        inputLayout.addRow("Sensitivity:", self.senseLine)
+        inputLayout.addRow("Polling Rate (/sec):", self.pollRateLine)
+        inputLayout.addRow("Report Rate (/sec):", self.outputRateLine)
+
+        inputGroup.setLayout(inputLayout)
+
+        # Group: Input Cleanup
+        cleanupGroup = QGroupBox("Input Cleanup")
+        cleanupGroup.setToolTip("Remove tracking glitches from mouse input before it is smoothed.")
+        cleanupLayout = QFormLayout()
+        self.invalidOutlierParams = set()
+
+        self.hampelCheckbox = QCheckBox("Reject Outliers")
+        self.hampelCheckbox.setToolTip(
+            "Replace sudden spikes that are far from the recent median with the median."
+        )
+        self.hampelCheckbox.setChecked(outlierParams.hampel_enabled)
+        self.hampelCheckbox.stateChanged.connect(
+            lambda state: self.setOutlierParam("hampel_enabled", state == 2)
+        )
+
+        self.hampelWindowLine = QLineEdit(str(outlierParams.hampel_window))
+        self.hampelWindowLine.setToolTip("How many recent inputs the median is taken over (at least 3).")
+        self.hampelWindowLine.textChanged.connect(
+            lambda text: self.setOutlierParam("hampel_window", text)
+        )
+        self.hampelThresholdLine = QLineEdit(f"{outlierParams.hampel_threshold:g}")
+        self.hampelThresholdLine.setToolTip(
+            "How far from the median an input must be to count as a spike, in median absolute deviations."
+        )
+        self.hampelThresholdLine.textChanged.connect(
+            lambda text: self.setOutlierParam("hampel_threshold", text)
+        )
+
+        self.dropoutDropdown = QComboBox()
+        self.dropoutDropdown.addItems(DROPOUT_MODES)
+        self.dropoutDropdown.setCurrentText(outlierParams.dropout_mode)
+        self.dropoutDropdown.setToolTip(
+            "When the mouse briefly reports no movement while walking, keep the last speed (hold) "
+            "or continue its trend (extrapolate)."
+        )
+        self.dropoutDropdown.currentTextChanged.connect(
+            lambda text: self.setOutlierParam("dropout_mode", text)
+        )
+        self.dropoutMaxLine = QLineEdit(f"{outlierParams.dropout_max_ms:g}")
+        self.dropoutMaxLine.setToolTip(
+            "Longest gap in input that is bridged. Stopping is also detected this much later."
+        )
+        self.dropoutMaxLine.textChanged.connect(
+            lambda text: self.setOutlierParam("dropout_max_ms", text)
+        )
+
+        cleanupLayout.addRow(self.hampelCheckbox)
+        cleanupLayout.addRow("Outlier Window:", self.hampelWindowLine)
+        cleanupLayout.addRow("Outlier Threshold:", self.hampelThresholdLine)
+        cleanupLayout.addRow("Dropout Bridging:", self.dropoutDropdown)
+        cleanupLayout.addRow("Max Bridge (ms):", self.dropoutMaxLine)
+        cleanupGroup.setLayout(cleanupLayout)
+
+        # Group: Smoothing Options
+        smoothingGroup = QGroupBox("Smoothing Options")
+        smoothingGroup.setToolTip("Apply smoothing to reduce input jitter or noise using different techniques.")
+        smoothingMainLayout = QVBoxLayout()
+
+        # Top row: label + text input for smoothing window
+        smoothingWindowLayout = QHBoxLayout()
+        smoothingLabel = QLabel("Smoothing Window:")
+        smoothingLabel.setToolTip("Recent input samples, or milliseconds of input, used to compute smoothed output.")
+        self.avgLine = QLineEdit(str(averageCount))
+        self.avgLine.setToolTip("How many mouse input values, or milliseconds of input, to use to calculate joystick output.")
+        self.avgLine.textChanged.connect(self.setAverageCount)
+        self.windowUnitDropdown = QComboBox()
+        self.windowUnitDropdown.addItems(WINDOW_UNITS)
+        self.windowUnitDropdown.setCurrentText(smoothingWindowUnit)
+        self.windowUnitDropdown.setToolTip(
+            "Count the window in samples, or in milliseconds so it stays the same "
+            "length whatever the polling rate."
+        )
+        self.windowUnitDropdown.currentTextChanged.connect(self.setSmoothingWindowUnit)
+        smoothingWindowLayout.addWidget(smoothingLabel)
+        smoothingWindowLayout.addWidget(self.avgLine)
+        smoothingWindowLayout.addWidget(self.windowUnitDropdown)
+
+        # Bottom row: radio buttons side-by-side
+        smoothingLayout = QHBoxLayout()
+        self.meanRadio = QRadioButton("Mean")
+        self.meanRadio.setToolTip("Average the last N inputs (best for general smoothing).")
+        self.medianRadio = QRadioButton("Median")
+        self.medianRadio.setToolTip("Use the median of the last N inputs (more resistant to spikes).")
+        self.maxRadio = QRadioButton("Peak")
+        self.maxRadio.setToolTip(
+            "Use the peak (highest absolute value) from recent inputs "
+            "(more responsive when mice lose tracking at high speeds)."
+        )
+        self.meanRadio.setChecked(smoothingType == SMOOTHING_TYPE_MEAN)
+        self.medianRadio.setChecked(smoothingType == SMOOTHING_TYPE_MEDIAN)
+        self.maxRadio.setChecked(smoothingType == SMOOTHING_TYPE_MAX)
+        self.meanRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_MEAN))
+        self.medianRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_MEDIAN))
+        self.maxRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_MAX))
+
+        smoothingLayout.addWidget(self.meanRadio)
+        smoothingLayout.addWidget(self.medianRadio)
+        smoothingLayout.addWidget(self.maxRadio)
+
+        # Recursive filters: no window, tuned by the fields below
+        filterLayout = QHBoxLayout()
+        self.emaRadio = QRadioButton("EMA")
+        self.emaRadio.setToolTip("Exponential moving average (simple, low-cost smoothing with a time constant).")
+        self.oneEuroRadio = QRadioButton("One Euro")
+        self.oneEuroRadio.setToolTip(
+            "Smooths heavily at steady speeds and lets speed changes through quickly "
+            "(low lag when starting or stopping)."
+        )
+        self.kalmanRadio = QRadioButton("Kalman")
+        self.kalmanRadio.setToolTip("Tracks speed and acceleration, following ramps with little lag.")
+        self.emaRadio.setChecked(smoothingType == SMOOTHING_TYPE_EMA)
+        self.oneEuroRadio.setChecked(smoothingType == SMOOTHING_TYPE_ONE_EURO)
+        self.kalmanRadio.setChecked(smoothingType == SMOOTHING_TYPE_KALMAN)
+        self.emaRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_EMA))
+        self.oneEuroRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_ONE_EURO))
+        self.kalmanRadio.toggled.connect(lambda: self.setSmoothingType(SMOOTHING_TYPE_KALMAN))
+
+        filterLayout.addWidget(self.emaRadio)
+        filterLayout.addWidget(self.oneEuroRadio)
+        filterLayout.addWidget(self.kalmanRadio)
+
+        # (smoothing type, field, label, tooltip)
+        filterFields = [
+            (SMOOTHING_TYPE_EMA, "ema_time_constant_ms", "Time Constant (ms):",
+             "How long the filter takes to follow about 63% of a change."),
+            (SMOOTHING_TYPE_ONE_EURO, "one_euro_min_cutoff", "Min Cutoff (Hz):",
+             "Smoothing at steady speed. Lower values remove more jitter but add lag."),
+            (SMOOTHING_TYPE_ONE_EURO, "one_euro_beta", "Speed Coefficient:",
+             "How quickly smoothing is relaxed when speed changes. Higher values reduce lag."),
+            (SMOOTHING_TYPE_KALMAN, "kalman_process_noise", "Process Noise:",
+             "How quickly walking speed is expected to change. Higher values reduce lag."),
+            (SMOOTHING_TYPE_KALMAN, "kalman_measurement_noise", "Measurement Noise:",
+             "How noisy mouse input is expected to be. Higher values remove more jitter."),
+        ]
+        self.filterParamLayout = QFormLayout()
+        self.filterParamLines = {}
+        self.filterParamRows = []
+        self.invalidFilterParams = set()
+        self.invalidPredictionParams = set()
+        for type_id, name, label, tooltip in filterFields:
+            line = QLineEdit(f"{getattr(filterParams, name):g}")
+            line.setToolTip(tooltip)
+            line.textChanged.connect(lambda text, name=name: self.setFilterParam(name, text))
+            self.filterParamLayout.addRow(label, line)
+            self.filterParamLines[name] = line
+            self.filterParamRows.append((type_id, line))
+
+        smoothingMainLayout.addLayout(smoothingWindowLayout)
+        smoothingMainLayout.addLayout(smoothingLayout)
+        smoothingMainLayout.addLayout(filterLayout)
+        smoothingMainLayout.addLayout(self.filterParamLayout)
+
+        predictionLayout = QHBoxLayout()
+        self.predictionCheckbox = QCheckBox("Predict Ahead")
+        self.predictionCheckbox.setToolTip(
+            "Extrapolate along the recent change in speed to make up for smoothing lag. "
+            "Never overshoots a change of direction."
+        )
+        self.predictionCheckbox.setChecked(predictionParams.enabled)
+        self.predictionCheckbox.stateChanged.connect(
+            lambda state: self.setPredictionParam("enabled", state == 2)
+        )
+        predictionHorizonLabel = QLabel("Horizon (ms):")
+        self.predictionHorizonLine = QLineEdit(f"{predictionParams.horizon_ms:g}")
+        self.predictionHorizonLine.setToolTip("How far ahead to predict. Around the smoothing lag works best.")
+        self.predictionHorizonLine.textChanged.connect(
+            lambda text: self.setPredictionParam("horizon_ms", text)
+        )
+        predictionLayout.addWidget(self.predictionCheckbox)
+        predictionLayout.addWidget(predictionHorizonLabel)
+        predictionLayout.addWidget(self.predictionHorizonLine)
+        smoothingMainLayout.addLayout(predictionLayout)
+        self.updateSmoothingFields()
+        smoothingGroup.setLayout(smoothingMainLayout)
+
+        # Group: Key Binds
+        keybindGroup = QGroupBox("Key Binds")
+        keybindGroup.setToolTip(
+            "Set which keys control stopping the app, pressing A, toggling recenter, "
+            "or saving a flight recording."
+        )
+        keybindLayout = QVBoxLayout()
+        self.setKeyButton = QPushButton("Set Stop Key")
+        self.setKeyButton.setToolTip("Click to change the key used to stop tracking manually.")
+        self.setAKeyButton = QPushButton("Set A Button Key")
+        self.setAKeyButton.setToolTip("Click to assign a keyboard key to simulate pressing the A button.")
+        self.setRecenterKeyButton = QPushButton("Set Recenter Toggle Key")
+        self.setRecenterKeyButton.setToolTip("Click to set the key that toggles automatic mouse recentering (only in non-raw mode).")
+        self.setFlightRecorderKeyButton = QPushButton("Set Flight Recorder Key")
+        self.setFlightRecorderKeyButton.setToolTip(
+            "Click to set the key that saves the last few minutes of tracking data, "
+            "for investigating stutter."
+        )
+        self.setProfilerKeyButton = QPushButton("Set Profiler Key")
+        self.setProfilerKeyButton.setToolTip(
+            "Click to set the key that starts and stops the sampling profiler. "
+            "Profiles are saved to the profiles folder."
+        )
+
+        self.keyLabel = QLabel(f"Stop Key: {quitKey}")
+        self.keyLabel.setToolTip("Currently assigned Stop Key.")
+        self.aKeyLabel = QLabel(f"A Button Key: {aKey}")
+        self.aKeyLabel.setToolTip("Currently assigned A Button Key.")
+        self.recenterKeyLabel = QLabel("Recenter disabled (Raw Input ON)")
+        self.recenterKeyLabel.setToolTip("Shows the current state and key for mouse recentering.")
+        self.flightRecorderKeyLabel = QLabel(f"Flight Recorder Key: {flightRecorderKey}")
+        self.flightRecorderKeyLabel.setToolTip("Currently assigned key for saving a flight recording.")
+        self.profilerKeyLabel = QLabel(f"Profiler Key: {profilerKey}")
+        self.profilerKeyLabel.setToolTip("Currently assigned key for starting and stopping the profiler.")
+
+        self.setKeyButton.clicked.connect(self.setKey)
+        self.setAKeyButton.clicked.connect(self.setAKey)
+        self.setRecenterKeyButton.clicked.connect(self.setRecenterKey)
+        self.setFlightRecorderKeyButton.clicked.connect(self.setFlightRecorderKey)
+        self.setProfilerKeyButton.clicked.connect(self.setProfilerKey)
+
+        keybindLayout.addWidget(self.keyLabel)
+        keybindLayout.addWidget(self.setKeyButton)
+        keybindLayout.addWidget(self.aKeyLabel)
+        keybindLayout.addWidget(self.setAKeyButton)
+        keybindLayout.addWidget(self.recenterKeyLabel)
+        keybindLayout.addWidget(self.setRecenterKeyButton)
+        keybindLayout.addWidget(self.flightRecorderKeyLabel)
+        keybindLayout.addWidget(self.setFlightRecorderKeyButton)
+        keybindLayout.addWidget(self.profilerKeyLabel)
+        keybindLayout.addWidget(self.setProfilerKeyButton)
+        keybindGroup.setLayout(keybindLayout)
+
+        # Group: Curve Editor
+        curveGroup = QGroupBox("Curve Editor")
+        curveGroup.setToolTip("Fine-tune how sensitivity scales with movement using a custom curve.")
+        curveLayout = QVBoxLayout()
+        self.openCurveEditorButton = QPushButton("Edit Sensitivity Curve")
+        self.openCurveEditorButton.setToolTip("Open the sensitivity curve editor window to customize response curve.")
+        self.showDotCheckbox = QCheckBox("Show Input on Curve")
+        self.showDotCheckbox.setToolTip("Visually display input and output on the sensitivity curve graph in real-time.")
+        self.showDotCheckbox.stateChanged.connect(self.toggleShowInputOnCurve)
+
+        curveLayout.addWidget(self.openCurveEditorButton)
+        curveLayout.addWidget(self.showDotCheckbox)
+        self.openCurveEditorButton.clicked.connect(self.openCurveEditor)
+        curveGroup.setLayout(curveLayout)
+
+        # Group: Performance
+        performanceGroup = QGroupBox("Performance")
+        performanceGroup.setToolTip(
+            "How long each step of the pipeline takes, to find where lag or stutter comes from."
+        )
+        performanceLayout = QVBoxLayout()
+        stageGrid = QGridLayout()
+        stageTooltips = {
+            "input_age": "Time from a raw mouse event arriving to it being processed.",
+            "accumulate": "Time to collect the input since the last update.",
+            "smoothing": "Time spent on input cleanup, smoothing and prediction.",
+            "curve": "Time spent applying sensitivity and the curve.",
+            "output": "Time the virtual gamepad driver takes to accept an update.",
+            "tick": "Time for a whole update.",
+            "lateness": "How late each update started compared to its schedule.",
+        }
+        for column, heading in enumerate(("Stage (us)", "p50", "p99", "Max")):
+            stageGrid.addWidget(QLabel(heading), 0, column)
+        self.stageLabels = {}
+        for row, stage in enumerate(STAGES, start=1):
+            nameLabel = QLabel(stage.replace("_", " ").capitalize())
+            nameLabel.setToolTip(stageTooltips[stage])
+            stageGrid.addWidget(nameLabel, row, 0)
+            labels = [QLabel("-") for _ in range(3)]
+            for column, label in enumerate(labels, start=1):
+                stageGrid.addWidget(label, row, column)
+            self.stageLabels[stage] = labels
+        self.tickStatsLabel = QLabel("Not running")
+        self.tickStatsLabel.setToolTip("Tick jitter and ticks missed because an update ran too late.")
+
+        performanceButtons = QHBoxLayout()
+        self.exportPerformanceButton = QPushButton("Export JSON")
+        self.exportPerformanceButton.setToolTip("Save the full histograms to the performance folder.")
+        self.exportPerformanceButton.clicked.connect(self.exportPerformance)
+        self.resetPerformanceButton = QPushButton("Reset")
+        self.resetPerformanceButton.setToolTip("Clear the collected timings.")
+        self.resetPerformanceButton.clicked.connect(self.resetPerformance)
+        performanceButtons.addWidget(self.exportPerformanceButton)
+        performanceButtons.addWidget(self.resetPerformanceButton)
+
+        performanceLayout.addLayout(stageGrid)
+        performanceLayout.addWidget(self.tickStatsLabel)
+        performanceLayout.addLayout(performanceButtons)
+        performanceGroup.setLayout(performanceLayout)
+
+        # Text is refreshed a couple of times a second, not at display rate
+        self.performanceTimer = QtCore.QTimer(self)
+        self.performanceTimer.timeout.connect(self.refresh_performance)
+        self.performanceTimer.start(500)
+
+        # Group: Config Management
+        configGroup = QGroupBox("Configuration")
+        configGroup.setToolTip("Save and load user configurations for reuse.")
+        configLayout = QVBoxLayout()
+        self.configDropdown = QComboBox()
+        self.configDropdown.setToolTip("Select from saved configurations.")
+        self.loadConfigButton = QPushButton("Load Config")
+        self.loadConfigButton.setToolTip("Load the selected configuration.")
+        self.saveConfigButton = QPushButton("Save Config")
+        self.saveConfigButton.setToolTip("Save the current settings under a custom name.")
+
+        self.loadConfigButton.clicked.connect(self.load_config)
+        self.saveConfigButton.clicked.connect(lambda: self.save_config())
+
+        configLayout.addWidget(self.configDropdown)
+        configLayout.addWidget(self.loadConfigButton)
+        configLayout.addWidget(self.saveConfigButton)
+        configGroup.setLayout(configLayout)
+
+        self.update_config_dropdown()
+
+        # Main Layout
+        mainLayout = QVBoxLayout()
+        mainLayout.addWidget(trackingGroup)
+        mainLayout.addWidget(inputGroup)
+        mainLayout.addWidget(cleanupGroup)
+        mainLayout.addWidget(smoothingGroup)
+        mainLayout.addWidget(keybindGroup)
+        mainLayout.addWidget(curveGroup)
+        mainLayout.addWidget(performanceGroup)
+        mainLayout.addWidget(configGroup)
+
+        self.setLayout(mainLayout)
+
+        self.setStyleSheet(get_common_stylesheet())
+
+        # Sample the worker's telemetry at display rate instead of per tick
+        self.displayTimer = QtCore.QTimer(self)
+        self.displayTimer.timeout.connect(self.refresh_live_displays)
+        self.setDisplayRate(displayRate)
+
+        self.show()
+
+        self.validSensitivity = True
+        self.validPollRate = True
+        self.validOutputRate = True
+        self.validAverageCount = True
+
+        latest_config_path = startup_config or config_path(LAST_RUN_CONFIG_NAME)
+        if os.path.exists(latest_config_path):
+            try:
+                with open(latest_config_path, "r") as f:
+                    config = json.load(f)
+                    self.apply_config(config)
+                    print(f"Loaded '{latest_config_path}' on startup.")
+            except Exception as e:
+                print(f"Failed to load startup config: {e}")
+        elif startup_config:
+            print(f"Config file not found: {startup_config}")
+
+    def toggleRawInput(self, state):
+        global useRawInput, recenterEnabled
+        useRawInput = state == 2
+
+        # Disable recentering when raw input is on
+        if useRawInput:
+            recenterEnabled = False
+            self.recenterKeyLabel.setText("Recenter disabled (Raw Input ON)")
+            self.setRecenterKeyButton.setEnabled(False)
+            print("Raw Input ON. Mouse recentering OFF.")
+        else:
+            self.setRecenterKeyButton.setEnabled(True)
+            self.recenterKeyLabel.setText(f"Recenter Toggle Key: {recenterToggleKey}")
+            print("Raw Input OFF.")
+            recenterEnabled = not recenterEnabled
+            print(f"Mouse recentering {'enabled' if recenterEnabled else 'disabled'}")
+
+        settingsChannel.update(use_raw_input=useRawInput, recenter_enabled=recenterEnabled)
+
+    def setDisplayRate(self, rate):
+        global displayRate
+        try:
+            val = int(rate)
+            if val <= 0:
+                raise ValueError
+            displayRate = val
+            self.displayTimer.start(max(1, round(1000 / val)))
+        except ValueError:
+            print(f"Invalid display rate: {rate}")
+
+    def setSchedulerBackend(self, backend):
+        global schedulerBackend
+        schedulerBackend = backend
+        settingsChannel.update(scheduler_backend=backend)
+
+    def refresh_live_displays(self):
+        """Redraw the joystick bar and curve dot if the worker's output changed."""
+        telemetry = self.worker.telemetry.read()
+        if telemetry == self.lastTelemetry:
+            return
+        output, curve_input = telemetry
+        last_output, last_curve_input = self.lastTelemetry
+        self.lastTelemetry = telemetry
+
+        if output != last_output:
+            self.update_joystick_bar(output)
+        if curve_input != last_curve_input:
+            if curve_input is None:
+                if hasattr(self, "curveWindow"):
+                    self.curveWindow.clear_current_input()
+            else:
+                self.update_curve_input(curve_input)
+
+    def refresh_performance(self):
+        for stage, histogram in engine.timings.histograms.items():
+            if histogram.count == 0:
+                continue
+            values = (histogram.percentile(50), histogram.percentile(99), histogram.max)
+            for label, value in zip(self.stageLabels[stage], values):
+                label.setText(f"{value / 1000:.1f}")
+
+        scheduler = engine.scheduler
+        if scheduler is not None:
+            stats = scheduler.stats
+            self.tickStatsLabel.setText(
+                f"Jitter sd {stats.jitter_stddev * 1e6:.0f} us, max {stats.jitter_max * 1e6:.0f} us, "
+                f"{stats.missed_ticks} missed ticks"
+            )
+
+    def exportPerformance(self):
+        try:
+            print(f"Performance histograms saved to {engine.export_performance()}")
+        except OSError as e:
+            print(f"Failed to export performance histograms: {e}")
+
+    def resetPerformance(self):
+        engine.timings.reset()
+        for labels in self.stageLabels.values():
+            for label in labels:
+                label.setText("-")
+
+    def update_curve_input(self, input_value: int):
+        if (
+            hasattr(self, "curveWindow")
+            and self.curveWindow.isVisible()
+            and self.showDotCheckbox.isChecked()
+        ):
+            self.curveWindow.set_current_input(input_value)
+
+    def update_joystick_bar(self, input_value: int):
+        self.joystickBar.set_value(input_value)
+
+    def updateStartButton(self):
+        self.startStopButton.setEnabled(
+            self.validSensitivity
+            and self.validPollRate
+            and self.validOutputRate
+            and self.validAverageCount
+            and not self.invalidFilterParams
+            and not self.invalidOutlierParams
+            and not self.invalidPredictionParams
+        )
+
+    def toggleHoldThumbstick(self, state):
+        global holdLeftThumbstick
+        holdLeftThumbstick = state == 2
+        settingsChannel.update(hold_left_thumbstick=holdLeftThumbstick)
+        print(f"Hold Left Thumbstick: {'enabled' if holdLeftThumbstick else 'disabled'}")
+
+    def toggleNormalizeRate(self, state):
+        global normalizeRate
+        normalizeRate = state == 2
+        settingsChannel.update(normalize_rate=normalizeRate)
+        print(f"Normalize to real tick time: {'enabled' if normalizeRate else 'disabled'}")
+
+    def toggleEventDriven(self, state):
+        global eventDriven
+        eventDriven = state == 2
+        settingsChannel.update(event_driven=eventDriven)
+        print(f"Process input on arrival: {'enabled' if eventDriven else 'disabled'}")
+
+    def toggleShowInputOnCurve(self, state):
+        settingsChannel.update(show_input_on_curve=state == 2)
+        if state != 2 and hasattr(self, "curveWindow"):
+            self.curveWindow.clear_current_input()
+
+    def setPollingRate(self, value):
+        global pollRate
+        try:
+            val = int(value)
+            if val <= 0:
+                raise ValueError
+            pollRate = val
+            settingsChannel.update(poll_rate=val)
+            self.validPollRate = True
+            print("Poll rate:", val)
+        except ValueError:
+            self.validPollRate = False
+            print("Invalid polling rate")
+        self.updateStartButton()
+
+    def setOutputRate(self, value):
+        global outputRate
+        try:
+            val = int(value)
+            if val < 0:
+                raise ValueError
+            outputRate = val
+            settingsChannel.update(output_rate=val)
+            self.validOutputRate = True
+            print("Report rate:", val if val else "every poll")
+        except ValueError:
+            self.validOutputRate = False
+            print("Invalid report rate")
+        self.updateStartButton()
+
+    def setSensitivity(self, value):
+        global sensitivity
+        try:
+            val = float(value)
+            if val <= 0:
+                raise ValueError
+            sensitivity = val
+            settingsChannel.update(sensitivity=val)
+            self.validSensitivity = True
+            print("Sensitivity:", val)
+        except ValueError:
+            self.validSensitivity = False
+            print("Invalid sensitivity")
+        self.updateStartButton()
+
+    def setAverageCount(self, value):
+        global averageCount
+        try:
+            val = int(value)
+            if val <= 0:
+                raise ValueError
+            averageCount = val
+            settingsChannel.update(average_count=val)
+            self.validAverageCount = True
+            print("Averaging count:", val)
+        except ValueError:
+            self.validAverageCount = False
+            print("Invalid averaging count (must be a positive integer)")
+        self.updateStartButton()
+
+    def setSmoothingWindowUnit(self, unit):
+        global smoothingWindowUnit
+        smoothingWindowUnit = unit
+        settingsChannel.update(smoothing_window_unit=unit)
+        print("Smoothing window unit:", unit)
+
+    def setSmoothingType(self, type_id):
+        """Sets the global smoothing type based on the radio button selection."""
+        global smoothingType
+        if type_id == SMOOTHING_TYPE_MEAN and self.meanRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_MEAN
+            print("Smoothing type set to: Mean")
+        elif type_id == SMOOTHING_TYPE_MEDIAN and self.medianRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_MEDIAN
+            print("Smoothing type set to: Median")
+        elif type_id == SMOOTHING_TYPE_MAX and self.maxRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_MAX
+            print("Smoothing type set to: Peak")
+        elif type_id == SMOOTHING_TYPE_EMA and self.emaRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_EMA
+            print("Smoothing type set to: EMA")
+        elif type_id == SMOOTHING_TYPE_ONE_EURO and self.oneEuroRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_ONE_EURO
+            print("Smoothing type set to: One Euro")
+        elif type_id == SMOOTHING_TYPE_KALMAN and self.kalmanRadio.isChecked():
+            smoothingType = SMOOTHING_TYPE_KALMAN
+            print("Smoothing type set to: Kalman")
+        settingsChannel.update(smoothing_type=smoothingType)
+        self.updateSmoothingFields()
+
+    def updateSmoothingFields(self):
+        """Show only the active filter's parameters; the window only applies to windowed types."""
+        for type_id, line in self.filterParamRows:
+            self.filterParamLayout.setRowVisible(line, type_id == smoothingType)
+        windowed = smoothingType in (SMOOTHING_TYPE_MEAN, SMOOTHING_TYPE_MEDIAN, SMOOTHING_TYPE_MAX)
+        self.avgLine.setEnabled(windowed)
+        self.windowUnitDropdown.setEnabled(windowed)
+
+    def setOutlierParam(self, name, value):
+        global outlierParams
+        try:
+            params = outlier_params_from_config({name: value}, outlierParams)
+        except ValueError:
+            self.invalidOutlierParams.add(name)
+            print(f"Invalid value for {name}: {value}")
+        else:
+            self.invalidOutlierParams.discard(name)
+            outlierParams = params
+            settingsChannel.update(outlier_params=params)
+        self.updateStartButton()
+
+    def setPredictionParam(self, name, value):
+        global predictionParams
+        try:
+            params = prediction_params_from_config({name: value}, predictionParams)
+        except ValueError:
+            self.invalidPredictionParams.add(name)
+            print(f"Invalid value for prediction {name}: {value}")
+        else:
+            self.invalidPredictionParams.discard(name)
+            predictionParams = params
+            settingsChannel.update(prediction_params=params)
+        self.updateStartButton()
+
+    def setFilterParam(self, name, value):
+        global filterParams
+        try:
+            params = filter_params_from_config({name: value}, filterParams)
+        except ValueError:
+            self.invalidFilterParams.add(name)
+            print(f"Invalid value for {name}: {value}")
+        else:
+            self.invalidFilterParams.discard(name)
+            filterParams = params
+            settingsChannel.update(filter_params=params)
+        self.updateStartButton()
+
+    def setAKey(self):
+        global aKey
+        global aKeyToggle
+        if not aKeyToggle:
+            start_keyboard_listener()
+            self.aKeyLabel.setText("PRESS ANY KEY")
+            self.setAKeyButton.setText("Confirm?")
+            print("Listening for A key bind...")
+            aKeyToggle = True
+        else:
+            if aKey:
+                self.aKeyLabel.setText("A Button Key: " + str(aKey))
+            else:
+                self.aKeyLabel.setText("A Button Key: Not set")
+            self.setAKeyButton.setText("Set A Key")
+            print("A Key binding confirmed.")
+            aKeyToggle = False
+
+    def setKey(self):
+        global quitKey
+        global keyToggle
+        if not keyToggle:
+            start_keyboard_listener()
+            self.keyLabel.setText("PRESS ANY KEY")
+            self.setKeyButton.setText("Confirm?")
+            print("Listening...")
+            keyToggle = True
+        else:
+            self.keyLabel.setText("Stop Key: " + str(quitKey))
+            self.setKeyButton.setText("Set Stop Key")
+            print("Confirmed")
+            keyToggle = False
+
+    def updateStartStopButtonText(self):
+        """Updates the text of the Start/Stop button based on the global 'enabled' state."""
+        self.startStopButton.setText("Stop" if enabled else "Start")
+
+    def toggleTracking(self):
+        """Handles starting and stopping the tracking when the button is pressed."""
+        global enabled, keyToggle, useRawInput
+
+        if enabled:
+            enabled = False
+            self.worker.stop_loop()
+
+            if hasattr(window, "curveWindow") and window.curveWindow.isVisible():
+                window.curveWindow.clear_current_input()
+
+            self.update_joystick_bar(0)
+
+            engine.release_output()
+
+            print("Tracking stopped via GUI button.")
+        else:
+            if not self.createDevices():
+                return
+            enabled = True
+            if useRawInput and not self.raw_listener.isRunning():
+                self.raw_listener.start()
+
+            if not self.worker.isRunning():
+                self.save_config(name=LAST_RUN_CONFIG_NAME)
+                self.worker.start_loop()
+                print("Tracking started.")
+            else:
+                print("Worker is already running or being started.")
+
+        self.updateStartStopButtonText()
+
+    def createDevices(self):
+        """Create the output, keyboard hook and raw listener the first time they're needed."""
+        first_start = engine.output is None
+        if engine.output is None:
+            with phase("Create output"):
+                try:
+                    min_interval, max_staleness = self.reportLimits()
+                    engine.output = DedupOutput(
+                        make_output(outputBackend, outputPath), min_interval, max_staleness
+                    )
+                except (ImportError, OSError, ValueError) as e:
+                    print(f"Failed to create '{outputBackend}' output: {e}")
+                    return False
+        with phase("Start keyboard listener"):
+            start_keyboard_listener()
+        if useRawInput and self.raw_listener is None:
+            with phase("Create raw mouse listener"):
+                # Deltas go straight to the worker, never through the GUI thread
+                if inputTrace is None:
+                    self.raw_listener = make_raw_listener(engine.accumulator.add)
+                else:
+                    self.raw_listener = make_raw_listener(
+                        inputTrace.capture(engine.accumulator.add), on_button=inputTrace.button
+                    )
+
+        if first_start and startup_profile.active_profile is not None:
+            startup_profile.active_profile.mark("First tracking start")
+            startup_profile.active_profile.report()
+            # Nothing left to profile; stop timing imports made while tracking
+            startup_profile.active_profile.remove_import_hook()
+        return True
+
+    def reportLimits(self):
+        return report_limits_from_config(
+            {
+                "report_min_interval_ms": reportMinIntervalMs,
+                "report_max_staleness_ms": reportMaxStalenessMs,
+            }
+        )
+
+    def setReportLimits(self, min_interval_ms, max_staleness_ms):
+        global reportMinIntervalMs, reportMaxStalenessMs
+        reportMinIntervalMs = min_interval_ms
+        reportMaxStalenessMs = max_staleness_ms
+        try:
+            min_interval, max_staleness = self.reportLimits()
+        except (TypeError, ValueError) as e:
+            print(f"Invalid report limits: {e}")
+            return
+        if engine.output is not None:
+            engine.output.min_interval = min_interval
+            engine.output.max_staleness = max_staleness
+
+    def openCurveEditor(self):
+        self.curveWindow = CurveEditorWindow()
+        self.curveWindow.visibility_changed.connect(self.updateCurveSettings)
+        self.curveWindow.show()
+
+    def updateCurveSettings(self):
+        """Publish the curve table while the editor is open, or no curve when closed."""
+        curve_open = hasattr(self, "curveWindow") and self.curveWindow.isVisible()
+        settingsChannel.update(
+            curve_table=self.curveWindow.curve_table if curve_open else None
+        )
+
+    def interpolate_curve(self, input_value, curve):
+        """Linearly interpolate output from the curve based on input."""
+        return interpolate_curve(input_value, curve)
+
+    def setRecenterKey(self):
+        global recenterToggleKey, recenterKeyToggle
+        if not recenterKeyToggle:
+            start_keyboard_listener()
+            self.recenterKeyLabel.setText("PRESS ANY KEY")
+            self.setRecenterKeyButton.setText("Confirm?")
+            print("Listening for recenter toggle key...")
+            recenterKeyToggle = True
+        else:
+            self.recenterKeyLabel.setText(f"Recenter Toggle Key: {recenterToggleKey}")
+            self.setRecenterKeyButton.setText("Set Recenter Toggle Key")
+            print("Recenter toggle key confirmed.")
+            recenterKeyToggle = False
+
+    def setFlightRecorderKey(self):
+        global flightRecorderKeyToggle
+        if not flightRecorderKeyToggle:
+            start_keyboard_listener()
+            self.flightRecorderKeyLabel.setText("PRESS ANY KEY")
+            self.setFlightRecorderKeyButton.setText("Confirm?")
+            print("Listening for flight recorder key...")
+            flightRecorderKeyToggle = True
+        else:
+            self.flightRecorderKeyLabel.setText(f"Flight Recorder Key: {flightRecorderKey}")
+            self.setFlightRecorderKeyButton.setText("Set Flight Recorder Key")
+            print("Flight recorder key confirmed.")
+            flightRecorderKeyToggle = False
+
+    def setProfilerKey(self):
+        global profilerKeyToggle
+        if not profilerKeyToggle:
+            start_keyboard_listener()
+            self.profilerKeyLabel.setText("PRESS ANY KEY")
+            self.setProfilerKeyButton.setText("Confirm?")
+            print("Listening for profiler key...")
+            profilerKeyToggle = True
+        else:
+            self.profilerKeyLabel.setText(f"Profiler Key: {profilerKey}")
+            self.setProfilerKeyButton.setText("Set Profiler Key")
+            print("Profiler key confirmed.")
+            profilerKeyToggle = False
+
+    def get_current_config(self):
+        return {
+            "sensitivity": self.senseLine.text(),
+            "poll_rate": self.pollRateLine.text(),
+            "output_rate": self.outputRateLine.text(),
+            "average_count": self.avgLine.text(),
+            "smoothing_window_unit": smoothingWindowUnit,
+            "smoothing_type": smoothingType,
+            "filter_params": asdict(filterParams),
+            "outlier_params": asdict(outlierParams),
+            "prediction_params": asdict(predictionParams),
+            "raw_input": useRawInput,
+            "hold_left_thumbstick": self.holdLThumbCheckbox.isChecked(),
+            "normalize_rate": normalizeRate,
+            "event_driven": eventDriven,
+            "stop_key": str(quitKey),
+            "a_key": str(aKey),
+            "recenter_key": str(recenterToggleKey),
+            "flight_recorder_key": flightRecorderKey,
+            "profiler_key": profilerKey,
+            "recenter_enabled": recenterEnabled,
+            "curve_editor_open": hasattr(self, "curveWindow")
+            and self.curveWindow.isVisible(),
+            "show_input_on_curve": self.showDotCheckbox.isChecked(),
+            "display_rate": displayRate,
+            "scheduler": schedulerBackend,
+            "report_min_interval_ms": reportMinIntervalMs,
+            "report_max_staleness_ms": reportMaxStalenessMs,
+            "curve_points": self.curveWindow.serialize_points()
+            if hasattr(self, "curveWindow")
+            else None,
+        }
+
+    def apply_config(self, config):
+        global quitKey, aKey, recenterToggleKey, recenterEnabled, flightRecorderKey, profilerKey
+
+        self.senseLine.setText(str(config.get("sensitivity", "100")))
+        self.pollRateLine.setText(str(config.get("poll_rate", "60")))
+        self.outputRateLine.setText(str(config.get("output_rate", "0")))
+        self.avgLine.setText(str(config.get("average_count", "5")))
+        self.windowUnitDropdown.setCurrentText(
+            config.get("smoothing_window_unit", WINDOW_UNIT_SAMPLES)
+        )
+
+        smoothing = config.get("smoothing_type", SMOOTHING_TYPE_MEAN)
+        if smoothing == SMOOTHING_TYPE_MEAN:
+            self.meanRadio.setChecked(True)
+        elif smoothing == SMOOTHING_TYPE_MEDIAN:
+            self.medianRadio.setChecked(True)
+        elif smoothing == SMOOTHING_TYPE_MAX:
+            self.maxRadio.setChecked(True)
+        elif smoothing == SMOOTHING_TYPE_EMA:
+            self.emaRadio.setChecked(True)
+        elif smoothing == SMOOTHING_TYPE_ONE_EURO:
+            self.oneEuroRadio.setChecked(True)
+        elif smoothing == SMOOTHING_TYPE_KALMAN:
+            self.kalmanRadio.setChecked(True)
+
+        self.apply_filter_config(config)
+
+        self.rawInputCheckbox.setChecked(config.get("raw_input", True))
+
+        self.holdLThumbCheckbox.setChecked(config.get("hold_left_thumbstick", False))
+        self.normalizeRateCheckbox.setChecked(config.get("normalize_rate", True))
+        self.eventDrivenCheckbox.setChecked(config.get("event_driven", False))
+
+        # Restore key binds
+        quitKey = config.get("stop_key", "Key.ctrl_r")
+        aKey = config.get("a_key", "Key.alt_gr")
+        recenterToggleKey = config.get("recenter_key", "Key.f9")
+        flightRecorderKey = config.get("flight_recorder_key", "Key.f10")
+        profilerKey = config.get("profiler_key", "Key.f11")
+        recenterEnabled = config.get("recenter_enabled", False)
+        settingsChannel.update(recenter_enabled=recenterEnabled)
+
+        self.keyLabel.setText(f"Stop Key: {quitKey}")
+        self.aKeyLabel.setText(f"A Button Key: {aKey}")
+        self.flightRecorderKeyLabel.setText(f"Flight Recorder Key: {flightRecorderKey}")
+        self.profilerKeyLabel.setText(f"Profiler Key: {profilerKey}")
+        if not useRawInput:
+            self.recenterKeyLabel.setText(f"Recenter Toggle Key: {recenterToggleKey}")
+
+        if config.get("curve_editor_open", False):
+            self.openCurveEditor()
+
+            points_data = config.get("curve_points")
+            if points_data and hasattr(self, "curveWindow"):
+                self.curveWindow.deserialize_points(points_data)
+
+        self.showDotCheckbox.setChecked(config.get("show_input_on_curve", False))
+        self.setDisplayRate(config.get("display_rate", 60))
+        self.setSchedulerBackend(config.get("scheduler", SCHEDULER_AUTO))
+        self.setReportLimits(
+            config.get("report_min_interval_ms", 0),
+            config.get("report_max_staleness_ms", DEFAULT_REPORT_MAX_STALENESS_MS),
+        )
+
+    def apply_filter_config(self, config):
+        """Restore the input cleanup, recursive filter and prediction parameters."""
+        global outlierParams, filterParams, predictionParams
+        try:
+            outlierParams = outlier_params_from_config(config.get("outlier_params", {}))
+            filterParams = filter_params_from_config(config.get("filter_params", {}))
+            predictionParams = prediction_params_from_config(config.get("prediction_params", {}))
+        except (TypeError, ValueError) as e:
+            print(f"Invalid filter settings in config: {e}")
+            return
+        settingsChannel.update(
+            outlier_params=outlierParams,
+            filter_params=filterParams,
+            prediction_params=predictionParams,
+        )
+
+        self.hampelCheckbox.setChecked(outlierParams.hampel_enabled)
+        self.hampelWindowLine.setText(str(outlierParams.hampel_window))
+        self.hampelThresholdLine.setText(f"{outlierParams.hampel_threshold:g}")
+        self.dropoutDropdown.setCurrentText(outlierParams.dropout_mode)
+        self.dropoutMaxLine.setText(f"{outlierParams.dropout_max_ms:g}")
+        for name, line in self.filterParamLines.items():
+            line.setText(f"{getattr(filterParams, name):g}")
+        self.predictionCheckbox.setChecked(predictionParams.enabled)
+        self.predictionHorizonLine.setText(f"{predictionParams.horizon_ms:g}")
+
+    def save_config(self, name=None):
+        if name is None:
+            text, ok = QInputDialog.getText(self, "Save Config", "Enter config name:")
+            if not ok or not text.strip():
+                print("Save cancelled or name was empty.")
+                return
+            name = text.strip()
+
+        config = self.get_current_config()
+        path = config_path(name)
+        try:
+            os.makedirs(CONFIG_DIR, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(config, f, indent=4)
+            print(f"Config '{name}' saved.")
+            self.update_config_dropdown()
+        except Exception as e:
+            print(f"Failed to save config: {e}")
+
+    def load_config(self):
+        name = self.configDropdown.currentText()
+        if not name:
+            return
+        path = config_path(name)
+        try:
+            with open(path, "r") as f:
+                config = json.load(f)
+                self.apply_config(config)
+                print(f"Config '{name}' loaded.")
+        except Exception as e:
+            print(f"Failed to load config '{name}': {e}")
+
+    def update_config_dropdown(self):
+        self.configDropdown.clear()
+        if not os.path.isdir(CONFIG_DIR):
+            return
+        configs = [f[:-5] for f in os.listdir(CONFIG_DIR) if f.endswith(".json")]
+        self.configDropdown.addItems(sorted(configs))
+
+
+def onPress(key):
+    global \
+        enabled, \
+        keyToggle, \
+        quitKey, \
+        aKeyToggle, \
+        aKey, \
+        recenterToggleKey, \
+        recenterEnabled, \
+        useRawInput, \
+        flightRecorderKey, \
+        profilerKey
+
+    key = str(key)
+    if inputTrace is not None:
+        inputTrace.key(key, True)
+
+    if keyToggle:
+        print("Stop key will be", key)
+        quitKey = key
+    elif aKeyToggle:
+        print("A key will be", key)
+        aKey = key
+    elif flightRecorderKeyToggle:
+        print("Flight recorder key will be", key)
+        flightRecorderKey = key
+    elif profilerKeyToggle:
+        print("Profiler key will be", key)
+        profilerKey = key
+    elif key == flightRecorderKey:
+        # Works whether or not tracking is running
+        try:
+            print(f"Flight recording saved to {engine.flight_recorder.dump()}")
+        except OSError as e:
+            print(f"Failed to save flight recording: {e}")
+    elif key == profilerKey:
+        toggle_profiler(profiler)
+    elif enabled:
+        if key == quitKey:
+            enabled = False
+            window.worker.stop_loop()
+
+            # The worker clears its telemetry on exit; the GUI timer redraws
+            window.worker.telemetry.clear()
+
+            engine.release_output()
+
+            window.updateStartStopButtonText()
+
+            print("Stopped with", quitKey)
+        elif key == aKey:
+            print("A key held:", key)
+            engine.output.set_a_button(True)
+        elif recenterKeyToggle:
+            print("Recenter toggle key will be", key)
+            recenterToggleKey = key
+        # Only allow recenter toggle if raw input is NOT enabled
+        elif key == recenterToggleKey and not useRawInput:
+            recenterEnabled = not recenterEnabled
+            settingsChannel.update(recenter_enabled=recenterEnabled)
+            print(f"Mouse recentering {'enabled' if recenterEnabled else 'disabled'}")
+
+
+def onRelease(key):
+    global enabled
+    global aKey
+
+    key = str(key)
+    if inputTrace is not None:
+        inputTrace.key(key, False)
+
+    if enabled and key == aKey:
+        print("A key released:", key)
+        engine.output.set_a_button(False)
+
+
+def cleanup():
+    global window, listener
+    print("Cleaning up...")
+
+    if hasattr(window, "worker") and window.worker.isRunning():
+        window.worker.stop_loop()
+        window.worker.wait()
+
+    raw_listener = getattr(window, "raw_listener", None)
+    if raw_listener is not None and raw_listener.isRunning():
+        raw_listener.stop()
+        raw_listener.wait()
+
+    if listener is not None and listener.running:
+        listener.stop()
+
+    if engine.output is not None:
+        engine.release_output()
+        engine.output.close()
+
+    if metricsServer is not None:
+        metricsServer.stop()
+
+    if profiler.running:
+        toggle_profiler(profiler)
+
+    if inputTrace is not None:
+        inputTrace.close()
+        print(f"Input trace saved to {inputTrace.path} ({inputTrace.count} records)")
+
+    try:
+        path = engine.flight_recorder.dump_last_run()
+        if path is not None:
+            print(f"Flight recording saved to {path}")
+    except OSError as e:
+        print(f"Failed to save flight recording: {e}")
+
+    if hasattr(window, "curveWindow") and window.curveWindow.isVisible():
+        window.curveWindow.clear_current_input()
+
+    print("Exited cleanly.")
+    app.quit()
+    sys.exit(0)
+
+
+def report_startup_profile():
+    profile = startup_profile.active_profile
+    profile.mark("Window visible")
+    profile.report()
+
+
+def main(
+    startup_config=None,
+    output_backend=OUTPUT_AUTO,
+    output_path=None,
+    metrics_address=None,
+    profile=False,
+    trace_path=None,
+):
+    global app, window, outputBackend, outputPath, metricsServer, inputTrace
+
+    outputBackend = output_backend
+    outputPath = output_path
+
+    if metrics_address is not None:
+        from vr_treadmill.metrics_server import start_metrics_server
+
+        metricsServer = start_metrics_server(engine, metrics_address)
+
+    if profile:
+        toggle_profiler(profiler)
+
+    if trace_path:
+        try:
+            inputTrace = TraceWriter(trace_path)
+            engine.trace = inputTrace
+        except OSError as e:
+            print(f"Failed to create input trace '{trace_path}': {e}")
+
+    # handle CTRL+C
+    signal.signal(signal.SIGINT, lambda sig, frame: cleanup())
+
+    try:
+        with phase("Create QApplication"):
+            app = QApplication([])
+        with phase("Build main window"):
+            window = MainWindow(startup_config=startup_config)
+            window.show()
+        if startup_profile.active_profile is not None:
+            # Runs once the event loop has processed the first show/paint
+            QtCore.QTimer.singleShot(0, report_startup_profile)
+        # The flight recorder and profiler keys work before tracking starts,
+        # so the hook starts right after the window is up rather than at
+        # first tracking start
+        QtCore.QTimer.singleShot(0, start_keyboard_listener)
+        timer = QtCore.QTimer()
+        timer.timeout.connect(lambda: None)
+        timer.start(100)
+
+        app.exec()
+    except KeyboardInterrupt:
+        cleanup()
+    return 0
+
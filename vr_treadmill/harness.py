@@ -0,0 +1,242 @@
+import contextlib
+import io
+import time
+from dataclasses import dataclass
+
+from vr_treadmill.clock import VirtualClock
+from vr_treadmill.engine import InputAccumulator, TreadmillEngine
+from vr_treadmill.outputs import OutputBackend
+from vr_treadmill.settings import Settings, SettingsChannel
+
+
+class VirtualOutput(OutputBackend):
+    """Keeps every report with the virtual time it was sent at."""
+
+    name = "virtual"
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.reports = []  # (time, y)
+
+    def send(self, y, left_thumb=None, now=None):
+        self.reports.append((self.clock.now() if now is None else now, y))
+
+
+class InputFeed:
+    """
+    Delivers (time, dy) events to an accumulator at their virtual time.
+
+    Only the next event is scheduled on the clock at any one time, so a long
+    trace streams through without being loaded. Events due during a stall are
+    delivered together when it ends, stamped with their own time, as a real
+    input thread would have queued them.
+    """
+
+    def __init__(self, clock, accumulator, events):
+        self.clock = clock
+        self.accumulator = accumulator
+        self.events = iter(events)
+        self.next = next(self.events, None)
+        self.delivered = 0
+        self._schedule()
+
+    def _schedule(self):
+        if self.next is not None:
+            self.clock.call_at(self.next[0], self._deliver)
+
+    def _deliver(self):
+        now = self.clock.now()
+        add = self.accumulator.add
+        while self.next is not None and self.next[0] <= now:
+            timestamp, dy = self.next
+            add(0, dy, timestamp)
+            self.delivered += 1
+            self.next = next(self.events, None)
+        self._schedule()
+
+
+def trace_events(reader):
+    """(time, dy) events from a TraceReader, for run_virtual()."""
+    return ((timestamp, dy) for timestamp, _, dy in reader.motion())
+
+
+@dataclass(slots=True)
+class VirtualRun:
+    engine: TreadmillEngine
+    reports: list  # (virtual time, y) for every report that reached the output
+    duration: float  # Virtual seconds simulated
+    real_seconds: float
+
+    @property
+    def stats(self):
+        return self.engine.scheduler.stats
+
+    @property
+    def speedup(self):
+        return self.duration / self.real_seconds if self.real_seconds else float("inf")
+
+    def values(self):
+        return [y for _, y in self.reports]
+
+
+def run_virtual(
+    settings=None,
+    duration=1.0,
+    events=(),
+    stalls=(),
+    changes=(),
+    tick_cost=0.0,
+    oversleep=None,
+    output=None,
+    quiet=True,
+):
+    """
+    Run the real engine loop for `duration` seconds of virtual time.
+
+    `events` are (time, dy) mouse deltas in time order, from 0; trace_events()
+    turns a trace into them. `stalls` are (time, seconds) pauses of the loop
+    thread, `changes` are (time, {field: value}) settings updates, as the GUI
+    would publish them. Each loop pass takes `tick_cost` seconds and each
+    sleep overruns by `oversleep()` if given. `output` wraps the recording
+    output, e.g. `lambda backend, clock: DedupOutput(backend, 0.02)`.
+
+    The scheduler, input timing and smoothing all see virtual time, so a run
+    takes as long as its ticks take to compute and the same arguments always
+    give the same reports. Unless `quiet` is false, the engine's end-of-run
+    summary is not printed.
+    """
+    clock = VirtualClock(oversleep=oversleep)
+    recorder = VirtualOutput(clock)
+    backend = recorder if output is None else output(recorder, clock)
+    settings_channel = SettingsChannel(settings if settings is not None else Settings())
+    accumulator = InputAccumulator(clock)
+    engine = TreadmillEngine(settings_channel, backend, accumulator, clock=clock)
+
+    InputFeed(clock, accumulator, events)
+    for at, seconds in stalls:
+        clock.call_at(at, lambda seconds=seconds: clock.advance(seconds))
+    for at, fields in changes:
+        clock.call_at(at, lambda fields=fields: settings_channel.update(**fields))
+
+    first_pass = True
+
+    def should_continue():
+        nonlocal first_pass
+        if not first_pass:
+            clock.advance(tick_cost)
+        first_pass = False
+        return clock.now() < duration
+
+    summary = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    started = time.perf_counter()
+    with summary:
+        engine.run(should_continue)
+    return VirtualRun(engine, recorder.reports, clock.now(), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    # Self-check of scheduler, catch-up and smoothing behaviour in virtual time
+    import math
+    import random
+    from dataclasses import replace
+
+    from vr_treadmill.outputs import DedupOutput
+
+    def walk(seconds, rate=1000, seed=1):
+        """A walker speeding up and slowing down, reported by a 1 kHz mouse."""
+        rng = random.Random(seed)
+        return [
+            ((i + 0.5) / rate, int(30 + 25 * math.sin(i / rate) + rng.gauss(0, 3)))
+            for i in range(int(seconds * rate))
+        ]
+
+    # Reproducible: the same seeded jitter gives the same reports
+    events = walk(60)
+    jittered = [
+        run_virtual(
+            Settings(poll_rate=1000),
+            60,
+            events,
+            oversleep=lambda rng=random.Random(7): rng.expovariate(1 / 0.0001),
+        )
+        for _ in range(2)
+    ]
+    first, second = jittered
+    assert first.reports == second.reports
+    assert first.stats.missed_ticks == second.stats.missed_ticks
+    assert first.engine.input_events_total == len(events)
+    print(
+        f"60 s at 1000 Hz with jitter: {first.stats.summary()}; "
+        f"{first.speedup:.0f}x real time, identical on repeat"
+    )
+
+    # Catch-up: a 50 ms stall is counted as missed ticks and loses no input,
+    # and rate normalisation keeps the late tick from spiking
+    steady = [((i + 0.5) / 1000, 20) for i in range(20000)]
+    settings = Settings(poll_rate=1000, average_count=1, sensitivity=10)
+    stalled = run_virtual(settings, 20, steady, stalls=[(10.0, 0.05)])
+    unnormalized = run_virtual(
+        replace(settings, normalize_rate=False), 20, steady, stalls=[(10.0, 0.05)]
+    )
+    assert stalled.stats.missed_ticks == 49, stalled.stats.missed_ticks
+    assert stalled.engine.input_events_total == len(steady)
+    assert max(abs(y) for y in stalled.values()) == 200
+    spike = max(abs(y) for y in unnormalized.values())
+    print(
+        f"50 ms stall: {stalled.stats.missed_ticks} missed ticks, no input lost, "
+        f"peak 200 after catch-up (unnormalised: {spike})"
+    )
+
+    # A loop too slow for its rate runs flat out; every deadline it can't
+    # meet is counted as missed, and the grid doesn't drift
+    slow = run_virtual(Settings(poll_rate=500), 2, tick_cost=0.003)
+    deadlines = slow.stats.ticks + slow.stats.missed_ticks
+    assert slow.stats.ticks == 667 and abs(deadlines - 1000) <= 1, slow.stats.summary()
+    print(f"3 ms ticks at 500 Hz: {slow.stats.summary()}")
+
+    # Smoothing: a mean over 5 samples reaches zero 5 ticks after input stops.
+    # Tick n runs at n / 100 s, so tick 101 is the first without input.
+    burst = [((i + 0.5) / 100, 10) for i in range(100)]
+    decay = run_virtual(Settings(poll_rate=100, average_count=5, sensitivity=100), 2, burst)
+    values = decay.values()
+    stop = 101
+    assert values[stop - 1] != 0 and values[stop + 3] != 0, values[stop - 1 : stop + 5]
+    assert values[stop + 4] == 0, values[stop - 1 : stop + 5]
+    print(f"Mean of 5 at 100 Hz after input stops: {values[stop - 1 : stop + 5]}")
+
+    # Event-driven ticks follow the input, and settings changes apply mid-run
+    sparse = [((i + 0.5) / 200, 5) for i in range(800)]
+    driven = run_virtual(
+        Settings(poll_rate=100),
+        4,
+        sparse,
+        changes=[(2.0, {"event_driven": True})],
+    )
+    engine = driven.engine
+    # One wake each way at the edges: input already queued at the switch, and
+    # the quiet tail after the last event
+    assert engine.input_wakes == 401 and engine.timeout_wakes == 1, (
+        engine.input_wakes,
+        engine.timeout_wakes,
+    )
+    print(f"Event-driven from 2 s: {engine.input_wakes} ticks woken by 200 Hz input")
+
+    # Report rate limiting runs on tick time, not the wall clock
+    limited = run_virtual(
+        Settings(poll_rate=1000),
+        4,
+        walk(4),
+        output=lambda backend, clock: DedupOutput(backend, 0.02),
+    )
+    times = [t for t, _ in limited.reports]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert 150 < len(times) <= 201 and min(gaps[:-1]) >= 0.02 - 1e-9, (len(times), min(gaps))
+    print(f"20 ms report limit over 4 s of 1000 Hz ticks: {len(times)} reports")
+
+    # Throughput
+    long_events = walk(600)
+    run = run_virtual(Settings(poll_rate=1000), 600, long_events)
+    print(
+        f"10 minutes at 1000 Hz ({run.stats.ticks} ticks, {len(long_events)} events) "
+        f"in {run.real_seconds:.2f} s: {run.speedup:.0f}x real time"
+    )
@@ -0,0 +1,188 @@
+import signal
+import threading
+from dataclasses import replace
+
+from vr_treadmill.config import (
+    load_config_file,
+    report_limits_from_config,
+    settings_from_config,
+)
+from vr_treadmill.engine import (
+    InputAccumulator,
+    PointerInput,
+    TreadmillEngine,
+    make_raw_listener,
+)
+from vr_treadmill.input_trace import TraceReader, TraceReplay, TraceWriter, replay_unthrottled
+from vr_treadmill.outputs import OUTPUT_AUTO, DedupOutput, make_output
+from vr_treadmill.sampling_profiler import SamplingProfiler, toggle_profiler
+from vr_treadmill.settings import Settings, SettingsChannel
+from vr_treadmill import startup_profile
+from vr_treadmill.startup_profile import phase
+
+
+def run_headless(
+    config_path=None,
+    output_backend=OUTPUT_AUTO,
+    output_path=None,
+    metrics_address=None,
+    profile=False,
+    trace_path=None,
+    replay_path=None,
+    unthrottled=False,
+):
+    """
+    Run the treadmill pipeline without Qt until SIGINT/SIGTERM.
+
+    `metrics_address` is a (host, port) to serve Prometheus metrics on, or None.
+    With `profile` the sampling profiler runs from the start; SIGUSR2 toggles it.
+    Input is captured to `trace_path` if given. With `replay_path` the trace
+    there replaces the mouse, in real time or, if `unthrottled`, as fast as
+    possible, and the run ends with the trace.
+    """
+    config = {}
+    with phase("Load config"):
+        if config_path:
+            try:
+                config = load_config_file(config_path)
+            except (OSError, ValueError) as e:
+                print(f"Failed to load config '{config_path}': {e}")
+                return 1
+        try:
+            settings = settings_from_config(config) if config else Settings()
+            min_interval, max_staleness = report_limits_from_config(config)
+        except (TypeError, ValueError) as e:
+            print(f"Invalid config '{config_path}': {e}")
+            return 1
+
+    reader = None
+    if replay_path:
+        try:
+            reader = TraceReader(replay_path)
+        except (OSError, ValueError) as e:
+            print(f"Failed to open input trace '{replay_path}': {e}")
+            return 1
+        # Recorded input of either mode replays as raw deltas
+        settings = replace(settings, use_raw_input=True)
+
+    with phase("Create output"):
+        # Unthrottled replay ticks on trace time, so recordings start at its 0
+        start = 0.0 if reader is not None and unthrottled else None
+        try:
+            output = DedupOutput(
+                make_output(output_backend, output_path, start), min_interval, max_staleness
+            )
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Failed to create '{output_backend}' output: {e}")
+            if reader is not None:
+                reader.close()
+            return 1
+
+    trace = None
+    if trace_path:
+        try:
+            trace = TraceWriter(trace_path)
+        except OSError as e:
+            print(f"Failed to create input trace '{trace_path}': {e}")
+            output.close()
+            if reader is not None:
+                reader.close()
+            return 1
+
+    settings_channel = SettingsChannel(settings)
+    accumulator = InputAccumulator()
+    on_delta = accumulator.add if trace is None else trace.capture(accumulator.add)
+    on_button = None if trace is None else trace.button
+    listener = None
+    pointer = None
+    with phase("Start input listener"):
+        if reader is not None:
+            if not unthrottled:
+                listener = TraceReplay(reader, on_delta, on_button)
+                listener.start()
+        elif settings.use_raw_input:
+            listener = make_raw_listener(on_delta, config.get("input_device"), on_button)
+            listener.start()
+        else:
+            pointer = PointerInput()
+
+    engine = TreadmillEngine(settings_channel, output, accumulator, pointer)
+    engine.trace = trace
+
+    metrics_server = None
+    if metrics_address is not None:
+        from vr_treadmill.metrics_server import start_metrics_server
+
+        metrics_server = start_metrics_server(engine, metrics_address)
+
+    if startup_profile.active_profile is not None:
+        startup_profile.active_profile.mark("Ready to track")
+        startup_profile.active_profile.report()
+        startup_profile.active_profile.remove_import_hook()
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda sig, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda sig, frame: stop_event.set())
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda sig, frame: dump_flight_recording(engine))
+
+    profiler = SamplingProfiler()
+    if hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, lambda sig, frame: toggle_profiler(profiler))
+    if profile:
+        toggle_profiler(profiler)
+
+    def should_continue():
+        if reader is not None and not listener.isRunning():
+            return False  # The replayed trace has ended
+        return not stop_event.is_set()
+
+    try:
+        if reader is not None and unthrottled:
+            replay_trace_unthrottled(reader, engine)
+        else:
+            print("Tracking started (headless). Press Ctrl+C to stop.")
+            engine.run(should_continue)
+    finally:
+        engine.release_output()
+        output.close()
+        if listener is not None and listener.isRunning():
+            listener.stop()
+            listener.wait()
+        if metrics_server is not None:
+            metrics_server.stop()
+        if profiler.running:
+            toggle_profiler(profiler)
+        if trace is not None:
+            trace.close()
+            print(f"Input trace saved to {trace.path} ({trace.count} records)")
+        if reader is not None:
+            reader.close()
+        try:
+            path = engine.flight_recorder.dump_last_run()
+            if path is not None:
+                print(f"Flight recording saved to {path}")
+        except OSError as e:
+            print(f"Failed to save flight recording: {e}")
+        print("Exited cleanly.")
+    return 0
+
+
+def dump_flight_recording(engine):
+    """SIGUSR1: save the flight recording and the performance histograms."""
+    try:
+        print(f"Flight recording saved to {engine.flight_recorder.dump()}")
+        print(f"Performance histograms saved to {engine.export_performance()}")
+    except OSError as e:
+        print(f"Failed to save flight recording: {e}")
+
+
+def replay_trace_unthrottled(reader, engine):
+    """Run a whole trace through the engine without waiting between ticks."""
+    print(f"Replaying input trace {reader.path} unthrottled.")
+    values = replay_unthrottled(reader, engine)
+    tick = engine.timings.tick
+    print(
+        f"Replayed {len(values)} ticks, {engine.reports_total} reports; tick time "
+        f"mean {tick.mean() / 1000:.1f}us, p99 {tick.percentile(99) / 1000:.1f}us"
+    )
@@ -0,0 +1,323 @@
+import mmap
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+
+TRACE_MAGIC = b"VRIT"
+TRACE_VERSION = 2
+# magic, version, time.perf_counter() when capture started
+TRACE_HEADER = struct.Struct("<4sHd")
+# seconds since capture started, kind, device, a, b
+TRACE_RECORD = struct.Struct("<dBBii")
+
+KIND_MOTION = 0  # a = dx, b = dy
+KIND_BUTTON = 1  # a = mouse button (from 1), b = 1 if pressed
+KIND_KEY_PRESS = 2  # a = key id
+KIND_KEY_RELEASE = 3  # a = key id
+# Names a key id the first time it is used: a = key id, b = name length,
+# followed by the name's b UTF-8 bytes, zero-padded to whole records so every
+# record stays on the 18-byte grid and a trace can be read as one array
+KIND_KEY_NAME = 4
+
+# Where a record came from
+DEVICE_RAW = 0  # Raw mouse listener (Windows raw input or evdev)
+DEVICE_POINTER = 1  # Pointer offsets read through pynput in non-raw mode
+DEVICE_KEYBOARD = 2  # pynput keyboard hook
+
+# Producers never write to the file; a background thread flushes this often
+FLUSH_INTERVAL = 0.5
+
+
+def key_name_size(length):
+    """Bytes a key name of `length` bytes takes up, padded to whole records."""
+    return -(-length // TRACE_RECORD.size) * TRACE_RECORD.size
+
+
+class TraceWriter:
+    """
+    Captures raw input to a compact binary trace (18 bytes per record).
+
+    Input threads append records to a deque, which is atomic in CPython, so
+    capturing costs a producer one tuple and no lock or I/O. A daemon thread
+    packs and writes them every FLUSH_INTERVAL, so a crash loses at most that
+    much of the trace. Key names are interned: each is written once, before
+    the first record that uses it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.start = time.perf_counter()
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.start))
+        self.pending = deque()
+        self.key_ids = {}
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TraceWriter", daemon=True)
+        self._thread.start()
+
+    def motion(self, dx, dy, timestamp=None, device=DEVICE_RAW):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.pending.append((timestamp, KIND_MOTION, device, dx, dy))
+
+    def pointer_delta(self, dy, timestamp=None):
+        self.motion(0, dy, timestamp, DEVICE_POINTER)
+
+    def button(self, button, pressed, timestamp=None, device=DEVICE_RAW):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.pending.append((timestamp, KIND_BUTTON, device, button, int(pressed)))
+
+    def key(self, key, pressed, timestamp=None):
+        """Record a key event; `key` is the key's str() form, as used for key binds."""
+        kind = KIND_KEY_PRESS if pressed else KIND_KEY_RELEASE
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.pending.append((timestamp, kind, DEVICE_KEYBOARD, key, 0))
+
+    def capture(self, on_delta):
+        """Wrap a listener's on_delta so each delta is traced before it is passed on."""
+
+        def traced(dx, dy):
+            now = time.perf_counter()
+            self.motion(dx, dy, now)
+            on_delta(dx, dy, now)
+
+        return traced
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        pending = self.pending
+        count = len(pending)
+        if count == 0:
+            return
+        buffer = bytearray()
+        start = self.start
+        pack = TRACE_RECORD.pack
+        for _ in range(count):
+            timestamp, kind, device, a, b = pending.popleft()
+            if kind == KIND_KEY_PRESS or kind == KIND_KEY_RELEASE:
+                key_id = self.key_ids.get(a)
+                if key_id is None:
+                    key_id = self.key_ids[a] = len(self.key_ids)
+                    name = a.encode()
+                    buffer += pack(0.0, KIND_KEY_NAME, DEVICE_KEYBOARD, key_id, len(name))
+                    buffer += name.ljust(key_name_size(len(name)), b"\0")
+                a = key_id
+            buffer += pack(timestamp - start, kind, device, a, b)
+        self.file.write(buffer)
+        self.file.flush()
+        self.count += count
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self.file.close()
+
+
+class TraceReader:
+    """
+    Reads a trace through a read-only memory map, so replaying a long session
+    neither loads it into memory nor copies it.
+
+    Iterating yields (time, kind, device, a, b) with time in seconds since the
+    capture started; for key events `a` is the key name. A record cut short
+    by a crash ends the trace.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self.file.close()
+            raise ValueError(f"{path} is not a v{TRACE_VERSION} input trace") from None
+        magic, version, self.start = TRACE_HEADER.unpack_from(self.map)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a v{TRACE_VERSION} input trace")
+
+    def __iter__(self):
+        data = self.map
+        end = len(data)
+        offset = TRACE_HEADER.size
+        size = TRACE_RECORD.size
+        unpack_from = TRACE_RECORD.unpack_from
+        key_names = {}
+        while offset + size <= end:
+            timestamp, kind, device, a, b = unpack_from(data, offset)
+            offset += size
+            if kind == KIND_KEY_NAME:
+                key_names[a] = data[offset : offset + b].decode()
+                offset += key_name_size(b)
+                continue
+            if kind == KIND_KEY_PRESS or kind == KIND_KEY_RELEASE:
+                a = key_names.get(a, f"key {a}")
+            yield timestamp, kind, device, a, b
+
+    def motion(self):
+        """Yield (time, dx, dy) for every motion record."""
+        for timestamp, kind, _, dx, dy in self:
+            if kind == KIND_MOTION:
+                yield timestamp, dx, dy
+
+    def close(self):
+        if not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TraceReplay:
+    """
+    Plays a trace back on its own thread with the recorded timing.
+
+    Motion goes to on_delta(dx, dy), buttons to on_button(button, pressed)
+    and keys to on_key(key, pressed), as the live listeners would call them,
+    so a replay can stand in for the mouse listener. `speed` scales time:
+    2.0 replays twice as fast.
+    """
+
+    def __init__(self, reader, on_delta=None, on_button=None, on_key=None, speed=1.0):
+        self.reader = reader
+        self.on_delta = on_delta
+        self.on_button = on_button
+        self.on_key = on_key
+        self.speed = speed
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="TraceReplay", daemon=True)
+        self.thread.start()
+
+    def isRunning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        print(f"Replaying input trace {self.reader.path}.")
+        started = time.perf_counter()
+        sleeper = threading.Event()  # Never set; wait() is an interruptible sleep
+        count = 0
+        for timestamp, kind, _, a, b in self.reader:
+            delay = started + timestamp / self.speed - time.perf_counter()
+            while delay > 0 and self.running:
+                sleeper.wait(min(delay, 0.1))
+                delay = started + timestamp / self.speed - time.perf_counter()
+            if not self.running:
+                break
+            if kind == KIND_MOTION:
+                if self.on_delta is not None:
+                    self.on_delta(a, b)
+            elif kind == KIND_BUTTON:
+                if self.on_button is not None:
+                    self.on_button(a, bool(b))
+            elif self.on_key is not None:
+                self.on_key(a, kind == KIND_KEY_PRESS)
+            count += 1
+        self.running = False
+        print(f"Trace replay finished after {count} records.")
+
+
+def replay_unthrottled(reader, engine, settings=None):
+    """
+    Run the engine over a whole trace as fast as possible and return the
+    joystick value of every tick.
+
+    Ticks run every 1/poll_rate seconds of trace time, each taking the motion
+    recorded since the previous one, so the same trace and settings always
+    give the same output. Pointer-mode records replay as raw deltas.
+    """
+    if settings is None:
+        settings = engine.settings_channel.current
+    settings = replace(settings, use_raw_input=True, event_driven=False)
+    period = 1.0 / settings.poll_rate
+    accumulator = engine.accumulator
+    engine.reset()
+
+    values = []
+    tick_time = None
+    for timestamp, dx, dy in reader.motion():
+        if tick_time is None:
+            tick_time = timestamp + period
+        while timestamp >= tick_time:
+            values.append(engine.tick(settings, tick_time))
+            tick_time += period
+        accumulator.add(dx, dy, timestamp)
+    if tick_time is not None:
+        values.append(engine.tick(settings, tick_time))
+    return values
+
+
+if __name__ == "__main__":
+    # Capture a synthetic walk, then check replay is exact and repeatable
+    import math
+    import os
+    import random
+    import tempfile
+
+    from vr_treadmill.engine import TreadmillEngine
+    from vr_treadmill.outputs import NullOutput
+    from vr_treadmill.settings import Settings, SettingsChannel
+    from vr_treadmill.smoothing import SMOOTHING_TYPE_ONE_EURO
+
+    path = os.path.join(tempfile.gettempdir(), "vr_treadmill_trace.bin")
+    rng = random.Random(1)
+    writer = TraceWriter(path)
+    events = []
+    for i in range(60000):  # A minute of 1 kHz mouse reports
+        t = writer.start + i / 1000
+        dy = int(40 * math.sin(i / 3000) + rng.gauss(0, 3))
+        writer.motion(rng.randint(-2, 2), dy, t)
+        events.append((i / 1000, dy))
+        if i % 5000 == 0:
+            writer.key("Key.alt_gr", True, t)
+            writer.button(1, True, t)
+    writer.close()
+
+    started = time.perf_counter()
+    with TraceReader(path) as reader:
+        replayed = [(t, dy) for t, _, dy in reader.motion()]
+        keys = [a for _, kind, _, a, _ in reader if kind == KIND_KEY_PRESS]
+    read_time = time.perf_counter() - started
+    assert [dy for _, dy in replayed] == [dy for _, dy in events]
+    assert all(abs(a[0] - b[0]) < 1e-9 for a, b in zip(replayed, events))
+    assert keys == ["Key.alt_gr"] * 12
+    print(
+        f"{len(replayed)} motion records, {os.path.getsize(path) / 1024:.0f} KiB, "
+        f"read in {read_time * 1000:.0f} ms"
+    )
+
+    settings = Settings(poll_rate=250, smoothing_type=SMOOTHING_TYPE_ONE_EURO)
+    engine = TreadmillEngine(SettingsChannel(settings), NullOutput())
+    with TraceReader(path) as reader:
+        started = time.perf_counter()
+        first = replay_unthrottled(reader, engine)
+        elapsed = time.perf_counter() - started
+        second = replay_unthrottled(reader, engine)
+    assert first == second
+    print(f"Unthrottled replay: {len(first)} ticks in {elapsed * 1000:.0f} ms, identical on repeat")
+    os.remove(path)
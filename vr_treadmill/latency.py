@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from array import array
+
+PERFORMANCE_DIR = "./performance"
+
+# Each power of two is split into 2**SUB_BUCKET_BITS buckets, so a recorded
+# value is off by at most 1/32 (about 3%) of itself
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values are nanoseconds; anything from 2**36 ns (about 69 s) up lands in the last bucket
+MAX_SHIFT = 36 - SUB_BUCKET_BITS - 1
+BUCKET_COUNT = SUB_BUCKETS + (MAX_SHIFT + 1) * SUB_BUCKETS
+
+# Pipeline stages timed each tick
+STAGE_INPUT_AGE = "input_age"  # From a raw input event arriving to the tick taking it
+STAGE_ACCUMULATE = "accumulate"  # Taking the tick's input
+STAGE_SMOOTHING = "smoothing"  # Cleanup, smoothing and prediction
+STAGE_CURVE = "curve"  # Sensitivity and curve lookup
+STAGE_OUTPUT = "output"  # Sending the report to the driver
+STAGE_TICK = "tick"  # The whole tick
+STAGE_LATENESS = "lateness"  # How late the tick woke
+STAGES = (
+    STAGE_INPUT_AGE,
+    STAGE_ACCUMULATE,
+    STAGE_SMOOTHING,
+    STAGE_CURVE,
+    STAGE_OUTPUT,
+    STAGE_TICK,
+    STAGE_LATENESS,
+)
+
+
+def bucket_index(value):
+    if value < SUB_BUCKETS:
+        return value if value > 0 else 0
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    return SUB_BUCKETS + shift * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_upper_bound(index):
+    """Largest value that falls in bucket `index`."""
+    if index < SUB_BUCKETS:
+        return index
+    shift, sub = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    return ((SUB_BUCKETS + sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of nanosecond durations.
+
+    Buckets are preallocated, so record() is a few integer operations and
+    one array increment with no allocation. Percentiles are reported as the
+    bucket's upper bound, i.e. never under-reported.
+    """
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0
+        target = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ns": self.mean(),
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "p999_ns": self.percentile(99.9),
+            "max_ns": self.max,
+            # Only non-empty buckets, as [upper bound ns, count]
+            "buckets": [
+                [bucket_upper_bound(i), c] for i, c in enumerate(self.counts) if c
+            ],
+        }
+
+
+class StageTimings:
+    """One LatencyHistogram per pipeline stage."""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        (
+            self.input_age,
+            self.accumulate,
+            self.smoothing,
+            self.curve,
+            self.output,
+            self.tick,
+            self.lateness,
+        ) = (self.histograms[stage] for stage in STAGES)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def to_dict(self):
+        return {stage: histogram.to_dict() for stage, histogram in self.histograms.items()}
+
+    def export_json(self, path=None, extra=None):
+        """Write every stage's histogram (plus `extra` fields) as JSON and return the path."""
+        if path is None:
+            os.makedirs(PERFORMANCE_DIR, exist_ok=True)
+            path = os.path.join(PERFORMANCE_DIR, time.strftime("performance-%Y%m%d-%H%M%S.json"))
+        data = {"stages": self.to_dict()}
+        if extra:
+            data.update(extra)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+        return path
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    rng = random.Random(1)
+    values = [int(rng.lognormvariate(10, 1.5)) for _ in range(200000)]
+    histogram = LatencyHistogram()
+    elapsed = timeit.timeit(lambda: [histogram.record(v) for v in values], number=1)
+    print(f"record: {elapsed / len(values) * 1e9:.0f} ns/value")
+
+    ordered = sorted(values)
+    for percent in (50, 99, 99.9):
+        exact = ordered[max(0, int(-(-len(ordered) * percent // 100)) - 1)]
+        reported = histogram.percentile(percent)
+        assert exact <= reported <= exact * (1 + 1 / SUB_BUCKETS) + 1, (percent, exact, reported)
+        print(f"p{percent:<5} exact {exact:>10} ns  reported {reported:>10} ns")
@@ -0,0 +1,181 @@
+import gc
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vr_treadmill.engine import REPORT_MAGNITUDE_BUCKETS
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class GcPauseMonitor:
+    """Counts garbage collections and their pause times through gc.callbacks."""
+
+    def __init__(self):
+        generations = len(gc.get_count())
+        self.collections = [0] * generations
+        self.pause_total = [0.0] * generations
+        self.pause_max = 0.0
+        self._started = None
+
+    def install(self):
+        gc.callbacks.append(self._callback)
+
+    def remove(self):
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            pause = time.perf_counter() - self._started
+            self._started = None
+            generation = info["generation"]
+            self.collections[generation] += 1
+            self.pause_total[generation] += pause
+            if pause > self.pause_max:
+                self.pause_max = pause
+
+
+def _summary(lines, name, histogram, labels=""):
+    """Append a Prometheus summary in seconds built from a LatencyHistogram."""
+    for quantile in QUANTILES:
+        value = histogram.percentile(quantile * 100) / 1e9
+        label_text = f'{labels},quantile="{quantile}"' if labels else f'quantile="{quantile}"'
+        lines.append(f"{name}{{{label_text}}} {value:.9f}")
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.total / 1e9:.9f}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+def render_metrics(engine, gc_monitor):
+    """Return the engine's metrics in the Prometheus text exposition format."""
+    settings = engine.settings_channel.current
+    scheduler = engine.scheduler
+    timings = engine.timings
+    lines = []
+
+    def header(name, metric_type, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    header("vr_treadmill_tracking", "gauge", "1 while the pipeline is running.")
+    lines.append(f"vr_treadmill_tracking {1 if engine.running else 0}")
+
+    header("vr_treadmill_poll_rate_hz", "gauge", "Configured processing rate.")
+    lines.append(f"vr_treadmill_poll_rate_hz {settings.poll_rate}")
+
+    header("vr_treadmill_ticks_total", "counter", "Pipeline ticks run.")
+    lines.append(f"vr_treadmill_ticks_total {engine.ticks_total}")
+
+    header(
+        "vr_treadmill_missed_ticks_total",
+        "counter",
+        "Tick deadlines skipped because the loop fell behind (resets when tracking restarts).",
+    )
+    lines.append(f"vr_treadmill_missed_ticks_total {scheduler.stats.missed_ticks if scheduler else 0}")
+
+    header("vr_treadmill_tick_jitter_stddev_seconds", "gauge", "Standard deviation of tick lateness.")
+    lines.append(
+        f"vr_treadmill_tick_jitter_stddev_seconds {scheduler.stats.jitter_stddev if scheduler else 0.0:.9f}"
+    )
+
+    header("vr_treadmill_tick_lateness_seconds", "summary", "How late ticks woke.")
+    _summary(lines, "vr_treadmill_tick_lateness_seconds", timings.lateness)
+
+    header("vr_treadmill_stage_duration_seconds", "summary", "Time spent in each pipeline stage.")
+    for stage, histogram in timings.histograms.items():
+        if histogram is not timings.lateness:
+            _summary(lines, "vr_treadmill_stage_duration_seconds", histogram, f'stage="{stage}"')
+
+    header("vr_treadmill_input_events_total", "counter", "Raw mouse events processed.")
+    lines.append(f"vr_treadmill_input_events_total {engine.input_events_total}")
+
+    header("vr_treadmill_reports_total", "counter", "Joystick reports passed to the output.")
+    lines.append(f"vr_treadmill_reports_total {engine.reports_total}")
+
+    header("vr_treadmill_report_magnitude", "histogram", "Absolute joystick values reported.")
+    cumulative = 0
+    for bound, count in zip(REPORT_MAGNITUDE_BUCKETS, engine.report_magnitudes):
+        cumulative += count
+        lines.append(f'vr_treadmill_report_magnitude_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f'vr_treadmill_report_magnitude_bucket{{le="+Inf"}} {engine.reports_total}')
+    lines.append(f"vr_treadmill_report_magnitude_sum {engine.report_magnitude_sum}")
+    lines.append(f"vr_treadmill_report_magnitude_count {engine.reports_total}")
+
+    header("vr_treadmill_gc_collections_total", "counter", "Garbage collections by generation.")
+    for generation, count in enumerate(gc_monitor.collections):
+        lines.append(f'vr_treadmill_gc_collections_total{{generation="{generation}"}} {count}')
+    header("vr_treadmill_gc_pause_seconds_total", "counter", "Time spent in garbage collection.")
+    for generation, pause in enumerate(gc_monitor.pause_total):
+        lines.append(f'vr_treadmill_gc_pause_seconds_total{{generation="{generation}"}} {pause:.9f}')
+    header("vr_treadmill_gc_pause_max_seconds", "gauge", "Longest garbage collection pause.")
+    lines.append(f"vr_treadmill_gc_pause_max_seconds {gc_monitor.pause_max:.9f}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves /metrics in Prometheus text format from its own thread.
+
+    A scrape only reads counters the engine already keeps, so it never takes
+    a lock or does work on the pipeline thread.
+    """
+
+    def __init__(self, engine, host=DEFAULT_METRICS_HOST, port=9464):
+        self.engine = engine
+        self.address = (host, port)
+        self.gc_monitor = GcPauseMonitor()
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render_metrics(metrics.engine, metrics.gc_monitor).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(self.address, Handler)
+        self.server.daemon_threads = True
+        self.gc_monitor.install()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="MetricsServer", daemon=True
+        )
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.gc_monitor.remove()
+        self.server = None
+
+
+def start_metrics_server(engine, address):
+    """Start a MetricsServer on (host, port); returns None if the port can't be bound."""
+    server = MetricsServer(engine, *address)
+    try:
+        server.start()
+    except OSError as e:
+        print(f"Failed to start metrics server on {address[0]}:{address[1]}: {e}")
+        return None
+    return server
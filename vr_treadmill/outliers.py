@@ -0,0 +1,261 @@
+import math
+from dataclasses import dataclass
+
+from vr_treadmill.smoothing import IndexableSkiplist, RingBuffer
+
+DROPOUT_OFF = "off"
+DROPOUT_HOLD = "hold"
+DROPOUT_EXTRAPOLATE = "extrapolate"
+DROPOUT_MODES = (DROPOUT_OFF, DROPOUT_HOLD, DROPOUT_EXTRAPOLATE)
+
+# Scales the MAD to a standard deviation for normally distributed input
+MAD_TO_SIGMA = 1.4826
+
+
+@dataclass(frozen=True, slots=True)
+class OutlierParams:
+    """Settings for the input cleanup stage that runs before smoothing."""
+
+    hampel_enabled: bool = False
+    hampel_window: int = 7
+    hampel_threshold: float = 3.0  # In (scaled) MADs from the median
+    # Deviations below this are never outliers, so steady input (MAD 0) can still change
+    hampel_min_deviation: float = 20.0
+    dropout_mode: str = DROPOUT_OFF
+    dropout_max_ms: float = 100.0  # Longest gap bridged; after that a stop is real
+    # Dropouts are only bridged while moving at least this fast (counts per tick)
+    dropout_min_speed: float = 2.0
+
+
+class HampelFilter:
+    """
+    Streaming Hampel outlier detector over the last `window` samples.
+
+    A sample further than `threshold` scaled MADs (and `min_deviation`) from
+    the window median is replaced by the median. The window is kept sorted in
+    an indexable skiplist: the median is one O(log n) lookup, and the MAD is
+    found by selecting from the two sorted runs of deviations either side of
+    the median, which takes O(log n) lookups, without sorting deviations.
+
+    Zero samples always pass: they are dropouts or a real stop, which the
+    dropout stage deals with.
+    """
+
+    def __init__(self, window, threshold, min_deviation):
+        self.window = window
+        self.threshold = threshold
+        self.min_deviation = min_deviation
+        self.history = RingBuffer(window)
+        self.sorted = IndexableSkiplist(window)
+        self.rejected = 0
+
+    def reset(self):
+        self.history = RingBuffer(self.window)
+        self.sorted = IndexableSkiplist(self.window)
+        self.rejected = 0
+
+    def median(self):
+        s = self.sorted
+        n = len(s)
+        mid = n // 2
+        if n % 2 == 1:
+            return s[mid]
+        return (s[mid - 1] + s[mid]) / 2
+
+    def mad(self, median):
+        """Median absolute deviation from `median` of the samples in the window."""
+        s = self.sorted
+        n = len(s)
+        split = n // 2
+        # Deviations below the median, nearest first, and above it, nearest first
+        below_count = split
+
+        def below(i):
+            return median - s[split - 1 - i]
+
+        def above(i):
+            return s[split + i] - median
+
+        above_count = n - split
+        k = n // 2
+        if n % 2 == 1:
+            return _kth_of_two(below, below_count, above, above_count, k)
+        return (
+            _kth_of_two(below, below_count, above, above_count, k - 1)
+            + _kth_of_two(below, below_count, above, above_count, k)
+        ) / 2
+
+    def push(self, value):
+        """Add a sample and return it, or the window median if it is an outlier."""
+        result = value
+        if value != 0 and len(self.history) >= 3:
+            median = self.median()
+            limit = max(self.threshold * MAD_TO_SIGMA * self.mad(median), self.min_deviation)
+            if abs(value - median) > limit:
+                result = median
+                self.rejected += 1
+
+        # The raw sample joins the window, so a lasting change is accepted
+        # once it makes up most of the window
+        if self.history.is_full():
+            self.sorted.remove(self.history.pop())
+        self.history.push(value)
+        self.sorted.insert(value)
+        return result
+
+
+def _kth_of_two(a, a_len, b, b_len, k):
+    """k-th smallest (0-based) of two ascending sequences given as index functions."""
+    count = k + 1
+    lo = max(0, count - b_len)
+    hi = min(a_len, count)
+    # Smallest number i of elements taken from a with a[i] >= b[count - i - 1]
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a(i) < b(count - i - 1):
+            lo = i + 1
+        else:
+            hi = i
+    i = lo
+    j = count - i
+    return max(a(i - 1) if i > 0 else -math.inf, b(j - 1) if j > 0 else -math.inf)
+
+
+class DropoutBridge:
+    """
+    Bridges short runs of zero input while moving, which is what a mouse that
+    briefly loses tracking at speed produces.
+
+    For up to `max_ms` after the last good sample, zeros are replaced by that
+    sample (hold) or by a linear continuation of the last two samples that
+    never crosses zero (extrapolate). A longer gap is a real stop, so output
+    drops to zero; the cost is that stopping is reported `max_ms` late.
+    """
+
+    def __init__(self, mode, max_ms, min_speed):
+        self.mode = mode
+        self.max_ms = max_ms
+        self.min_speed = min_speed
+        self.reset()
+
+    def reset(self):
+        self.bridged = 0
+        self.last_value = 0
+        self.last_time = None
+        self.slope = 0.0  # Change per second between the last two good samples
+
+    def push(self, value, now):
+        if value != 0:
+            if self.last_time is not None and now > self.last_time and self.last_value != 0:
+                self.slope = (value - self.last_value) / (now - self.last_time)
+            else:
+                self.slope = 0.0
+            self.last_value = value
+            self.last_time = now
+            return value
+
+        if (
+            self.mode == DROPOUT_OFF
+            or self.last_time is None
+            or abs(self.last_value) < self.min_speed
+            or (now - self.last_time) * 1000 > self.max_ms
+        ):
+            return 0
+
+        self.bridged += 1
+        if self.mode == DROPOUT_HOLD:
+            return self.last_value
+        estimate = self.last_value + self.slope * (now - self.last_time)
+        # Extrapolation can slow down to zero but never reverse direction
+        if (estimate > 0) != (self.last_value > 0):
+            return 0
+        return estimate
+
+
+class InputCleanup:
+    """
+    The cleanup stage: outlier rejection, then dropout bridging.
+
+    Rejecting first means a spike just before a dropout is never bridged;
+    the bridge holds or extends the last value the Hampel filter accepted.
+    Bridged zeros are kept out of the Hampel window, so a dropout doesn't
+    make the input that follows it look like an outlier.
+    """
+
+    def __init__(self, params=OutlierParams()):
+        self.params = None
+        self.hampel = None
+        self.dropout = None
+        self.configure(params)
+
+    def configure(self, params):
+        """Apply new parameters; the stage's history is kept if they didn't change."""
+        if params is self.params or params == self.params:
+            return
+        self.params = params
+        self.hampel = HampelFilter(
+            params.hampel_window, params.hampel_threshold, params.hampel_min_deviation
+        )
+        self.dropout = DropoutBridge(
+            params.dropout_mode, params.dropout_max_ms, params.dropout_min_speed
+        )
+
+    def reset(self):
+        self.hampel.reset()
+        self.dropout.reset()
+
+    def push(self, value, now):
+        params = self.params
+        bridging = params.dropout_mode != DROPOUT_OFF
+        if value == 0 and bridging:
+            bridged = self.dropout.push(0, now)
+            if bridged != 0:
+                return bridged
+            # A real stop: the zero joins the Hampel window like any sample
+            bridging = False
+        if params.hampel_enabled:
+            value = self.hampel.push(value)
+        if bridging:
+            value = self.dropout.push(value, now)
+        return value
+
+
+if __name__ == "__main__":
+    # MAD selection against a brute-force MAD, then the cost per tick
+    import random
+    import statistics
+    import timeit
+
+    rng = random.Random(1)
+    for window in (3, 4, 7, 8, 31, 100):
+        hampel = HampelFilter(window, 3.0, 0)
+        for _ in range(2000):
+            hampel.push(rng.randint(-50, 50))
+            values = list(hampel.history)
+            median = statistics.median(values)
+            expected = statistics.median(abs(v - median) for v in values)
+            assert hampel.median() == median
+            assert hampel.mad(median) == expected, (window, values)
+    print("Streaming MAD matches statistics.median.")
+
+    # A spike right before a dropout is rejected, not bridged, and doesn't
+    # leak into the input after it
+    cleanup = InputCleanup(OutlierParams(hampel_enabled=True, dropout_mode=DROPOUT_HOLD))
+    sequence = [30] * 20 + [400] + [0] * 8 + [30] * 5
+    cleaned = [cleanup.push(v, i / 1000) for i, v in enumerate(sequence)]
+    assert cleaned == [30] * len(sequence), cleaned
+    print("Spike before a dropout is rejected before bridging.")
+
+    samples = [rng.gauss(30, 4) if rng.random() > 0.02 else 400.0 for _ in range(20000)]
+    samples = [0.0 if rng.random() < 0.03 else v for v in samples]
+    for window in (7, 31, 101):
+        cleanup = InputCleanup(
+            OutlierParams(hampel_enabled=True, hampel_window=window, dropout_mode=DROPOUT_HOLD)
+        )
+        elapsed = timeit.timeit(
+            lambda: [cleanup.push(v, i / 1000) for i, v in enumerate(samples)], number=1
+        )
+        print(
+            f"window {window:>4}: {elapsed / len(samples) * 1e6:6.2f} us/tick, "
+            f"{cleanup.hampel.rejected} outliers rejected, {cleanup.dropout.bridged} dropouts bridged"
+        )
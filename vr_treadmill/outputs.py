@@ -0,0 +1,431 @@
+import os
+import struct
+import sys
+import threading
+import time
+
+OUTPUT_AUTO = "auto"
+OUTPUT_VGAMEPAD = "vgamepad"
+OUTPUT_UINPUT = "uinput"
+OUTPUT_NULL = "null"
+OUTPUT_RECORD = "record"
+OUTPUT_BACKENDS = (OUTPUT_AUTO, OUTPUT_VGAMEPAD, OUTPUT_UINPUT, OUTPUT_NULL, OUTPUT_RECORD)
+
+
+class OutputBackend:
+    """
+    Where joystick reports go.
+
+    Calls come from several threads: send() from the engine thread,
+    set_a_button() from the keyboard hook, and center() from whichever thread
+    stops tracking. Device backends are not thread-safe themselves; the GUI
+    and headless runner always wrap them in DedupOutput, which serialises
+    every call.
+    """
+
+    name = "base"
+
+    def send(self, y, left_thumb=None, now=None):
+        """
+        Send the left stick Y value, and the thumb button unless it is None.
+
+        `now` is the pipeline time of the tick the report comes from. Stages
+        that time reports go by it rather than the wall clock, so they behave
+        the same in trace replay and virtual time.
+        """
+        raise NotImplementedError
+
+    def set_a_button(self, pressed, now=None):
+        raise NotImplementedError
+
+    def center(self, now=None):
+        """Centre the stick and release the thumb button, e.g. when tracking stops."""
+        self.send(0, False, now)
+
+    def stats_summary(self):
+        """One-line statistics for the log, or None if the backend keeps none."""
+        return None
+
+    def close(self):
+        pass
+
+
+class VGamepadOutput(OutputBackend):
+    """Sends the joystick value to a virtual Xbox 360 pad through vgamepad."""
+
+    name = OUTPUT_VGAMEPAD
+
+    def __init__(self):
+        import vgamepad as vg
+
+        self.buttons = vg.XUSB_BUTTON
+        self.gamepad = vg.VX360Gamepad()
+
+    def send(self, y, left_thumb=None, now=None):
+        if left_thumb is not None:
+            button = self.buttons.XUSB_GAMEPAD_LEFT_THUMB
+            if left_thumb:
+                self.gamepad.press_button(button=button)
+            else:
+                self.gamepad.release_button(button=button)
+
+        self.gamepad.left_joystick(x_value=0, y_value=y)
+        self.gamepad.update()
+
+    def set_a_button(self, pressed, now=None):
+        button = self.buttons.XUSB_GAMEPAD_A
+        if pressed:
+            self.gamepad.press_button(button=button)
+        else:
+            self.gamepad.release_button(button=button)
+        self.gamepad.update()
+
+
+# Linux input event codes (linux/input-event-codes.h) and uinput ioctls
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0
+ABS_X = 0x00
+ABS_Y = 0x01
+BTN_SOUTH = 0x130
+BTN_THUMBL = 0x13D
+BUS_USB = 0x03
+
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_SET_ABSBIT = 0x40045567
+
+ABS_CNT = 64
+UINPUT_MAX_NAME_SIZE = 80
+
+# struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+INPUT_EVENT = struct.Struct("llHHi")
+
+
+class UinputOutput(OutputBackend):
+    """
+    Linux virtual gamepad written as raw evdev events to /dev/uinput.
+
+    Each report is a single write of ABS_Y, the optional thumb button and a
+    SYN_REPORT. Linux sticks point down for positive Y, so the value is
+    inverted. With create_device=False the same event stream is written to
+    any file, which is handy for measuring the report path on its own.
+    """
+
+    name = OUTPUT_UINPUT
+
+    def __init__(self, path="/dev/uinput", create_device=True, device_name="VR Treadmill Gamepad"):
+        self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        self.created = False
+        try:
+            if create_device:
+                self._create_device(device_name)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+        self.sync_event = INPUT_EVENT.pack(0, 0, EV_SYN, SYN_REPORT, 0)
+
+    def _create_device(self, device_name):
+        import fcntl
+
+        for event_type in (EV_SYN, EV_KEY, EV_ABS):
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, event_type)
+        for key in (BTN_SOUTH, BTN_THUMBL):
+            fcntl.ioctl(self.fd, UI_SET_KEYBIT, key)
+        for axis in (ABS_X, ABS_Y):
+            fcntl.ioctl(self.fd, UI_SET_ABSBIT, axis)
+
+        # Legacy struct uinput_user_dev setup, supported by every kernel
+        absmax = [0] * ABS_CNT
+        absmin = [0] * ABS_CNT
+        for axis in (ABS_X, ABS_Y):
+            absmin[axis] = -32768
+            absmax[axis] = 32767
+        user_dev = struct.pack(
+            f"{UINPUT_MAX_NAME_SIZE}sHHHHI{ABS_CNT}i{ABS_CNT}i{ABS_CNT}i{ABS_CNT}i",
+            device_name.encode()[: UINPUT_MAX_NAME_SIZE - 1],
+            BUS_USB,
+            0x045E,  # Microsoft
+            0x028E,  # Xbox 360 controller
+            1,
+            0,
+            *absmax,
+            *absmin,
+            *([0] * ABS_CNT),
+            *([0] * ABS_CNT),
+        )
+        os.write(self.fd, user_dev)
+        fcntl.ioctl(self.fd, UI_DEV_CREATE)
+        self.created = True
+
+    def send(self, y, left_thumb=None, now=None):
+        report = INPUT_EVENT.pack(0, 0, EV_ABS, ABS_Y, max(-32768, min(32767, -y)))
+        if left_thumb is not None:
+            report += INPUT_EVENT.pack(0, 0, EV_KEY, BTN_THUMBL, 1 if left_thumb else 0)
+        os.write(self.fd, report + self.sync_event)
+
+    def set_a_button(self, pressed, now=None):
+        report = INPUT_EVENT.pack(0, 0, EV_KEY, BTN_SOUTH, 1 if pressed else 0)
+        os.write(self.fd, report + self.sync_event)
+
+    def close(self):
+        if self.fd is None:
+            return
+        if self.created:
+            import fcntl
+
+            fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        os.close(self.fd)
+        self.fd = None
+
+
+class NullOutput(OutputBackend):
+    """Discards every report. Used to measure the pipeline without a driver."""
+
+    name = OUTPUT_NULL
+
+    def send(self, y, left_thumb=None, now=None):
+        pass
+
+    def set_a_button(self, pressed, now=None):
+        pass
+
+
+RECORDING_MAGIC = b"VRTO"
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct("<4sHd")  # magic, version, start time
+# time since start (s), stick Y, flags
+RECORDING_RECORD = struct.Struct("<dhB")
+RECORDING_BATCH = 4096
+
+FLAG_THUMB_SET = 0x01
+FLAG_THUMB_PRESSED = 0x02
+FLAG_A_SET = 0x04
+FLAG_A_PRESSED = 0x08
+
+
+class RecordingOutput(OutputBackend):
+    """
+    Writes timestamped reports to a compact binary file (11 bytes per report).
+
+    Records are packed into a preallocated batch buffer and written out when
+    it fills, so a report costs one pack_into call.
+
+    Each record is stamped with the `now` it was sent with, the pipeline time
+    of its tick, relative to `start`; time.perf_counter() stands in when no
+    time is given. `start` defaults to the current time, which suits live
+    tracking. Trace replay passes 0 so the recording lines up with the
+    trace's own timeline.
+    """
+
+    name = OUTPUT_RECORD
+
+    def __init__(self, path, start=None):
+        self.file = open(path, "wb")
+        self.start = time.perf_counter() if start is None else start
+        self.file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.start))
+        self.buffer = bytearray(RECORDING_RECORD.size * RECORDING_BATCH)
+        self.count = 0
+        self.last_y = 0
+
+    def _record(self, y, flags, now):
+        if now is None:
+            now = time.perf_counter()
+        RECORDING_RECORD.pack_into(
+            self.buffer,
+            self.count * RECORDING_RECORD.size,
+            now - self.start,
+            y,
+            flags,
+        )
+        self.count += 1
+        if self.count == RECORDING_BATCH:
+            self.flush()
+
+    def send(self, y, left_thumb=None, now=None):
+        flags = 0
+        if left_thumb is not None:
+            flags = FLAG_THUMB_SET | (FLAG_THUMB_PRESSED if left_thumb else 0)
+        self.last_y = y
+        self._record(y, flags, now)
+
+    def set_a_button(self, pressed, now=None):
+        self._record(self.last_y, FLAG_A_SET | (FLAG_A_PRESSED if pressed else 0), now)
+
+    def flush(self):
+        self.file.write(memoryview(self.buffer)[: self.count * RECORDING_RECORD.size])
+        self.count = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class DedupOutput(OutputBackend):
+    """
+    Output stage that only forwards reports that change something.
+
+    Unchanged stick values are dropped, and the thumb button is only forwarded
+    when its state flips. `min_interval` rate-limits changes; a held-back
+    change goes out on the first send() after the interval. `max_staleness`
+    resends the current state at least that often, so a driver that missed a
+    report catches up. Both are in seconds; 0/None disables them. They are
+    measured in the `now` passed to send(), or on `clock` if none is given.
+
+    Every call holds `lock`, so the backend and the dedup state are only
+    touched by one thread at a time.
+    """
+
+    def __init__(self, backend, min_interval=0.0, max_staleness=None, clock=time.perf_counter):
+        self.backend = backend
+        self.name = f"{backend.name}, deduplicated"
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.last_y = None
+        self.last_thumb = None
+        self.last_sent = float("-inf")
+
+        self.reports_sent = 0
+        self.skipped_unchanged = 0
+        self.skipped_rate_limited = 0
+        self.thumb_calls_avoided = 0
+
+    def send(self, y, left_thumb=None, now=None):
+        with self.lock:
+            if now is None:
+                now = self.clock()
+            since_sent = now - self.last_sent
+            thumb_changed = left_thumb is not None and left_thumb != self.last_thumb
+
+            if y != self.last_y or thumb_changed:
+                if since_sent < self.min_interval:
+                    self.skipped_rate_limited += 1
+                    return
+            elif self.max_staleness is None or since_sent < self.max_staleness:
+                self.skipped_unchanged += 1
+                return
+
+            if left_thumb is not None and not thumb_changed:
+                self.thumb_calls_avoided += 1
+            self.backend.send(y, left_thumb if thumb_changed else None, now)
+
+            self.last_y = y
+            if thumb_changed:
+                self.last_thumb = left_thumb
+            self.last_sent = now
+            self.reports_sent += 1
+
+    def set_a_button(self, pressed, now=None):
+        with self.lock:
+            self.backend.set_a_button(pressed, now)
+
+    def center(self, now=None):
+        """Centre the stick now, bypassing deduplication and the rate limit."""
+        with self.lock:
+            self.backend.send(0, False if self.last_thumb else None, now)
+            self.last_y = 0
+            if self.last_thumb:
+                self.last_thumb = False
+            self.reports_sent += 1
+
+    @property
+    def reports_avoided(self):
+        return self.skipped_unchanged + self.skipped_rate_limited
+
+    def stats_summary(self):
+        total = self.reports_sent + self.reports_avoided
+        return (
+            f"{self.reports_sent}/{total} reports sent, "
+            f"{self.skipped_unchanged} unchanged and "
+            f"{self.skipped_rate_limited} rate-limited skipped, "
+            f"{self.thumb_calls_avoided} thumb button calls avoided"
+        )
+
+    def close(self):
+        with self.lock:
+            self.backend.close()
+
+
+def read_recording(path):
+    """Return the start time and a list of (time, y, flags) from a recording."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, start = RECORDING_HEADER.unpack_from(data)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError(f"{path} is not a v{RECORDING_VERSION} output recording")
+    body = memoryview(data)[RECORDING_HEADER.size :]
+    usable = len(body) - len(body) % RECORDING_RECORD.size
+    return start, list(RECORDING_RECORD.iter_unpack(body[:usable]))
+
+
+def make_output(backend=OUTPUT_AUTO, path=None, start=None):
+    """
+    Create an output backend. 'auto' picks vgamepad on Windows, uinput on Linux.
+
+    `start` is the pipeline time a recording's timestamps count from.
+    """
+    if backend == OUTPUT_AUTO:
+        backend = OUTPUT_UINPUT if sys.platform.startswith("linux") else OUTPUT_VGAMEPAD
+
+    if backend == OUTPUT_VGAMEPAD:
+        return VGamepadOutput()
+    if backend == OUTPUT_UINPUT:
+        return UinputOutput(path or "/dev/uinput")
+    if backend == OUTPUT_NULL:
+        return NullOutput()
+    if backend == OUTPUT_RECORD:
+        return RecordingOutput(path or "output_recording.bin", start)
+    raise ValueError(f"Unknown output backend: {backend}")
+
+
+if __name__ == "__main__":
+    # Cost of each backend's report path on its own
+    import tempfile
+    import timeit
+
+    reports = 100000
+    backends = [("null", NullOutput)]
+
+    recording_path = os.path.join(tempfile.gettempdir(), "vr_treadmill_bench.bin")
+    backends.append(("record", lambda: RecordingOutput(recording_path)))
+    backends.append(("evdev writer", lambda: UinputOutput(os.devnull, create_device=False)))
+    if os.access("/dev/uinput", os.W_OK):
+        backends.append(("uinput", UinputOutput))
+    try:
+        import vgamepad  # noqa: F401
+
+        backends.append(("vgamepad", VGamepadOutput))
+    except Exception:
+        pass
+
+    for name, factory in backends:
+        backend = factory()
+        values = [(i % 2001) - 1000 for i in range(reports)]
+        elapsed = timeit.timeit(lambda: [backend.send(y, y != 0) for y in values], number=1)
+        backend.close()
+        print(f"{name:<14}{elapsed / reports * 1e6:8.2f} us/report")
+
+    # Centring reaches the device even while changes are being rate-limited
+    dedup = DedupOutput(RecordingOutput(recording_path), min_interval=1.0)
+    dedup.send(3388, True)
+    dedup.send(1000, True)
+    dedup.center()
+    dedup.close()
+    _, records = read_recording(recording_path)
+    assert [(y, flags) for _, y, flags in records] == [
+        (3388, FLAG_THUMB_SET | FLAG_THUMB_PRESSED),
+        (0, FLAG_THUMB_SET),
+    ], records
+    print("Centring bypasses the rate limit.")
+
+    if os.path.exists(recording_path):
+        os.remove(recording_path)
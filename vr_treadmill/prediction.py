@@ -0,0 +1,110 @@
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PredictionParams:
+    """Settings for extrapolating the smoothed input forward in time."""
+
+    enabled: bool = False
+    horizon_ms: float = 20.0
+    # Recent smoothed samples the trend is fitted to
+    fit_samples: int = 4
+    # The prediction may change the value by at most this fraction of it
+    max_change: float = 0.5
+
+
+class Predictor:
+    """
+    Compensates for smoothing lag by extrapolating along the recent trend.
+
+    The rate of change of the smoothed input (the walking acceleration) is
+    the least-squares slope over the last few samples, and the output is moved
+    `horizon_ms` along it. The change is clamped to `max_change` of the
+    current value and can never reverse its sign, and prediction is skipped
+    while the recent samples don't all point the same way, so turning around
+    on the treadmill is never overshot.
+    """
+
+    def __init__(self, params=PredictionParams()):
+        self.params = params
+        self.samples = deque(maxlen=params.fit_samples)
+        self.skipped = 0  # Samples passed through because of a direction change
+
+    def configure(self, params):
+        if params is self.params or params == self.params:
+            return
+        if params.enabled and not self.params.enabled:
+            # Samples stop while prediction is off; fitting to the ones from
+            # before it was turned off would follow an outdated trend
+            self.samples.clear()
+        if params.fit_samples != self.params.fit_samples:
+            self.samples = deque(self.samples, maxlen=params.fit_samples)
+        self.params = params
+
+    def reset(self):
+        self.samples.clear()
+        self.skipped = 0
+
+    def slope(self):
+        """Least-squares rate of change of the stored samples, per second."""
+        samples = self.samples
+        n = len(samples)
+        mean_t = sum(t for t, _ in samples) / n
+        mean_v = sum(v for _, v in samples) / n
+        covariance = 0.0
+        variance = 0.0
+        for t, v in samples:
+            dt = t - mean_t
+            covariance += dt * (v - mean_v)
+            variance += dt * dt
+        return covariance / variance if variance > 0 else 0.0
+
+    def push(self, value, now):
+        """Add a smoothed sample and return the predicted value."""
+        samples = self.samples
+        samples.append((now, value))
+        if value == 0 or len(samples) < 2:
+            return value
+
+        positive = value > 0
+        if any(v == 0 or (v > 0) != positive for _, v in samples):
+            self.skipped += 1
+            return value
+
+        params = self.params
+        change = self.slope() * params.horizon_ms / 1000
+        limit = abs(value) * params.max_change
+        change = max(-limit, min(limit, change))
+        return value + change
+
+
+if __name__ == "__main__":
+    # Lag of a mean-smoothed ramp with and without prediction
+    from vr_treadmill.smoothing import SMOOTHING_TYPE_MEAN, Smoother
+
+    rate = 60
+    target = [min(i, 30) * 1.0 for i in range(2 * rate)]  # Speeding up, then steady
+    smoother = Smoother(SMOOTHING_TYPE_MEAN, 5)
+    predictor = Predictor(PredictionParams(enabled=True, horizon_ms=1000 * 2 / rate))
+    smoothed = [smoother.push(v, i / rate) for i, v in enumerate(target)]
+    predicted = [predictor.push(v, i / rate) for i, v in enumerate(smoothed)]
+
+    def ramp_error(values):
+        return sum(abs(a - b) for a, b in zip(values[:30], target[:30])) / 30
+
+    def overshoot(values):
+        return max(values) - 30
+
+    print(f"smoothed:  ramp error {ramp_error(smoothed):5.2f}, overshoot {overshoot(smoothed):5.2f}")
+    print(f"predicted: ramp error {ramp_error(predicted):5.2f}, overshoot {overshoot(predicted):5.2f}")
+
+    # Turning prediction off and on again doesn't fit to the old samples
+    on = PredictionParams(enabled=True)
+    predictor = Predictor(on)
+    for i in range(10):
+        predictor.push(10.0 + 10 * i, i / rate)  # Speeding up
+    predictor.configure(PredictionParams(enabled=False))
+    predictor.configure(on)
+    assert predictor.push(50.0, 5.0) == 50.0
+    print("Re-enabling prediction starts a new fit.")
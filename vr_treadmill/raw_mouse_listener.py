@@ -1,6 +1,6 @@
 import ctypes
 import ctypes.wintypes as wintypes
-from PyQt6 import QtCore
+import threading
 
 # Alias for brevity
 user32 = ctypes.windll.user32
@@ -12,7 +12,10 @@ kernel32 = ctypes.windll.kernel32
 RIM_TYPEMOUSE = 0x00
 RID_INPUT = 0x10000003
 WM_INPUT = 0x00FF
+WM_QUIT = 0x0012
 RIDEV_INPUTSINK = 0x00000100
+# usButtonFlags down bit for buttons 1-5; each button's up bit is the next one
+RI_MOUSE_BUTTON_DOWN_FLAGS = (0x0001, 0x0004, 0x0010, 0x0040, 0x0100)
 
 # Manually define missing wintypes
 HCURSOR = wintypes.HANDLE
@@ -127,15 +130,34 @@ class WNDCLASS(ctypes.Structure):
 # ---------------------------
 # RawMouseListener Class
 # ---------------------------
-class RawMouseListener(QtCore.QThread):
-    # Signal to emit mouse deltas (dx, dy)
-    delta_signal = QtCore.pyqtSignal(int, int)
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
+class RawMouseListener:
+    """
+    Reads raw mouse input on its own thread and passes each (dx, dy) delta to
+    on_delta, and button changes to on_button(button, pressed) with buttons
+    numbered from 1. Has no Qt dependency, so it also works in headless mode.
+    """
+
+    def __init__(self, on_delta=None, on_button=None):
+        self.on_delta = on_delta  # Called on the listener thread
+        self.on_button = on_button
         self.running = False
         self.hwnd = None
         self.wnd_proc_ref = None  # Prevent GC of callback
+        self.thread = None
+        self.thread_id = None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name="RawMouseListener", daemon=True
+        )
+        self.thread.start()
+
+    def isRunning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
 
     def create_message_window(self):
         hInstance = kernel32.GetModuleHandleW(None)
@@ -223,10 +245,19 @@ class RawMouseListener(QtCore.QThread):
             if raw.header.dwType == RIM_TYPEMOUSE:
                 dx = raw.data.mouse.lLastX
                 dy = raw.data.mouse.lLastY
-                self.delta_signal.emit(dx, dy)
+                if self.on_delta is not None:
+                    self.on_delta(dx, dy)
+                flags = raw.data.mouse.usButtonFlags
+                if flags and self.on_button is not None:
+                    for button, down in enumerate(RI_MOUSE_BUTTON_DOWN_FLAGS, 1):
+                        if flags & down:
+                            self.on_button(button, True)
+                        elif flags & (down << 1):
+                            self.on_button(button, False)
 
     def run(self):
         try:
+            self.thread_id = kernel32.GetCurrentThreadId()
             self.create_message_window()
             self.register_raw_input()
             self.running = True
@@ -249,9 +280,9 @@ class RawMouseListener(QtCore.QThread):
 
     def stop(self):
         self.running = False
-        if self.hwnd:
-            # Post a quit message to break the message loop in the thread
-            user32.PostQuitMessage(0)
+        if self.hwnd and self.thread_id is not None:
+            # Post a quit message to break the message loop in the listener thread
+            user32.PostThreadMessageW(self.thread_id, WM_QUIT, 0, 0)
 
     def cleanup_window(self):
         if self.hwnd:
@@ -0,0 +1,242 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DIR = "./profiles"
+
+# 200 samples a second is enough to find a stutter's cause while costing
+# a few percent of one core
+DEFAULT_INTERVAL = 0.005
+
+# Per-thread CPU clocks (Unix); elsewhere activity is inferred from the stack
+_thread_cpu_clock = getattr(time, "pthread_getcpuclockid", None)
+
+
+def _frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_name(ident, frame, names):
+    """The threading name, or for threads Python didn't start (QThreads) their entry point."""
+    name = names.get(ident)
+    if name is not None:
+        return name
+    while frame.f_back is not None:
+        frame = frame.f_back
+    return getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+
+
+class ThreadReport:
+    """What one thread was doing while the profiler ran."""
+
+    __slots__ = (
+        "name",
+        "samples",
+        "active_samples",
+        "cpu_time",
+        "gil_hold_delay",
+        "_last_cpu",
+        "_last_top",
+    )
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = 0
+        self.active_samples = 0  # Samples where the thread ran since the previous one
+        self.cpu_time = 0.0  # Seconds, when per-thread CPU clocks are available
+        # Sampler wake-up delay during samples where this thread was running:
+        # time the thread likely held the GIL while another thread waited for it
+        self.gil_hold_delay = 0.0
+        self._last_cpu = None
+        self._last_top = None
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread from a background thread.
+
+    Every `interval` seconds the sampler reads sys._current_frames() and
+    counts each thread's stack, so the profiled threads run unmodified.
+    Stacks are written in the collapsed format ("thread;outer;...;inner count"),
+    which speedscope and flamegraph.pl open directly.
+
+    The GIL-contention report uses the sampler itself as a probe: it asks to
+    wake every `interval`, and any delay past that is mostly spent waiting
+    for the GIL. That delay is charged to the threads that were running
+    (their CPU clock advanced, or without CPU clocks their stack changed)
+    during the sample. The JoystickWorker waking from its tick wait sees the
+    same delay.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.threads = {}
+        self.wake_delays = []
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.stacks.clear()
+        self.threads.clear()
+        self.wake_delays.clear()
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        interval = self.interval
+        while True:
+            asleep = time.perf_counter()
+            if self._stop.wait(interval):
+                break
+            delay = max(0.0, time.perf_counter() - asleep - interval)
+            self.wake_delays.append(delay)
+            self._sample(own_ident, delay)
+
+    def _sample(self, own_ident, delay):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            report = self.threads.get(ident)
+            if report is None:
+                report = self.threads[ident] = ThreadReport(_thread_name(ident, frame, names))
+
+            labels = []
+            top = frame
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(report.name)
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+
+            active = self._advance_cpu(report, ident)
+            if active is None:
+                location = (top.f_code, top.f_lineno)
+                active = location != report._last_top
+                report._last_top = location
+            report.samples += 1
+            if active:
+                report.active_samples += 1
+                report.gil_hold_delay += delay
+
+    @staticmethod
+    def _advance_cpu(report, ident):
+        """Update the thread's CPU time; return whether it ran, or None if unknown."""
+        if _thread_cpu_clock is None:
+            return None
+        try:
+            cpu = time.clock_gettime(_thread_cpu_clock(ident))
+        except (OSError, OverflowError):
+            return None
+        last = report._last_cpu
+        report._last_cpu = cpu
+        if last is None:
+            return False
+        report.cpu_time += cpu - last
+        return cpu > last
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def contention_report(self):
+        delays = sorted(self.wake_delays)
+        lines = [f"Profiled {self.elapsed:.1f} s, {len(delays)} samples every {self.interval * 1000:g} ms"]
+        if delays:
+            mean = sum(delays) / len(delays)
+            p99 = delays[min(len(delays) - 1, int(len(delays) * 0.99))]
+            lines.append(
+                f"Sampler wake-up delay (GIL wait proxy): mean {mean * 1e6:.0f}us, "
+                f"p99 {p99 * 1e6:.0f}us, max {delays[-1] * 1e6:.0f}us"
+            )
+        lines.append("")
+        lines.append(
+            f"{'Thread':<40} {'Samples':>8} {'Active':>7} {'CPU (s)':>8} "
+            f"{'GIL held while waited (ms)':>27}"
+        )
+        for report in sorted(self.threads.values(), key=lambda r: -r.gil_hold_delay):
+            active = report.active_samples / report.samples if report.samples else 0.0
+            cpu = f"{report.cpu_time:.3f}" if _thread_cpu_clock is not None else "n/a"
+            lines.append(
+                f"{report.name[:40]:<40} {report.samples:>8} {active:>7.0%} {cpu:>8} "
+                f"{report.gil_hold_delay * 1000:>27.2f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """
+        Write the collapsed stacks to `path` (a timestamped file by default)
+        and the GIL-contention report next to it; return the stacks path.
+        """
+        if path is None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.collapsed"))
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+        with open(os.path.splitext(path)[0] + "-threads.txt", "w") as f:
+            f.write(self.contention_report())
+        return path
+
+
+def toggle_profiler(profiler):
+    """Start the profiler, or stop it and write its files; for hotkeys and signals."""
+    if not profiler.running:
+        profiler.start()
+        print("Sampling profiler started.")
+        return
+    profiler.stop()
+    try:
+        print(f"Profile saved to {profiler.write()}")
+    except OSError as e:
+        print(f"Failed to save profile: {e}")
+
+
+if __name__ == "__main__":
+    # Profile a busy thread against a sleeping one
+    import tempfile
+
+    def busy():
+        end = time.perf_counter() + 1.0
+        while time.perf_counter() < end:
+            sum(range(1000))
+
+    def idle():
+        time.sleep(1.0)
+
+    profiler = SamplingProfiler()
+    profiler.start()
+    workers = [threading.Thread(target=busy, name="busy"), threading.Thread(target=idle, name="idle")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    profiler.stop()
+
+    path = profiler.write(os.path.join(tempfile.gettempdir(), "vr_treadmill_profile.collapsed"))
+    print(profiler.contention_report())
+    print(f"Hottest stacks ({path}):")
+    for stack, count in profiler.stacks.most_common(3):
+        print(f"{count:>6}  {stack[-100:]}")
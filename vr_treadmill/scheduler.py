@@ -0,0 +1,254 @@
+import ctypes
+import math
+import os
+import sys
+import time
+
+from vr_treadmill.clock import SYSTEM_CLOCK
+
+SCHEDULER_AUTO = "auto"
+SCHEDULER_HYBRID = "hybrid"
+SCHEDULER_TIMERFD = "timerfd"
+SCHEDULER_SLEEP = "sleep"
+
+# How long before a deadline the hybrid scheduler stops sleeping and starts
+# spinning. Windows timers are coarser than Linux ones, so it needs more room.
+DEFAULT_SPIN_MARGIN = 0.001 if sys.platform == "win32" else 0.0002
+MAX_SPIN_MARGIN = 0.004
+
+PR_SET_TIMERSLACK = 29
+
+
+class TickStats:
+    """Running tick jitter and missed-tick statistics."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.jitter_mean = 0.0
+        self.jitter_max = 0.0
+        self._jitter_m2 = 0.0
+
+    def record(self, lateness, missed=0):
+        """Record one served tick that woke `lateness` seconds after its deadline."""
+        self.ticks += 1
+        self.missed_ticks += missed
+
+        # Welford's online mean/variance
+        delta = lateness - self.jitter_mean
+        self.jitter_mean += delta / self.ticks
+        self._jitter_m2 += delta * (lateness - self.jitter_mean)
+        if lateness > self.jitter_max:
+            self.jitter_max = lateness
+
+    @property
+    def jitter_stddev(self):
+        if self.ticks < 2:
+            return 0.0
+        return math.sqrt(self._jitter_m2 / (self.ticks - 1))
+
+    def to_dict(self):
+        return {
+            "ticks": self.ticks,
+            "missed_ticks": self.missed_ticks,
+            "jitter_mean_us": self.jitter_mean * 1e6,
+            "jitter_stddev_us": self.jitter_stddev * 1e6,
+            "jitter_max_us": self.jitter_max * 1e6,
+        }
+
+    def summary(self):
+        return (
+            f"{self.ticks} ticks, {self.missed_ticks} missed, "
+            f"jitter mean {self.jitter_mean * 1e6:.1f}us "
+            f"sd {self.jitter_stddev * 1e6:.1f}us "
+            f"max {self.jitter_max * 1e6:.1f}us"
+        )
+
+
+class TickScheduler:
+    """
+    Fixed-rate tick scheduler on a drift-free deadline grid.
+
+    Deadlines are always `start + n * period`, so a late tick never shifts the
+    ones after it. When the loop falls more than a whole period behind, the
+    skipped deadlines are counted as missed instead of being silently dropped.
+    Subclasses only decide how to wait for a deadline.
+
+    This base class reads and sleeps on `clock`, so it can also run on a
+    VirtualClock; the subclasses wait on real OS timers.
+    """
+
+    name = SCHEDULER_SLEEP
+
+    def __init__(self, rate, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.next_time = None
+        self.last_lateness = 0.0
+        self.stats = TickStats()
+
+    def set_rate(self, rate):
+        """Change the tick rate, keeping the next deadline where it is."""
+        self.rate = rate
+        self.period = 1.0 / rate
+
+    def reset(self):
+        """Forget the deadline grid and the statistics."""
+        self.resync()
+        self.stats.reset()
+
+    def resync(self):
+        """Forget the deadline grid; the next wait() starts a new one."""
+        self.next_time = None
+
+    def wait(self):
+        """Block until the next tick deadline and return the wake-up time."""
+        clock = self.clock
+        if self.next_time is None:
+            now = clock.now()
+            self.next_time = now
+        else:
+            if clock.now() < self.next_time:
+                self._sleep_until(self.next_time)
+            now = clock.now()
+
+        lateness = now - self.next_time
+        missed = 0
+        if lateness >= self.period:
+            missed = int(lateness // self.period)
+            self.next_time += missed * self.period
+            lateness -= missed * self.period
+
+        self.last_lateness = lateness
+        self.stats.record(lateness, missed)
+        self.next_time += self.period
+        return now
+
+    def _sleep_until(self, deadline):
+        remaining = deadline - self.clock.now()
+        if remaining > 0:
+            self.clock.sleep(remaining)
+
+    def close(self):
+        pass
+
+
+class HybridScheduler(TickScheduler):
+    """
+    Sleeps until shortly before the deadline, then spins for the rest.
+
+    The spin margin adapts to how much the OS oversleeps, so the loop only
+    burns CPU for the last fraction of a millisecond of each period.
+    """
+
+    name = SCHEDULER_HYBRID
+
+    def __init__(self, rate, spin_margin=DEFAULT_SPIN_MARGIN):
+        super().__init__(rate)
+        self.requested_spin_margin = spin_margin
+        self.min_spin_margin = self.spin_margin = self._clamp_margin(spin_margin)
+
+    def _clamp_margin(self, margin):
+        # A margin of a whole period or more would never sleep at all
+        return min(margin, self.period / 2)
+
+    def set_rate(self, rate):
+        super().set_rate(rate)
+        self.min_spin_margin = self._clamp_margin(self.requested_spin_margin)
+        self.spin_margin = max(self.min_spin_margin, self._clamp_margin(self.spin_margin))
+
+    def _sleep_until(self, deadline):
+        perf_counter = time.perf_counter
+        sleep_for = deadline - perf_counter() - self.spin_margin
+        if sleep_for > 0:
+            wake_target = perf_counter() + sleep_for
+            time.sleep(sleep_for)
+            oversleep = perf_counter() - wake_target
+            # Track the worst recent oversleep with a slow decay
+            target_margin = max(self.min_spin_margin, oversleep * 1.5)
+            if target_margin > self.spin_margin:
+                self.spin_margin = min(target_margin, MAX_SPIN_MARGIN, self.period / 2)
+            else:
+                self.spin_margin += (target_margin - self.spin_margin) * 0.05
+
+        while perf_counter() < deadline:
+            pass
+
+
+class TimerfdScheduler(HybridScheduler):
+    """
+    Linux scheduler that waits on an absolute CLOCK_MONOTONIC timerfd.
+
+    time.perf_counter() is CLOCK_MONOTONIC on Linux, so deadlines can be armed
+    directly. The thread's timer slack is lowered so the kernel does not
+    coalesce the wake-up, and a short spin covers what's left.
+    """
+
+    name = SCHEDULER_TIMERFD
+
+    def __init__(self, rate, spin_margin=0.00005):
+        super().__init__(rate, spin_margin=spin_margin)
+        self.fd = os.timerfd_create(time.CLOCK_MONOTONIC, flags=os.TFD_CLOEXEC)
+        self._slack_lowered = False
+
+    def _lower_timer_slack(self):
+        # Timer slack is per-thread, so this has to run on the ticking thread
+        self._slack_lowered = True
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.prctl(PR_SET_TIMERSLACK, 1000, 0, 0, 0)
+        except (OSError, AttributeError):
+            pass
+
+    def _sleep_until(self, deadline):
+        if not self._slack_lowered:
+            self._lower_timer_slack()
+
+        wake_at = deadline - self.spin_margin
+        if wake_at > time.perf_counter():
+            os.timerfd_settime_ns(
+                self.fd, flags=os.TFD_TIMER_ABSTIME, initial=int(wake_at * 1e9)
+            )
+            os.read(self.fd, 8)
+
+        perf_counter = time.perf_counter
+        while perf_counter() < deadline:
+            pass
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def make_scheduler(rate, backend=SCHEDULER_AUTO, clock=SYSTEM_CLOCK):
+    """
+    Create a tick scheduler, picking the best available backend for 'auto'.
+
+    A virtual clock always gets the plain sleeping scheduler: its sleeps end
+    exactly on time, so there is nothing for the other backends to do.
+    """
+    if clock.virtual:
+        return TickScheduler(rate, clock)
+    if backend == SCHEDULER_AUTO:
+        backend = (
+            SCHEDULER_TIMERFD
+            if sys.platform.startswith("linux") and hasattr(os, "timerfd_create")
+            else SCHEDULER_HYBRID
+        )
+
+    if backend == SCHEDULER_TIMERFD:
+        try:
+            return TimerfdScheduler(rate)
+        except (AttributeError, OSError) as e:
+            print(f"timerfd scheduler unavailable ({e}), using hybrid scheduler.")
+            return HybridScheduler(rate)
+    if backend == SCHEDULER_HYBRID:
+        return HybridScheduler(rate)
+    if backend == SCHEDULER_SLEEP:
+        return TickScheduler(rate)
+    raise ValueError(f"Unknown scheduler backend: {backend}")
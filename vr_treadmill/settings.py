@@ -0,0 +1,58 @@
+from dataclasses import dataclass, replace
+from threading import Lock
+
+from vr_treadmill.curve_lut import CurveTable
+from vr_treadmill.outliers import OutlierParams
+from vr_treadmill.prediction import PredictionParams
+from vr_treadmill.scheduler import SCHEDULER_AUTO
+from vr_treadmill.smoothing import SMOOTHING_TYPE_MEAN, WINDOW_UNIT_SAMPLES, FilterParams
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Immutable snapshot of everything the worker loop reads each tick."""
+
+    sensitivity: float = 100
+    poll_rate: int = 60
+    # Gamepad reports per second; 0 reports on every tick
+    output_rate: int = 0
+    average_count: int = 5
+    smoothing_type: int = SMOOTHING_TYPE_MEAN
+    # Whether average_count is a number of samples or milliseconds
+    smoothing_window_unit: str = WINDOW_UNIT_SAMPLES
+    # Outlier rejection and dropout bridging ahead of smoothing
+    outlier_params: OutlierParams = OutlierParams()
+    # Tuning for the EMA, One Euro and Kalman smoothing types
+    filter_params: FilterParams = FilterParams()
+    # Extrapolation of the smoothed input to make up for smoothing lag
+    prediction_params: PredictionParams = PredictionParams()
+    use_raw_input: bool = True
+    hold_left_thumbstick: bool = False
+    recenter_enabled: bool = False
+    # None when no curve is applied (the editor window is closed)
+    curve_table: CurveTable | None = None
+    show_input_on_curve: bool = False
+    scheduler_backend: str = SCHEDULER_AUTO
+    # Scale each tick's input by the real time it covers, not the nominal period
+    normalize_rate: bool = True
+    # Tick when raw input arrives instead of on the poll rate grid
+    event_driven: bool = False
+
+
+class SettingsChannel:
+    """
+    Publishes Settings snapshots from the GUI to the worker.
+
+    Writers serialise on a lock and swap in a whole new snapshot; the worker
+    takes `current` once per tick, so it never sees a half-applied change.
+    """
+
+    def __init__(self, settings=None):
+        self.current = settings if settings is not None else Settings()
+        self._write_lock = Lock()
+
+    def update(self, **changes):
+        """Publish a copy of the current snapshot with some fields changed."""
+        with self._write_lock:
+            self.current = replace(self.current, **changes)
+            return self.current
@@ -0,0 +1,333 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from vr_treadmill.curve_lut import CURVE_MAX
+from vr_treadmill.engine import JOYSTICK_MAX, JOYSTICK_MIN, InputRate
+from vr_treadmill.input_trace import (
+    KIND_KEY_NAME,
+    KIND_MOTION,
+    TRACE_HEADER,
+    TRACE_RECORD,
+    TraceReader,
+    key_name_size,
+)
+from vr_treadmill.outliers import DROPOUT_OFF
+from vr_treadmill.smoothing import (
+    RESYNC_INTERVAL,
+    SMOOTHING_TYPE_MAX,
+    SMOOTHING_TYPE_MEAN,
+    SMOOTHING_TYPE_MEDIAN,
+    WINDOW_UNIT_SAMPLES,
+)
+
+# One trace record, as packed by TRACE_RECORD
+RECORD_DTYPE = np.dtype(
+    [("time", "<f8"), ("kind", "u1"), ("device", "u1"), ("a", "<i4"), ("b", "<i4")]
+)
+assert RECORD_DTYPE.itemsize == TRACE_RECORD.size
+
+# Smoothing types that only depend on the last `window` samples
+VECTORIZED_SMOOTHING_TYPES = (SMOOTHING_TYPE_MEAN, SMOOTHING_TYPE_MEDIAN, SMOOTHING_TYPE_MAX)
+
+# Sliding windows are processed this many values at a time to bound memory
+WINDOW_CHUNK_VALUES = 1 << 22
+
+
+def load_motion(reader):
+    """Return (times, dy) arrays of a trace's motion records, read without a Python loop."""
+    count = (len(reader.map) - TRACE_HEADER.size) // TRACE_RECORD.size
+    records = np.frombuffer(reader.map, RECORD_DTYPE, count, TRACE_HEADER.size)
+    keep = np.ones(count, dtype=bool)
+    # Key name payloads sit in whole record slots; skip them, searching only
+    # real records for the next name
+    names = np.flatnonzero(records["kind"] == KIND_KEY_NAME)
+    position = 0
+    while True:
+        names = names[names >= position]
+        if len(names) == 0:
+            break
+        index = names[0]
+        slots = key_name_size(int(records["b"][index])) // TRACE_RECORD.size
+        keep[index + 1 : index + 1 + slots] = False
+        position = index + 1 + slots
+    motion = records[keep & (records["kind"] == KIND_MOTION)]
+    return motion["time"].copy(), motion["b"].astype(np.float64)
+
+
+def can_vectorize(settings):
+    """
+    Whether simulate() can vectorize these settings. Input cleanup, prediction,
+    the recursive filters and millisecond windows carry state from tick to
+    tick in ways array operations can't reproduce exactly; simulate() runs
+    the engine itself for those.
+    """
+    outliers = settings.outlier_params
+    return (
+        settings.smoothing_type in VECTORIZED_SMOOTHING_TYPES
+        and settings.smoothing_window_unit == WINDOW_UNIT_SAMPLES
+        and not outliers.hampel_enabled
+        and outliers.dropout_mode == DROPOUT_OFF
+        and not settings.prediction_params.enabled
+    )
+
+
+def tick_grid(times, poll_rate):
+    """
+    Tick times for replaying `times` at `poll_rate`, as replay_unthrottled()
+    steps them, and the tick each event is taken by.
+    """
+    period = 1.0 / poll_rate
+    count = int((times[-1] - times[0]) / period) + 3
+    steps = np.full(count, period)
+    steps[0] = times[0] + period
+    # cumsum adds sequentially, so this matches `tick_time += period` exactly
+    ticks = np.cumsum(steps)
+    fired = int(np.searchsorted(ticks, times[-1], side="right"))
+    ticks = ticks[: fired + 1]
+    return ticks, np.searchsorted(ticks, times, side="right")
+
+
+def per_tick_rate(deltas, ticks, poll_rate):
+    """InputRate.per_tick over every tick at once."""
+    period = 1.0 / poll_rate
+    elapsed = np.empty_like(ticks)
+    elapsed[0] = period
+    elapsed[1:] = ticks[1:] - ticks[:-1]
+    elapsed = np.maximum(elapsed, period * InputRate.MIN_PERIOD_FRACTION)
+    return deltas / elapsed * period
+
+
+def running_mean(values, window):
+    """
+    RunningMean over a sample window, with the same rounding.
+
+    The live mean keeps a running total: remove the oldest sample, add the
+    newest, and every RESYNC_INTERVAL samples replace the total by an exact
+    fsum of the window. The same operations are laid out in order and summed
+    with cumsum, which adds sequentially, restarting at each resync.
+    """
+    n = len(values)
+    totals = np.empty(n)
+    previous = 0.0
+    for start in range(0, n, RESYNC_INTERVAL):
+        end = min(start + RESYNC_INTERVAL, n)
+        # Operations for ticks start..end-1: before the window fills each
+        # tick adds a sample; after it, removes the oldest and then adds
+        full_from = max(start, window)
+        filling = values[start:min(end, window)] if start < window else values[:0]
+        operations = np.empty(len(filling) + 2 * max(0, end - full_from) + 1)
+        operations[0] = previous
+        operations[1 : 1 + len(filling)] = filling
+        if end > full_from:
+            paired = operations[1 + len(filling) :].reshape(-1, 2)
+            paired[:, 0] = -values[full_from - window : end - window]
+            paired[:, 1] = values[full_from:end]
+        running = np.cumsum(operations)
+        totals[start : start + len(filling)] = running[1 : 1 + len(filling)]
+        totals[full_from:end] = running[1 + len(filling) + 1 :: 2]
+        if end - start == RESYNC_INTERVAL:
+            totals[end - 1] = math.fsum(values[max(0, end - window) : end].tolist())
+        previous = totals[end - 1]
+    counts = np.minimum(np.arange(1, n + 1), window)
+    return totals / counts
+
+
+def _windows(values, window, reduce):
+    """Apply `reduce` to every full sample window (rows of a sliding view), in chunks."""
+    view = sliding_window_view(values, window)
+    result = np.empty(len(view))
+    rows = max(1, WINDOW_CHUNK_VALUES // window)
+    for start in range(0, len(view), rows):
+        result[start : start + rows] = reduce(view[start : start + rows])
+    return result
+
+
+def _median_rows(rows):
+    width = rows.shape[1]
+    mid = width // 2
+    if width % 2 == 1:
+        return np.partition(rows, mid, axis=1)[:, mid]
+    part = np.partition(rows, (mid - 1, mid), axis=1)
+    return (part[:, mid - 1] + part[:, mid]) / 2
+
+
+def _peak_rows(rows):
+    # argmax picks the first, i.e. oldest, of equal magnitudes, like RunningPeak
+    index = np.argmax(np.abs(rows), axis=1)
+    return rows[np.arange(len(rows)), index]
+
+
+def running_window(values, window, reduce):
+    """`reduce` over the last `window` samples of every tick, including partial windows."""
+    n = len(values)
+    result = np.empty(n)
+    head = min(window - 1, n)
+    for i in range(head):
+        result[i] = reduce(values[None, : i + 1])[0]
+    if n >= window:
+        result[window - 1 :] = _windows(values, window, reduce)
+    return result
+
+
+def simulate_vectorized(times, dy, settings):
+    """The tick pipeline as array operations; see simulate()."""
+    ticks, tick_of_event = tick_grid(times, settings.poll_rate)
+    deltas = np.bincount(tick_of_event, weights=dy, minlength=len(ticks))
+    if settings.normalize_rate:
+        deltas = per_tick_rate(deltas, ticks, settings.poll_rate)
+
+    window = settings.average_count
+    if settings.smoothing_type == SMOOTHING_TYPE_MEAN:
+        smoothed = running_mean(deltas, window)
+    elif settings.smoothing_type == SMOOTHING_TYPE_MEDIAN:
+        smoothed = running_window(deltas, window, _median_rows)
+    else:
+        smoothed = running_window(deltas, window, _peak_rows)
+
+    scaled = np.abs(smoothed) * settings.sensitivity
+    curve_table = settings.curve_table
+    if curve_table is not None:
+        # CurveTable.lookup: truncate to an index and clamp it to the table
+        index = np.minimum(scaled, CURVE_MAX + 1).astype(np.int64)
+        table = np.frombuffer(curve_table.table, dtype=np.float64)
+        magnitude = table[np.clip(index, 0, CURVE_MAX)]
+    else:
+        magnitude = scaled
+
+    # int() truncates toward zero; forward input gives negative joystick Y
+    magnitude = np.trunc(np.minimum(magnitude, 2.0**62)).astype(np.int64)
+    values = np.where(smoothed > 0, -magnitude, np.where(smoothed < 0, magnitude, 0))
+    return np.clip(values, JOYSTICK_MIN, JOYSTICK_MAX)
+
+
+def simulate(trace, settings):
+    """
+    Run the pipeline over a whole trace and return every tick's joystick value.
+
+    `trace` is a path, a TraceReader, or (times, dy) arrays from load_motion().
+    Ticks fall where replay_unthrottled() puts them, and the results are
+    identical to it. Settings that can't be vectorized (see can_vectorize())
+    run through the engine instead.
+    """
+    if isinstance(trace, (str, bytes)) or hasattr(trace, "__fspath__"):
+        with TraceReader(trace) as reader:
+            return simulate(reader, settings)
+    if isinstance(trace, TraceReader):
+        if not can_vectorize(settings):
+            return _simulate_with_engine(trace, settings)
+        times, dy = load_motion(trace)
+    else:
+        times, dy = trace
+
+    if len(times) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if not can_vectorize(settings):
+        raise ValueError("these settings need the trace itself, not motion arrays")
+    return simulate_vectorized(times, dy, settings)
+
+
+def _simulate_with_engine(reader, settings):
+    from vr_treadmill.engine import TreadmillEngine
+    from vr_treadmill.input_trace import replay_unthrottled
+    from vr_treadmill.outputs import NullOutput
+    from vr_treadmill.settings import SettingsChannel
+
+    engine = TreadmillEngine(SettingsChannel(settings), NullOutput())
+    return np.array(replay_unthrottled(reader, engine, settings), dtype=np.int64)
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import sys
+    import tempfile
+    import time
+    from dataclasses import replace
+
+    from vr_treadmill.config import load_config_file, settings_from_config
+    from vr_treadmill.curve_lut import CurveTable
+    from vr_treadmill.engine import TreadmillEngine
+    from vr_treadmill.input_trace import TraceWriter, replay_unthrottled
+    from vr_treadmill.outputs import NullOutput
+    from vr_treadmill.settings import Settings, SettingsChannel
+
+    if len(sys.argv) > 1:
+        # Simulate a recorded trace, optionally with a saved config
+        settings = Settings()
+        if len(sys.argv) > 2:
+            settings = settings_from_config(load_config_file(sys.argv[2]))
+        started = time.perf_counter()
+        values = simulate(sys.argv[1], settings)
+        elapsed = time.perf_counter() - started
+        method = "vectorized" if can_vectorize(settings) else "engine loop"
+        print(
+            f"{len(values)} ticks ({len(values) / settings.poll_rate / 60:.1f} min) "
+            f"in {elapsed * 1000:.0f} ms ({method})"
+        )
+        if len(values):
+            magnitude = np.abs(values)
+            print(
+                f"Mean |value| {magnitude.mean():.0f}, p99 {np.percentile(magnitude, 99):.0f}, "
+                f"{np.count_nonzero(magnitude >= JOYSTICK_MAX)} ticks at full deflection"
+            )
+        sys.exit()
+
+    # Parity: every vectorized configuration against the engine's own loop
+    path = os.path.join(tempfile.gettempdir(), "vr_treadmill_simulator.bin")
+    rng = random.Random(1)
+    writer = TraceWriter(path)
+    t = 0.0
+    for i in range(40000):
+        t += rng.expovariate(1000)  # Irregular ~1 kHz mouse reports
+        speed = 25 * math.sin(i / 4000) + (rng.gauss(0, 4) if rng.random() < 0.9 else 0)
+        writer.motion(0, int(speed), writer.start + t)
+        if i % 7000 == 0:
+            writer.key("Key.f9", True, writer.start + t)
+    writer.close()
+
+    curve = CurveTable([(0, 0), (3000, 8000), (12000, 26000), (32767, 32767)])
+    cases = []
+    for smoothing_type in (SMOOTHING_TYPE_MEAN, SMOOTHING_TYPE_MEDIAN, SMOOTHING_TYPE_MAX):
+        for window in (1, 4, 5, 60):
+            for normalize_rate in (True, False):
+                for curve_table in (None, curve):
+                    cases.append(
+                        Settings(
+                            poll_rate=rng.choice((60, 90, 250, 1000)),
+                            sensitivity=rng.choice((1, 37.5, 100, 2000)),
+                            smoothing_type=smoothing_type,
+                            average_count=window,
+                            normalize_rate=normalize_rate,
+                            curve_table=curve_table,
+                        )
+                    )
+
+    engine = TreadmillEngine(SettingsChannel(Settings()), NullOutput())
+    with TraceReader(path) as reader:
+        motion = load_motion(reader)
+        for settings in cases:
+            expected = replay_unthrottled(reader, engine, settings)
+            actual = simulate(motion, settings)
+            assert actual.tolist() == expected, settings
+    print(f"Bit-for-bit parity with the engine in {len(cases)} configurations.")
+    os.remove(path)
+
+    # Throughput: two hours of 1 kHz mouse reports
+    hours = 2
+    events = hours * 3600 * 1000
+    times = np.arange(events) / 1000.0
+    dy = np.round(25 * np.sin(np.arange(events) / 4000)).astype(np.float64)
+    for settings in (
+        Settings(poll_rate=90),
+        Settings(poll_rate=90, smoothing_type=SMOOTHING_TYPE_MEDIAN, curve_table=curve),
+        replace(Settings(poll_rate=250, average_count=20), smoothing_type=SMOOTHING_TYPE_MAX),
+    ):
+        started = time.perf_counter()
+        values = simulate((times, dy), settings)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{hours} h at {settings.poll_rate} Hz, type {settings.smoothing_type}, window "
+            f"{settings.average_count}: {len(values)} ticks in {elapsed * 1000:.0f} ms"
+        )
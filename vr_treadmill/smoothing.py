@@ -0,0 +1,600 @@
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+SMOOTHING_TYPE_MEAN = 0
+SMOOTHING_TYPE_MEDIAN = 1
+SMOOTHING_TYPE_MAX = 2
+# Recursive filters: O(1) state, no window
+SMOOTHING_TYPE_EMA = 3
+SMOOTHING_TYPE_ONE_EURO = 4
+SMOOTHING_TYPE_KALMAN = 5
+
+# What the smoothing window size counts
+WINDOW_UNIT_SAMPLES = "samples"
+WINDOW_UNIT_MS = "ms"
+WINDOW_UNITS = (WINDOW_UNIT_SAMPLES, WINDOW_UNIT_MS)
+
+# Size hint for the median skiplist when the window is a duration (1 s at 1 kHz)
+TIMED_WINDOW_EXPECTED_SAMPLES = 1024
+
+# Float running sums drift as values are added and removed, so they are
+# recomputed exactly from the window this often.
+RESYNC_INTERVAL = 4096
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO backed by a preallocated list."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = [0] * capacity
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self.items[(self.start + i) % self.capacity]
+
+    def is_full(self):
+        return self.size == self.capacity
+
+    def push(self, value):
+        """Append a value. The caller must pop first if the buffer is full."""
+        self.items[(self.start + self.size) % self.capacity] = value
+        self.size += 1
+
+    def pop(self):
+        """Remove and return the oldest value."""
+        value = self.items[self.start]
+        self.start = (self.start + 1) % self.capacity
+        self.size -= 1
+        return value
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+
+class TimedRingBuffer:
+    """
+    FIFO of timestamped samples, for windows bounded by age instead of count.
+
+    Backed by preallocated lists that double when full, so once the window's
+    size has settled a push allocates nothing. Iterates over the values.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.times = [0.0] * capacity
+        self.items = [0] * capacity
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self.items[(self.start + i) % self.capacity]
+
+    def push(self, timestamp, value):
+        if self.size == self.capacity:
+            self._grow()
+        i = (self.start + self.size) % self.capacity
+        self.times[i] = timestamp
+        self.items[i] = value
+        self.size += 1
+
+    def oldest_time(self):
+        return self.times[self.start]
+
+    def pop(self):
+        """Remove and return the oldest value."""
+        value = self.items[self.start]
+        self.start = (self.start + 1) % self.capacity
+        self.size -= 1
+        return value
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+    def _grow(self):
+        order = [(self.start + i) % self.capacity for i in range(self.size)]
+        self.capacity *= 2
+        self.times = [self.times[i] for i in order] + [0.0] * (self.capacity - self.size)
+        self.items = [self.items[i] for i in order] + [0] * (self.capacity - self.size)
+        self.start = 0
+
+
+class _SkiplistNode:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, next, width):
+        self.value = value
+        self.next = next
+        self.width = width
+
+
+_NIL = _SkiplistNode(math.inf, [], [])
+
+
+class IndexableSkiplist:
+    """
+    Sorted multiset with O(log n) insert, remove and access by rank.
+
+    Each link stores how many bottom-level nodes it skips, which is what makes
+    indexing by rank possible.
+    """
+
+    def __init__(self, expected_size=100):
+        self.size = 0
+        self.maxlevels = int(1 + math.log2(max(expected_size, 2)))
+        self.levels_top_down = tuple(reversed(range(self.maxlevels)))
+        self.head = _SkiplistNode(
+            None, [_NIL] * self.maxlevels, [1] * self.maxlevels
+        )
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("skiplist index out of range")
+        node = self.head
+        i += 1
+        for level in self.levels_top_down:
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not _NIL:
+            yield node.value
+            node = node.next[0]
+
+    def insert(self, value):
+        chain = [None] * self.maxlevels
+        steps_at_level = [0] * self.maxlevels
+        node = self.head
+        for level in self.levels_top_down:
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.maxlevels, 1 - int(math.log2(1.0 - random.random())))
+        new_node = _SkiplistNode(value, [None] * levels, [None] * levels)
+        steps = 0
+        for level in range(levels):
+            prev_node = chain[level]
+            new_node.next[level] = prev_node.next[level]
+            prev_node.next[level] = new_node
+            new_node.width[level] = prev_node.width[level] - steps
+            prev_node.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.maxlevels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.maxlevels
+        node = self.head
+        for level in self.levels_top_down:
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        if value != chain[0].next[0].value:
+            raise KeyError(f"{value} not in skiplist")
+
+        levels = len(chain[0].next[0].next)
+        for level in range(levels):
+            prev_node = chain[level]
+            prev_node.width[level] += prev_node.next[level].width[level] - 1
+            prev_node.next[level] = prev_node.next[level].next[level]
+        for level in range(levels, self.maxlevels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RunningMean:
+    """Window mean from a running sum, O(1) per sample."""
+
+    def __init__(self, capacity):
+        self.total = 0
+        self.count = 0
+        self.updates = 0
+
+    def add(self, value):
+        self.total += value
+        self.count += 1
+
+    def remove(self, value):
+        self.total -= value
+        self.count -= 1
+
+    def resync(self, window):
+        # Integer sums are exact; only float input needs the periodic resync
+        self.updates += 1
+        if self.updates >= RESYNC_INTERVAL:
+            self.updates = 0
+            if isinstance(self.total, float):
+                self.total = math.fsum(window)
+
+    def value(self):
+        return self.total / self.count
+
+
+class RunningMedian:
+    """Window median from an indexable skiplist, O(log n) per sample."""
+
+    def __init__(self, capacity):
+        self.sorted = IndexableSkiplist(capacity)
+
+    def add(self, value):
+        self.sorted.insert(value)
+
+    def remove(self, value):
+        self.sorted.remove(value)
+
+    def resync(self, window):
+        pass
+
+    def value(self):
+        n = len(self.sorted)
+        mid = n // 2
+        if n % 2 == 1:
+            return self.sorted[mid]
+        return (self.sorted[mid - 1] + self.sorted[mid]) / 2
+
+
+class RunningPeak:
+    """
+    Window value with the largest magnitude, amortised O(1) per sample.
+
+    A monotonic deque keeps only values that can still become the peak. Ties
+    resolve to the oldest value, matching max(window, key=abs).
+    """
+
+    def __init__(self, capacity):
+        self.candidates = deque()
+        self.added = 0
+        self.removed = 0
+
+    def add(self, value):
+        magnitude = abs(value)
+        candidates = self.candidates
+        while candidates and candidates[-1][1] < magnitude:
+            candidates.pop()
+        candidates.append((self.added, magnitude, value))
+        self.added += 1
+
+    def remove(self, value):
+        # Values always leave the window oldest-first
+        if self.candidates and self.candidates[0][0] == self.removed:
+            self.candidates.popleft()
+        self.removed += 1
+
+    def resync(self, window):
+        pass
+
+    def value(self):
+        return self.candidates[0][2]
+
+
+_AGGREGATES = {
+    SMOOTHING_TYPE_MEAN: RunningMean,
+    SMOOTHING_TYPE_MEDIAN: RunningMedian,
+    SMOOTHING_TYPE_MAX: RunningPeak,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class FilterParams:
+    """Tuning for the recursive filters. Inputs are in counts per tick."""
+
+    ema_time_constant_ms: float = 50.0
+    one_euro_min_cutoff: float = 1.0  # Hz, cutoff when the input is steady
+    one_euro_beta: float = 0.05  # How fast the cutoff rises with the rate of change
+    one_euro_derivative_cutoff: float = 1.0  # Hz
+    kalman_process_noise: float = 50000.0  # How quickly the true value can change
+    kalman_measurement_noise: float = 25.0  # Variance of the input noise
+
+
+class ExponentialMovingAverage:
+    """
+    EMA with a time constant rather than a fixed weight, so a tick counts in
+    proportion to the time it covers.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.estimate = None
+        self.last_time = None
+
+    def push(self, value, now):
+        if self.estimate is None:
+            self.estimate = value
+        else:
+            dt = now - self.last_time
+            alpha = 1.0 - math.exp(-dt * 1000 / self.params.ema_time_constant_ms)
+            self.estimate += alpha * (value - self.estimate)
+        self.last_time = now
+        return self.estimate
+
+
+def _smoothing_factor(dt, cutoff):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., 2012): a low-pass filter whose cutoff
+    rises with the input's rate of change. Slow, steady walking is smoothed
+    heavily; speeding up or stopping passes through with little lag.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.estimate = None
+        self.derivative = 0.0
+        self.last_time = None
+
+    def push(self, value, now):
+        params = self.params
+        if self.estimate is None:
+            self.estimate = value
+        else:
+            dt = now - self.last_time
+            if dt <= 0:
+                return self.estimate
+            raw_derivative = (value - self.estimate) / dt
+            a = _smoothing_factor(dt, params.one_euro_derivative_cutoff)
+            self.derivative += a * (raw_derivative - self.derivative)
+
+            cutoff = params.one_euro_min_cutoff + params.one_euro_beta * abs(self.derivative)
+            a = _smoothing_factor(dt, cutoff)
+            self.estimate += a * (value - self.estimate)
+        self.last_time = now
+        return self.estimate
+
+
+class ConstantVelocityKalman:
+    """
+    1-D Kalman filter tracking the input and its rate of change.
+
+    The constant-velocity model follows ramps without the lag of an average;
+    process noise sets how quickly it trusts a change, measurement noise how
+    much jitter it expects.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.estimate = None
+        self.rate = 0.0
+        self.last_time = None
+        # Covariance [[p00, p01], [p01, p11]]
+        self.p00 = self.p01 = self.p11 = 0.0
+
+    def push(self, value, now):
+        params = self.params
+        if self.estimate is None:
+            self.estimate = value
+            self.p00 = params.kalman_measurement_noise
+            self.p01 = 0.0
+            self.p11 = params.kalman_process_noise
+            self.last_time = now
+            return self.estimate
+
+        # Predict
+        dt = now - self.last_time
+        self.last_time = now
+        q = params.kalman_process_noise
+        self.estimate += self.rate * dt
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt**3 / 3
+        p01 = self.p01 + dt * self.p11 + q * dt**2 / 2
+        p11 = self.p11 + q * dt
+
+        # Update with the measurement
+        innovation = value - self.estimate
+        s = p00 + params.kalman_measurement_noise
+        k0 = p00 / s
+        k1 = p01 / s
+        self.estimate += k0 * innovation
+        self.rate += k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.estimate
+
+
+_FILTERS = {
+    SMOOTHING_TYPE_EMA: ExponentialMovingAverage,
+    SMOOTHING_TYPE_ONE_EURO: OneEuroFilter,
+    SMOOTHING_TYPE_KALMAN: ConstantVelocityKalman,
+}
+
+
+class Smoother:
+    """
+    Sliding-window smoother over the last `window` samples, or over the samples
+    from the last `window` milliseconds when `unit` is WINDOW_UNIT_MS.
+
+    The cost per sample does not depend on the window size: mean is O(1),
+    median O(log n) and peak amortised O(1). The recursive filters (EMA, One
+    Euro, Kalman) ignore the window and are tuned by `params` instead.
+    """
+
+    def __init__(
+        self,
+        smoothing_type=SMOOTHING_TYPE_MEAN,
+        window=5,
+        unit=WINDOW_UNIT_SAMPLES,
+        params=FilterParams(),
+    ):
+        self.smoothing_type = smoothing_type
+        self.window = window
+        self.unit = unit
+        self.params = params
+        self.filter = None
+        self.history = self._make_history()
+        self.aggregate = self._make_aggregate()
+
+    def _make_history(self):
+        if self.unit == WINDOW_UNIT_MS:
+            return TimedRingBuffer()
+        return RingBuffer(self.window)
+
+    def _make_aggregate(self):
+        filter_type = _FILTERS.get(self.smoothing_type)
+        self.filter = filter_type(self.params) if filter_type is not None else None
+
+        aggregate_type = _AGGREGATES.get(self.smoothing_type, RunningMean)
+        capacity = self.window if self.unit != WINDOW_UNIT_MS else TIMED_WINDOW_EXPECTED_SAMPLES
+        aggregate = aggregate_type(capacity)
+        for value in self.history:
+            aggregate.add(value)
+        return aggregate
+
+    def configure(self, smoothing_type, window, unit=WINDOW_UNIT_SAMPLES, params=None):
+        """Apply new settings. Resizing the window or changing its unit clears the history."""
+        if params is not None and params is not self.params:
+            # Filters keep their state and pick up new tuning on the next sample
+            self.params = params
+            if self.filter is not None:
+                self.filter.params = params
+        if window != self.window or unit != self.unit:
+            self.window = window
+            self.unit = unit
+            self.history = self._make_history()
+            self.smoothing_type = smoothing_type
+            self.aggregate = self._make_aggregate()
+        elif smoothing_type != self.smoothing_type:
+            if self.filter is not None:
+                # The window wasn't kept up to date while a filter ran
+                self.history.clear()
+            self.smoothing_type = smoothing_type
+            self.aggregate = self._make_aggregate()
+
+    def reset(self):
+        self.history.clear()
+        self.aggregate = self._make_aggregate()
+
+    def push(self, value, now=None):
+        """
+        Add a sample and return the smoothed value of the window.
+
+        `now` is the sample's time in seconds, used by millisecond windows;
+        it defaults to time.perf_counter().
+        """
+        if self.filter is not None:
+            return self.filter.push(value, time.perf_counter() if now is None else now)
+
+        history = self.history
+        aggregate = self.aggregate
+        if self.unit == WINDOW_UNIT_MS:
+            if now is None:
+                now = time.perf_counter()
+            history.push(now, value)
+            aggregate.add(value)
+            # The new sample is never older than the cutoff, so the window can't empty
+            cutoff = now - self.window / 1000
+            while history.oldest_time() <= cutoff:
+                aggregate.remove(history.pop())
+        else:
+            if history.is_full():
+                aggregate.remove(history.pop())
+            history.push(value)
+            aggregate.add(value)
+        aggregate.resync(history)
+        return aggregate.value()
+
+
+if __name__ == "__main__":
+    # Micro-benchmarks against the list + statistics implementation this replaced
+    import statistics
+    import timeit
+
+    def legacy_push(history, value, smoothing_type, window):
+        history.append(value)
+        if len(history) > window:
+            history[:] = history[-window:]
+        if smoothing_type == SMOOTHING_TYPE_MEAN:
+            return statistics.mean(history)
+        elif smoothing_type == SMOOTHING_TYPE_MEDIAN:
+            return statistics.median(history)
+        return max(history, key=abs)
+
+    rng = random.Random(1)
+    samples = [rng.randint(-40, 40) for _ in range(20000)]
+    names = {
+        SMOOTHING_TYPE_MEAN: "mean",
+        SMOOTHING_TYPE_MEDIAN: "median",
+        SMOOTHING_TYPE_MAX: "peak",
+    }
+
+    print(f"{'type':<8}{'window':>8}{'legacy us':>12}{'streaming us':>14}")
+    for smoothing_type, name in names.items():
+        for window in (5, 50, 500, 2000):
+            history = []
+            smoother = Smoother(smoothing_type, window)
+            expected = [legacy_push(history, v, smoothing_type, window) for v in samples]
+            actual = [smoother.push(v) for v in samples]
+            assert expected == actual, f"{name} window {window} does not match"
+
+            legacy_time = timeit.timeit(
+                lambda: [legacy_push(history, v, smoothing_type, window) for v in samples],
+                number=1,
+            )
+            streaming_time = timeit.timeit(
+                lambda: [smoother.push(v) for v in samples], number=1
+            )
+            print(
+                f"{name:<8}{window:>8}"
+                f"{legacy_time / len(samples) * 1e6:>12.2f}"
+                f"{streaming_time / len(samples) * 1e6:>14.2f}"
+            )
+
+    # A millisecond window over evenly spaced samples must match the same
+    # window counted in samples. The period is a power of two so the
+    # timestamps are exact.
+    period = 1 / 1024
+    for smoothing_type, name in names.items():
+        for window in (5, 50, 500):
+            by_count = Smoother(smoothing_type, window)
+            by_time = Smoother(smoothing_type, window * period * 1000, WINDOW_UNIT_MS)
+            expected = [by_count.push(v) for v in samples]
+            actual = [by_time.push(v, i * period) for i, v in enumerate(samples)]
+            assert expected == actual, f"{name} {window}-sample time window does not match"
+    print("Millisecond windows match sample windows.")
+
+    # Lag and jitter on a noisy step from standing to walking, sampled at 60 Hz
+    rate = 60
+    step = [0.0] * rate + [30.0] * (2 * rate)
+    noisy = [v + rng.gauss(0, 4) for v in step]
+    smoothers = {
+        "mean 5": Smoother(SMOOTHING_TYPE_MEAN, 5),
+        "median 5": Smoother(SMOOTHING_TYPE_MEDIAN, 5),
+        "ema": Smoother(SMOOTHING_TYPE_EMA),
+        "one euro": Smoother(SMOOTHING_TYPE_ONE_EURO),
+        "kalman": Smoother(SMOOTHING_TYPE_KALMAN),
+    }
+    print(f"\n{'filter':<10}{'90% rise ms':>12}{'steady sd':>11}")
+    for name, smoother in smoothers.items():
+        out = [smoother.push(v, i / rate) for i, v in enumerate(noisy)]
+        rise = next(i for i in range(rate, len(out)) if out[i] >= 27) - rate
+        steady = out[2 * rate :]
+        steady_mean = sum(steady) / len(steady)
+        sd = math.sqrt(sum((v - steady_mean) ** 2 for v in steady) / len(steady))
+        print(f"{name:<10}{rise * 1000 / rate:>12.0f}{sd:>11.2f}")
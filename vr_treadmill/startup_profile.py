@@ -0,0 +1,102 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """
+    Records how long startup phases and top-level package imports take.
+
+    Import times are self times: a package's figure does not include other
+    top-level packages it imported first. Submodules imported after their
+    package, like PyQt6.QtWidgets after PyQt6, are charged to the package.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.marks = {}
+        self.imports = {}
+        self._import_stack = []
+        self._original_import = None
+
+    def install_import_hook(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self._original_import
+        top_level = name.partition(".")[0]
+        if (
+            level != 0
+            or name in sys.modules
+            or any(frame[0] == top_level for frame in self._import_stack)
+        ):
+            return original_import(name, globals, locals, fromlist, level)
+
+        frame = [top_level, 0.0]
+        self._import_stack.append(frame)
+        started = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._import_stack.pop()
+            self.imports[top_level] = self.imports.get(top_level, 0.0) + elapsed - frame[1]
+            if self._import_stack:
+                self._import_stack[-1][1] += elapsed
+
+    @contextmanager
+    def phase(self, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((label, time.perf_counter() - started))
+
+    def mark(self, label):
+        """Record a point in time relative to the start of the profile."""
+        self.phases.append((label, None))
+        self.marks[label] = time.perf_counter() - self.start
+
+    def report(self, top_imports=10):
+        lines = ["Startup profile:"]
+        for label, duration in self.phases:
+            if duration is None:
+                lines.append(f"  {label:<36} at {self.marks[label] * 1000:8.1f} ms")
+            else:
+                lines.append(f"  {label:<36} {duration * 1000:11.1f} ms")
+
+        if self.imports:
+            lines.append("  Slowest imports (self time):")
+            slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+            for name, duration in slowest[:top_imports]:
+                lines.append(f"    {name:<34} {duration * 1000:11.1f} ms")
+        print("\n".join(lines))
+
+
+# Set by the CLI when --startup-profile is given
+active_profile = None
+
+
+def enable():
+    global active_profile
+    active_profile = StartupProfile()
+    active_profile.install_import_hook()
+    return active_profile
+
+
+@contextmanager
+def phase(label):
+    """Time a phase if startup profiling is enabled; otherwise do nothing."""
+    if active_profile is None:
+        yield
+    else:
+        with active_profile.phase(label):
+            yield
@@ -0,0 +1,22 @@
+class TelemetrySlot:
+    """
+    Latest-value slot the worker writes every tick and the GUI samples.
+
+    Writing is a single reference store, so the worker never signals or
+    blocks, and the GUI's repaint cost depends on its own display rate rather
+    than the poll rate.
+    """
+
+    def __init__(self):
+        self.latest = (0, None)
+
+    def write(self, output, curve_input=None):
+        """Store the latest joystick output and curve input (None if not shown)."""
+        self.latest = (output, curve_input)
+
+    def read(self):
+        """Return the latest (output, curve_input) pair."""
+        return self.latest
+
+    def clear(self):
+        self.latest = (0, None)
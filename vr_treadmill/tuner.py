@@ -0,0 +1,296 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from vr_treadmill.config import (
+    CONFIG_DIR,
+    config_path,
+    load_config_file,
+    settings_from_config,
+)
+from vr_treadmill.curve_lut import (
+    CURVE_MAX,
+    CurveTable,
+    mapping_from_points,
+    points_from_mapping,
+)
+from vr_treadmill.engine import JOYSTICK_MAX
+from vr_treadmill.input_trace import TraceReader
+from vr_treadmill.settings import Settings
+from vr_treadmill.simulator import can_vectorize, load_motion, simulate, tick_grid
+from vr_treadmill.smoothing import SMOOTHING_TYPE_MAX, SMOOTHING_TYPE_MEAN, SMOOTHING_TYPE_MEDIAN
+
+
+@dataclass(frozen=True, slots=True)
+class TargetProfile:
+    """The output the tuner aims for, and how much each kind of miss costs."""
+
+    # Input speed (counts per second) that should give full stick; None uses
+    # the trace's 95th percentile walking speed
+    full_speed: float | None = None
+    # The target follows the input through a centred moving average this
+    # long: smooth, but with no lag
+    reference_ms: float = 100.0
+    max_latency_ms: float = 300.0
+    # Score = mean error (% of full stick) + these weights times each metric
+    latency_weight: float = 0.05  # per ms
+    jitter_weight: float = 2.0  # per % of full stick RMS tick-to-tick noise
+    overshoot_weight: float = 2.0  # per % of full stick mean excess
+
+
+@dataclass(frozen=True, slots=True)
+class SearchSpace:
+    sensitivities: tuple = (25.0, 50.0, 100.0, 200.0, 400.0)
+    average_counts: tuple = (1, 3, 5, 10)
+    smoothing_types: tuple = (SMOOTHING_TYPE_MEAN, SMOOTHING_TYPE_MEDIAN, SMOOTHING_TYPE_MAX)
+    # Curves have fixed endpoints and control points at these fractions of
+    # the input range, whose outputs are searched over `curve_levels`
+    # (fractions of full output), never decreasing. A straight line is
+    # always a candidate too.
+    curve_inputs: tuple = (1 / 3, 2 / 3)
+    curve_levels: tuple = (0.2, 0.4, 0.6, 0.8, 1.0)
+
+    def curves(self):
+        yield None
+        inputs = [int(fraction * CURVE_MAX) for fraction in self.curve_inputs]
+        for levels in itertools.combinations_with_replacement(self.curve_levels, len(inputs)):
+            interior = [(x, int(level * CURVE_MAX)) for x, level in zip(inputs, levels)]
+            yield ((0, 0), *interior, (CURVE_MAX, CURVE_MAX))
+
+    def candidates(self):
+        for curve in self.curves():
+            for smoothing_type in self.smoothing_types:
+                for average_count in self.average_counts:
+                    for sensitivity in self.sensitivities:
+                        yield Candidate(sensitivity, average_count, smoothing_type, curve)
+
+
+@dataclass(frozen=True, slots=True)
+class Candidate:
+    sensitivity: float
+    average_count: int
+    smoothing_type: int
+    curve: tuple | None  # (input, output) points, or None for no curve
+
+    def editor_points(self):
+        """The curve as curve editor positions, as saved in configs."""
+        return None if self.curve is None else points_from_mapping(self.curve)
+
+
+@dataclass(frozen=True, slots=True)
+class Score:
+    score: float
+    latency_ms: float
+    jitter: float
+    overshoot: float
+    error: float
+
+    def summary(self):
+        return (
+            f"score {self.score:.2f}: error {self.error:.2f}%, latency {self.latency_ms:.0f} ms, "
+            f"jitter {self.jitter:.2f}%, overshoot {self.overshoot:.2f}%"
+        )
+
+
+def target_output(times, dy, poll_rate, profile):
+    """The ideal joystick value for every tick of the trace, and the full speed used."""
+    ticks, tick_of_event = tick_grid(times, poll_rate)
+    velocity = np.bincount(tick_of_event, weights=dy, minlength=len(ticks)) * poll_rate
+    width = max(1, round(profile.reference_ms / 1000 * poll_rate))
+    reference = np.convolve(velocity, np.ones(width) / width, mode="same")
+
+    full_speed = profile.full_speed
+    if full_speed is None:
+        moving = np.abs(reference[reference != 0])
+        full_speed = float(np.percentile(moving, 95)) if len(moving) else 1.0
+    target = np.minimum(np.abs(reference) / full_speed, 1.0) * JOYSTICK_MAX
+    # Forward input gives negative joystick Y
+    return -np.sign(reference) * target, full_speed
+
+
+def score_output(values, target, poll_rate, profile):
+    """Compare a simulated output with the target, allowing for its best-fitting delay."""
+    values = values.astype(np.float64)
+    n = len(values)
+    max_lag = min(n - 1, int(profile.max_latency_ms / 1000 * poll_rate))
+    correlations = [np.dot(values[lag:], target[: n - lag]) for lag in range(max_lag + 1)]
+    lag = int(np.argmax(correlations))
+    output = values[lag:]
+    aligned = target[: n - lag]
+
+    scale = 100 / JOYSTICK_MAX
+    latency_ms = lag * 1000 / poll_rate
+    error = float(np.mean(np.abs(output - aligned))) * scale
+    jitter = float(np.std(np.diff(output) - np.diff(aligned))) * scale if len(output) > 1 else 0.0
+    overshoot = float(np.mean(np.maximum(np.abs(output) - np.abs(aligned), 0))) * scale
+    return Score(
+        error
+        + profile.latency_weight * latency_ms
+        + profile.jitter_weight * jitter
+        + profile.overshoot_weight * overshoot,
+        latency_ms,
+        jitter,
+        overshoot,
+        error,
+    )
+
+
+# Per worker process: the trace and target, loaded once by _init_worker
+_worker = None
+
+
+class _Worker:
+    def __init__(self, trace_path, base, profile):
+        self.reader = TraceReader(trace_path)
+        self.motion = load_motion(self.reader)
+        self.base = base
+        self.profile = profile
+        self.target, _ = target_output(*self.motion, base.poll_rate, profile)
+        self.curve_tables = {}
+
+    def settings_for(self, candidate):
+        curve_table = None
+        if candidate.curve is not None:
+            curve_table = self.curve_tables.get(candidate.curve)
+            if curve_table is None:
+                # Evaluate the curve as it will load from the saved editor points
+                mapping = mapping_from_points(candidate.editor_points())
+                curve_table = self.curve_tables[candidate.curve] = CurveTable(mapping)
+        return replace(
+            self.base,
+            sensitivity=candidate.sensitivity,
+            average_count=candidate.average_count,
+            smoothing_type=candidate.smoothing_type,
+            curve_table=curve_table,
+        )
+
+    def evaluate(self, candidate):
+        settings = self.settings_for(candidate)
+        trace = self.motion if can_vectorize(settings) else self.reader
+        values = simulate(trace, settings)
+        return score_output(values, self.target, settings.poll_rate, self.profile)
+
+
+def _init_worker(trace_path, base, profile):
+    global _worker
+    _worker = _Worker(trace_path, base, profile)
+
+
+def _evaluate(candidate):
+    return candidate, _worker.evaluate(candidate)
+
+
+def tune(trace_path, base=None, space=SearchSpace(), profile=TargetProfile(), workers=None):
+    """
+    Score every candidate in `space` against the target and return
+    (candidate, score) pairs, best first.
+
+    Candidates are spread over a ProcessPoolExecutor; each worker maps the
+    trace and computes the target once. Settings the candidates don't vary
+    come from `base`.
+    """
+    base = base if base is not None else Settings()
+    candidates = list(space.candidates())
+    chunksize = max(1, len(candidates) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(trace_path, base, profile)
+    ) as executor:
+        results = list(executor.map(_evaluate, candidates, chunksize=chunksize))
+    results.sort(key=lambda result: result[1].score)
+    return results
+
+
+def write_config(candidate, name, base_config=None):
+    """Save a candidate as a config MainWindow.load_config can read; return the path."""
+    config = dict(base_config or {})
+    config.update(
+        sensitivity=f"{candidate.sensitivity:g}",
+        average_count=str(candidate.average_count),
+        smoothing_type=candidate.smoothing_type,
+        curve_editor_open=candidate.curve is not None,
+        curve_points=candidate.editor_points(),
+    )
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    path = config_path(name)
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m vr_treadmill.tuner",
+        description="Search sensitivity, smoothing and curve settings against a recorded "
+        "input trace.",
+    )
+    parser.add_argument("trace", help="Input trace captured with --trace.")
+    parser.add_argument(
+        "--config", metavar="FILE", help="Config to start from; other settings are kept."
+    )
+    parser.add_argument(
+        "--name", help="Name of the config to write (default: 'tuned <trace name>')."
+    )
+    parser.add_argument(
+        "--full-speed",
+        type=float,
+        metavar="COUNTS",
+        help="Input speed in counts per second that should give full stick "
+        "(default: the trace's 95th percentile walking speed).",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core).")
+    args = parser.parse_args(argv)
+
+    base_config = {}
+    try:
+        if args.config:
+            base_config = load_config_file(args.config)
+        base = settings_from_config(base_config) if base_config else Settings()
+        with TraceReader(args.trace) as reader:
+            times, dy = load_motion(reader)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Failed to load: {e}")
+        return 1
+    if len(times) == 0:
+        print(f"{args.trace} has no mouse motion")
+        return 1
+
+    profile = TargetProfile(full_speed=args.full_speed)
+    _, full_speed = target_output(times, dy, base.poll_rate, profile)
+    profile = replace(profile, full_speed=full_speed)
+    space = SearchSpace()
+    candidates = sum(1 for _ in space.candidates())
+    print(
+        f"Tuning {candidates} candidates over {times[-1] - times[0]:.0f} s of input "
+        f"at {base.poll_rate} Hz, full stick at {full_speed:.0f} counts/s"
+    )
+
+    started = time.perf_counter()
+    results = tune(args.trace, base, space, profile, args.workers)
+    print(f"Evaluated in {time.perf_counter() - started:.1f} s. Best:")
+    for candidate, score in results[:5]:
+        curve = "linear"
+        if candidate.curve is not None:
+            curve = ", ".join(f"{x}->{y}" for x, y in candidate.curve[1:-1])
+        print(
+            f"  sensitivity {candidate.sensitivity:g}, window {candidate.average_count}, "
+            f"type {candidate.smoothing_type}, curve {curve}: {score.summary()}"
+        )
+
+    name = args.name or f"tuned {os.path.splitext(os.path.basename(args.trace))[0]}"
+    try:
+        print(f"Config saved to {write_config(results[0][0], name, base_config)}")
+    except OSError as e:
+        print(f"Failed to save config: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
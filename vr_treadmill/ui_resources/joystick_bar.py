@@ -11,8 +11,11 @@ class JoystickBar(QWidget):
         self.setMinimumHeight(25)
 
     def set_value(self, value):
-        """Update the bar value and trigger repaint."""
-        self.value = max(-32768, min(32767, value))  # Clamp
+        """Update the bar value and trigger repaint if it changed."""
+        value = max(-32768, min(32767, value))  # Clamp
+        if value == self.value:
+            return
+        self.value = value
         self.update()
 
     @override